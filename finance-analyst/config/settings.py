@@ -13,6 +13,8 @@ class Settings:
     openai: OpenAISettings = field(default_factory=OpenAISettings)
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     log_file: str = os.getenv("LOG_FILE", "trading.log")
+    market_data_dir: str = os.getenv("MARKET_DATA_DIR", "")  # Shared on-disk OHLCV history, disabled when empty
+    market_cache_size: int = int(os.getenv("MARKET_CACHE_SIZE", "512"))  # Max entries per market data cache
 
 # Export a singleton-like config object
 config = Settings() 
\ No newline at end of file
@@ -1,3 +1,4 @@
+import pandas as pd
 import yfinance as yf
 from typing import Dict, Any
 
@@ -40,6 +41,35 @@ class ApiClient:
 
             return {'chart': {'result': [result]}}
 
+        elif endpoint == 'YahooFinance/get_quotes':
+            # Latest 1-minute close for many symbols in one download
+            symbols = list(query.get('symbols', []))
+            if not symbols:
+                return {'quoteResponse': {'result': []}}
+            try:
+                data = yf.download(tickers=symbols, period='1d', interval='1m', group_by='ticker',
+                                   auto_adjust=False, progress=False, threads=True)
+            except Exception:
+                return {}
+
+            result = []
+            for symbol in symbols:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if symbol not in data.columns.get_level_values(0):
+                        continue
+                    frame = data[symbol]
+                else:
+                    frame = data  # A single ticker may come back without the ticker level
+                closes = frame['Close'].dropna() if 'Close' in frame.columns else None
+                if closes is None or closes.empty:
+                    continue
+                result.append({
+                    'symbol': symbol,
+                    'regularMarketPrice': float(closes.iloc[-1]),
+                    'regularMarketTime': int(closes.index[-1].timestamp())
+                })
+            return {'quoteResponse': {'result': result}}
+
         elif endpoint == 'YahooFinance/get_stock_insights':
             # Insights endpoint not implemented; return empty structure.
             return {'finance': {'result': {}}}
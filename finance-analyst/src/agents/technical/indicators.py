@@ -0,0 +1,467 @@
+"""
+Incremental technical indicator engine for the Technical Analysis Agent
+
+Each symbol keeps constant-size rolling state (adjusted EMAs for MACD, Wilder
+RSI, rolling mean/variance windows and monotonic deques for rolling min/max),
+so a new bar updates every indicator in O(1). Histories for many symbols can
+be backfilled at once with the recursive indicators evaluated over NumPy
+arrays, one vectorized step per bar across all symbols.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class IndicatorConfig:
+    """Indicator periods, matching the TechnicalIndicators defaults"""
+    rsi_period: int = 14
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+    bollinger_period: int = 20
+    bollinger_std_dev: float = 2.0
+    sma_periods: List[int] = field(default_factory=lambda: [20, 50, 200])
+    stochastic_k: int = 14
+    stochastic_d: int = 3
+    volume_period: int = 20
+
+
+class RollingWindow:
+    """Fixed-size window with O(1) append, mean and sample variance"""
+
+    __slots__ = ("size", "values", "count", "head", "mean", "m2")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = np.zeros(size)
+        self.count = 0
+        self.head = 0  # Slot the next value is written to
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def append(self, value: float):
+        """Add a value, dropping the oldest once the window is full"""
+        if self.count < self.size:
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+        else:
+            old = self.values[self.head]
+            old_mean = self.mean
+            self.mean += (value - old) / self.size
+            self.m2 += (value - old) * (value - self.mean + old - old_mean)
+
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        if self.head == 0 and self.count == self.size:
+            # Recompute once per wrap so rounding errors never accumulate
+            self.mean = float(self.values.mean())
+            self.m2 = float(((self.values - self.mean) ** 2).sum())
+
+    def load(self, values: np.ndarray):
+        """Replace the contents with the last `size` values of a history"""
+        tail = np.asarray(values, dtype=float)[-self.size:]
+        self.count = len(tail)
+        self.values[:self.count] = tail
+        self.head = self.count % self.size
+        self.mean = float(tail.mean()) if self.count else 0.0
+        self.m2 = float(((tail - self.mean) ** 2).sum()) if self.count else 0.0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas rolling std)"""
+        if self.count < 2:
+            return float("nan")
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+
+class RollingExtreme:
+    """Rolling minimum or maximum over a fixed window using a monotonic deque"""
+
+    __slots__ = ("size", "is_max", "items", "index")
+
+    def __init__(self, size: int, is_max: bool):
+        self.size = size
+        self.is_max = is_max
+        self.items: Deque[Tuple[int, float]] = deque()
+        self.index = 0
+
+    def append(self, value: float):
+        """Add a value; each value enters and leaves the deque once, so O(1) amortized"""
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((self.index, value))
+        self.index += 1
+        while items[0][0] < self.index - self.size:
+            items.popleft()
+
+    def load(self, values: np.ndarray):
+        """Rebuild from the last `size` values of a history"""
+        tail = np.asarray(values, dtype=float)[-self.size:]
+        self.items.clear()
+        self.index = len(values) - len(tail)
+        for value in tail:
+            self.append(float(value))
+
+    @property
+    def value(self) -> float:
+        return self.items[0][1] if self.items else float("nan")
+
+
+class EMA:
+    """Exponential moving average, matching pandas ewm(span=period, adjust=True)"""
+
+    __slots__ = ("decay", "num", "den")
+
+    def __init__(self, period: int):
+        self.decay = 1.0 - 2.0 / (period + 1)
+        self.num = 0.0
+        self.den = 0.0
+
+    def update(self, value: float) -> float:
+        self.num = value + self.decay * self.num
+        self.den = 1.0 + self.decay * self.den
+        return self.num / self.den
+
+    @property
+    def value(self) -> float:
+        return self.num / self.den if self.den else 0.0
+
+
+class WilderRSI:
+    """RSI with Wilder's smoothing, seeded with the simple average of the first `period` changes"""
+
+    __slots__ = ("period", "prev", "count", "avg_gain", "avg_loss")
+
+    def __init__(self, period: int):
+        self.period = period
+        self.prev: Optional[float] = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, value: float):
+        if self.prev is not None:
+            change = value - self.prev
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            self.count += 1
+            if self.count <= self.period:
+                self.avg_gain += gain / self.period
+                self.avg_loss += loss / self.period
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        self.prev = value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.period:
+            return 50.0  # Neutral RSI
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+
+def stochastic_tail(highs: Sequence[float], lows: Sequence[float], closes: Sequence[float],
+                    k_period: int, count: int) -> List[float]:
+    """%K for the last `count` bars, NaN where the window is incomplete or the range empty"""
+    highs, lows, closes = (np.asarray(values, dtype=float) for values in (highs, lows, closes))
+    values = []
+    for end in range(max(len(closes) - count, 0), len(closes)):
+        if end + 1 < k_period:
+            values.append(float("nan"))
+            continue
+        lowest = lows[end + 1 - k_period:end + 1].min()
+        spread = highs[end + 1 - k_period:end + 1].max() - lowest
+        values.append(float(100.0 * (closes[end] - lowest) / spread) if spread else float("nan"))
+    return values
+
+
+class IndicatorState:
+    """Rolling state of every indicator for one symbol, updated per bar"""
+
+    def __init__(self, config: Optional[IndicatorConfig] = None):
+        self.config = config = config or IndicatorConfig()
+        self.bars = 0
+        self.last_close = 0.0
+        self.last_volume = 0.0
+        self.last_timestamp: Optional[Any] = None
+
+        self.rsi = WilderRSI(config.rsi_period)
+        self.ema_fast = EMA(config.macd_fast)
+        self.ema_slow = EMA(config.macd_slow)
+        self.macd_signal = EMA(config.macd_signal)
+        self.bollinger = RollingWindow(config.bollinger_period)
+        self.smas = {period: RollingWindow(period) for period in config.sma_periods}
+        self.highest_high = RollingExtreme(config.stochastic_k, is_max=True)
+        self.lowest_low = RollingExtreme(config.stochastic_k, is_max=False)
+        self.stochastic_k: Deque[float] = deque(maxlen=config.stochastic_d)
+        self.volume = RollingWindow(config.volume_period)
+
+    def update(self, close: float, high: Optional[float] = None, low: Optional[float] = None,
+               volume: Optional[float] = None, timestamp: Optional[Any] = None):
+        """Apply one new bar"""
+        high = close if high is None else high
+        low = close if low is None else low
+
+        self.bars += 1
+        self.last_close = close
+        self.last_timestamp = timestamp
+
+        self.rsi.update(close)
+        macd_line = self.ema_fast.update(close) - self.ema_slow.update(close)
+        self.macd_signal.update(macd_line)
+        self.bollinger.append(close)
+        for window in self.smas.values():
+            window.append(close)
+
+        self.highest_high.append(high)
+        self.lowest_low.append(low)
+        self.stochastic_k.append(self._stochastic_k(close))
+
+        if volume is not None:
+            self.last_volume = volume
+            self.volume.append(volume)
+
+    def _stochastic_k(self, close: float) -> float:
+        """%K for the latest bar, NaN when the range is empty or the window not yet full"""
+        if self.bars < self.config.stochastic_k:
+            return float("nan")
+        spread = self.highest_high.value - self.lowest_low.value
+        if spread == 0:
+            return float("nan")
+        return 100.0 * (close - self.lowest_low.value) / spread
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current indicator values, in the layout used by TechnicalAnalysisAgent"""
+        config = self.config
+        price = self.last_close
+        indicators: Dict[str, Any] = {"rsi": float(self.rsi.value)}
+
+        if self.bars < config.macd_slow:
+            indicators["macd"] = {"macd": 0.0, "signal": 0.0, "histogram": 0.0}
+        else:
+            macd_line = self.ema_fast.value - self.ema_slow.value
+            signal = self.macd_signal.value
+            indicators["macd"] = {
+                "macd": float(macd_line),
+                "signal": float(signal),
+                "histogram": float(macd_line - signal)
+            }
+
+        if not self.bollinger.full:
+            indicators["bollinger_bands"] = {
+                "upper": price * 1.02,
+                "middle": price,
+                "lower": price * 0.98,
+                "bandwidth": 0.04
+            }
+        else:
+            sma = self.bollinger.mean
+            band = self.bollinger.std * config.bollinger_std_dev
+            indicators["bollinger_bands"] = {
+                "upper": float(sma + band),
+                "middle": float(sma),
+                "lower": float(sma - band),
+                "bandwidth": float(2 * band / sma) if sma else 0.0
+            }
+
+        indicators["moving_averages"] = {
+            f"sma_{period}": float(window.mean) if window.full else price
+            for period, window in self.smas.items()
+        }
+
+        k_values = list(self.stochastic_k)
+        k = k_values[-1] if k_values else float("nan")
+        d = sum(k_values) / len(k_values) if len(k_values) == config.stochastic_d else float("nan")
+        indicators["stochastic"] = {
+            "k": float(k) if not math.isnan(k) else 50.0,
+            "d": float(d) if not math.isnan(d) else 50.0
+        }
+
+        if self.volume.count:
+            indicators["volume_sma"] = float(self.volume.mean)
+            indicators["volume_ratio"] = (
+                self.last_volume / self.volume.mean if self.volume.mean > 0 else 1.0
+            )
+
+        return indicators
+
+
+class IndicatorEngine:
+    """Per-symbol incremental indicators with vectorized multi-symbol backfill"""
+
+    def __init__(self, config: Optional[IndicatorConfig] = None):
+        self.config = config or IndicatorConfig()
+        self.states: Dict[str, IndicatorState] = {}
+
+    def update(self, symbol: str, close: float, high: Optional[float] = None,
+               low: Optional[float] = None, volume: Optional[float] = None,
+               timestamp: Optional[Any] = None) -> Dict[str, Any]:
+        """Apply one new bar for a symbol and return its indicators"""
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState(self.config)
+        state.update(close, high, low, volume, timestamp)
+        return state.snapshot()
+
+    def snapshot(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Current indicators for a symbol, None if it has no history"""
+        state = self.states.get(symbol)
+        return state.snapshot() if state is not None else None
+
+    def snapshot_all(self) -> Dict[str, Dict[str, Any]]:
+        """Current indicators for every tracked symbol"""
+        return {symbol: state.snapshot() for symbol, state in self.states.items()}
+
+    def reset(self, symbol: Optional[str] = None):
+        """Forget one symbol, or every symbol"""
+        if symbol is None:
+            self.states.clear()
+        else:
+            self.states.pop(symbol, None)
+
+    def sync(self, symbol: str, price_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Bring a symbol up to date with a candle history and return its indicators
+
+        Only candles after the last one applied are fed to the state, found by
+        walking back from the end of the history to its timestamp. Histories
+        without timestamps, or that no longer contain the last applied candle
+        unchanged, are backfilled from scratch.
+        """
+        state = self.states.get(symbol)
+        if state is not None and state.last_timestamp is not None and price_history:
+            start = len(price_history)
+            while start > 0 and price_history[start - 1].get("timestamp") != state.last_timestamp:
+                start -= 1
+            if start > 0 and float(price_history[start - 1].get("close", 0)) == state.last_close:
+                for candle in price_history[start:]:
+                    state.update(
+                        float(candle.get("close", 0)),
+                        float(candle.get("high", 0)),
+                        float(candle.get("low", 0)),
+                        float(candle.get("volume", 0)),
+                        candle.get("timestamp")
+                    )
+                return state.snapshot()
+
+        self.backfill({symbol: {
+            "close": [float(candle.get("close", 0)) for candle in price_history],
+            "high": [float(candle.get("high", 0)) for candle in price_history],
+            "low": [float(candle.get("low", 0)) for candle in price_history],
+            "volume": [float(candle.get("volume", 0)) for candle in price_history],
+        }})
+        state = self.states[symbol]
+        state.last_timestamp = price_history[-1].get("timestamp") if price_history else None
+        return state.snapshot()
+
+    def backfill(self, histories: Dict[str, Dict[str, Sequence[float]]]):
+        """
+        Rebuild the state of many symbols from full histories at once
+
+        Histories are right-aligned into a symbols x bars NaN-padded matrix.
+        The recursive indicators (EMAs, MACD signal, RSI) advance one bar at a
+        time for every symbol together; windowed indicators are loaded from
+        the tail of each history.
+
+        Args:
+            histories: {symbol: {"close": [...], "high": [...], "low": [...], "volume": [...]}};
+                high and low default to close, volume is optional
+        """
+        if not histories:
+            return
+        config = self.config
+        symbols = list(histories)
+        columns = {name: [] for name in ("close", "high", "low", "volume")}
+        for symbol in symbols:
+            history = histories[symbol]
+            columns["close"].append(np.asarray(history["close"], dtype=float))
+            columns["high"].append(np.asarray(history.get("high", history["close"]), dtype=float))
+            columns["low"].append(np.asarray(history.get("low", history["close"]), dtype=float))
+            columns["volume"].append(np.asarray(history.get("volume", []), dtype=float))
+        lengths = np.array([len(closes) for closes in columns["close"]])
+        width = int(lengths.max()) if len(lengths) else 0
+
+        closes = np.full((len(symbols), width), np.nan)
+        for row, values in enumerate(columns["close"]):
+            if len(values):
+                closes[row, width - len(values):] = values
+
+        states = [IndicatorState(config) for _ in symbols]
+        fast, slow, signal = states[0].ema_fast.decay, states[0].ema_slow.decay, states[0].macd_signal.decay
+        period = config.rsi_period
+        zeros = np.zeros(len(symbols))
+        num_fast, den_fast, num_slow, den_slow = zeros.copy(), zeros.copy(), zeros.copy(), zeros.copy()
+        num_signal, den_signal = zeros.copy(), zeros.copy()
+        prev = np.full(len(symbols), np.nan)
+        changes = np.zeros(len(symbols), dtype=int)
+        avg_gain, avg_loss = zeros.copy(), zeros.copy()
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for t in range(width):
+                price = closes[:, t]
+                valid = ~np.isnan(price)
+
+                num_fast = np.where(valid, price + fast * num_fast, num_fast)
+                den_fast = np.where(valid, 1.0 + fast * den_fast, den_fast)
+                num_slow = np.where(valid, price + slow * num_slow, num_slow)
+                den_slow = np.where(valid, 1.0 + slow * den_slow, den_slow)
+                macd_line = num_fast / den_fast - num_slow / den_slow
+                num_signal = np.where(valid, macd_line + signal * num_signal, num_signal)
+                den_signal = np.where(valid, 1.0 + signal * den_signal, den_signal)
+
+                stepped = valid & ~np.isnan(prev)
+                change = np.where(stepped, price - prev, 0.0)
+                gain, loss = np.maximum(change, 0.0), np.maximum(-change, 0.0)
+                changes += stepped
+                seeding = stepped & (changes <= period)
+                smoothing = stepped & (changes > period)
+                avg_gain = np.where(seeding, avg_gain + gain / period,
+                                    np.where(smoothing, (avg_gain * (period - 1) + gain) / period, avg_gain))
+                avg_loss = np.where(seeding, avg_loss + loss / period,
+                                    np.where(smoothing, (avg_loss * (period - 1) + loss) / period, avg_loss))
+                prev = np.where(valid, price, prev)
+
+        for row, (symbol, state) in enumerate(zip(symbols, states)):
+            close = columns["close"][row]
+            high, low, volume = columns["high"][row], columns["low"][row], columns["volume"][row]
+            state.bars = len(close)
+            state.last_close = float(close[-1]) if len(close) else 0.0
+
+            state.ema_fast.num, state.ema_fast.den = float(num_fast[row]), float(den_fast[row])
+            state.ema_slow.num, state.ema_slow.den = float(num_slow[row]), float(den_slow[row])
+            state.macd_signal.num, state.macd_signal.den = float(num_signal[row]), float(den_signal[row])
+            state.rsi.prev = state.last_close if len(close) else None
+            state.rsi.count = int(changes[row])
+            state.rsi.avg_gain, state.rsi.avg_loss = float(avg_gain[row]), float(avg_loss[row])
+
+            state.bollinger.load(close)
+            for window in state.smas.values():
+                window.load(close)
+            state.highest_high.load(high)
+            state.lowest_low.load(low)
+
+            state.stochastic_k.extend(
+                stochastic_tail(high, low, close, config.stochastic_k, config.stochastic_d))
+
+            if len(volume):
+                state.volume.load(volume)
+                state.last_volume = float(volume[-1])
+
+            self.states[symbol] = state
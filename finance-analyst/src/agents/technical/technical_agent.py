@@ -7,6 +7,9 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timezone
 
 from src.agents.base_agent import BaseAgent, AnalysisResult, MarketContext
+from src.agents.technical.indicators import (
+    EMA, IndicatorEngine, RollingWindow, WilderRSI, stochastic_tail
+)
 from src.models.trading import AgentType, TradeAction
 from src.integrations.openai.client import ModelType
 from src.integrations.openai.functions import TradingFunctions, FunctionCategory
@@ -18,20 +21,11 @@ class TechnicalIndicators:
     
     @staticmethod
     def calculate_rsi(prices: List[float], period: int = 14) -> float:
-        """Calculate Relative Strength Index"""
-        if len(prices) < period + 1:
-            return 50.0  # Neutral RSI
-        
-        df = pd.DataFrame({'price': prices})
-        delta = df['price'].diff()
-        
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50.0
+        """Calculate Relative Strength Index (Wilder's smoothing)"""
+        rsi = WilderRSI(period)
+        for price in prices:
+            rsi.update(price)
+        return float(rsi.value)
     
     @staticmethod
     def calculate_macd(prices: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, float]:
@@ -39,19 +33,15 @@ class TechnicalIndicators:
         if len(prices) < slow:
             return {"macd": 0.0, "signal": 0.0, "histogram": 0.0}
         
-        df = pd.DataFrame({'price': prices})
-        
-        ema_fast = df['price'].ewm(span=fast).mean()
-        ema_slow = df['price'].ewm(span=slow).mean()
-        
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=signal).mean()
-        histogram = macd_line - signal_line
+        ema_fast, ema_slow, signal_line = EMA(fast), EMA(slow), EMA(signal)
+        for price in prices:
+            macd_line = ema_fast.update(price) - ema_slow.update(price)
+            signal_line.update(macd_line)
         
         return {
-            "macd": float(macd_line.iloc[-1]) if not pd.isna(macd_line.iloc[-1]) else 0.0,
-            "signal": float(signal_line.iloc[-1]) if not pd.isna(signal_line.iloc[-1]) else 0.0,
-            "histogram": float(histogram.iloc[-1]) if not pd.isna(histogram.iloc[-1]) else 0.0
+            "macd": float(macd_line),
+            "signal": float(signal_line.value),
+            "histogram": float(macd_line - signal_line.value)
         }
     
     @staticmethod
@@ -66,20 +56,16 @@ class TechnicalIndicators:
                 "bandwidth": 0.04
             }
         
-        df = pd.DataFrame({'price': prices})
-        
-        sma = df['price'].rolling(window=period).mean()
-        std = df['price'].rolling(window=period).std()
-        
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
-        bandwidth = (upper_band - lower_band) / sma
+        window = RollingWindow(period)
+        window.load(prices)
+        sma = window.mean
+        band = window.std * std_dev
         
         return {
-            "upper": float(upper_band.iloc[-1]) if not pd.isna(upper_band.iloc[-1]) else 0.0,
-            "middle": float(sma.iloc[-1]) if not pd.isna(sma.iloc[-1]) else 0.0,
-            "lower": float(lower_band.iloc[-1]) if not pd.isna(lower_band.iloc[-1]) else 0.0,
-            "bandwidth": float(bandwidth.iloc[-1]) if not pd.isna(bandwidth.iloc[-1]) else 0.0
+            "upper": float(sma + band),
+            "middle": float(sma),
+            "lower": float(sma - band),
+            "bandwidth": float(2 * band / sma) if sma else 0.0
         }
     
     @staticmethod
@@ -103,21 +89,13 @@ class TechnicalIndicators:
         if len(closes) < k_period:
             return {"k": 50.0, "d": 50.0}
         
-        df = pd.DataFrame({
-            'high': highs,
-            'low': lows,
-            'close': closes
-        })
-        
-        lowest_low = df['low'].rolling(window=k_period).min()
-        highest_high = df['high'].rolling(window=k_period).max()
-        
-        k_percent = 100 * ((df['close'] - lowest_low) / (highest_high - lowest_low))
-        d_percent = k_percent.rolling(window=d_period).mean()
+        k_values = stochastic_tail(highs, lows, closes, k_period, d_period)
+        k = k_values[-1]
+        d = float(np.mean(k_values)) if len(k_values) == d_period else float("nan")
         
         return {
-            "k": float(k_percent.iloc[-1]) if not pd.isna(k_percent.iloc[-1]) else 50.0,
-            "d": float(d_percent.iloc[-1]) if not pd.isna(d_percent.iloc[-1]) else 50.0
+            "k": k if not np.isnan(k) else 50.0,
+            "d": d if not np.isnan(d) else 50.0
         }
 
 
@@ -217,6 +195,7 @@ class TechnicalAnalysisAgent(BaseAgent):
         """Initialize technical analysis specific components"""
         self.analysis_cache = {}
         self.last_analysis_time = {}
+        self.indicator_engine = IndicatorEngine()
     
     def get_system_prompt(self) -> str:
         """Get system prompt for technical analysis"""
@@ -297,38 +276,32 @@ Always provide:
             return self._create_error_result(context)
     
     async def _calculate_all_indicators(self, context: MarketContext) -> Dict[str, Any]:
-        """Calculate all technical indicators"""
-        price_history = context.price_history
-        
-        # Extract price arrays
-        closes = [float(candle.get("close", 0)) for candle in price_history]
-        highs = [float(candle.get("high", 0)) for candle in price_history]
-        lows = [float(candle.get("low", 0)) for candle in price_history]
-        volumes = [float(candle.get("volume", 0)) for candle in price_history]
-        
-        indicators = {}
-        
-        # RSI
-        indicators["rsi"] = self.indicators.calculate_rsi(closes)
-        
-        # MACD
-        indicators["macd"] = self.indicators.calculate_macd(closes)
-        
-        # Bollinger Bands
-        indicators["bollinger_bands"] = self.indicators.calculate_bollinger_bands(closes)
-        
-        # Moving Averages
-        indicators["moving_averages"] = self.indicators.calculate_moving_averages(closes)
-        
-        # Stochastic
-        indicators["stochastic"] = self.indicators.calculate_stochastic(highs, lows, closes)
-        
-        # Volume analysis
-        if volumes:
-            indicators["volume_sma"] = np.mean(volumes[-20:]) if len(volumes) >= 20 else np.mean(volumes)
-            indicators["volume_ratio"] = volumes[-1] / indicators["volume_sma"] if indicators["volume_sma"] > 0 else 1.0
-        
-        return indicators
+        """Calculate all technical indicators, applying only candles not seen before"""
+        return self.indicator_engine.sync(context.symbol, context.price_history)
+    
+    def update_indicators(self, symbol: str, candle: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply one new candle for a symbol and return its updated indicators"""
+        return self.indicator_engine.update(
+            symbol,
+            float(candle.get("close", 0)),
+            float(candle.get("high", 0)),
+            float(candle.get("low", 0)),
+            float(candle.get("volume", 0)),
+            candle.get("timestamp")
+        )
+    
+    def backfill_indicators(self, price_histories: Dict[str, List[Dict[str, Any]]]):
+        """Rebuild indicator state for a whole watchlist from candle histories at once"""
+        self.indicator_engine.backfill({
+            symbol: {
+                name: [float(candle.get(name, 0)) for candle in history]
+                for name in ("close", "high", "low", "volume")
+            }
+            for symbol, history in price_histories.items()
+        })
+        for symbol, history in price_histories.items():
+            if history:
+                self.indicator_engine.states[symbol].last_timestamp = history[-1].get("timestamp")
     
     async def _analyze_patterns(self, context: MarketContext) -> Dict[str, Any]:
         """Analyze chart patterns"""
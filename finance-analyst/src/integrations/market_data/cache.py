@@ -0,0 +1,198 @@
+"""
+Market data cache for the Multi-Agent AI Trading System
+
+A bounded LRU cache with per-entry TTLs, stale-while-revalidate and
+single-flight fetching: concurrent requests for the same key share one
+in-flight upstream call, and an expired entry is still served while a single
+background task refreshes it.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from src.utils.logging import get_component_logger
+
+logger = get_component_logger("market_data_cache")
+
+# Freshness per chart interval in seconds; bars update roughly this often
+INTERVAL_TTLS = {
+    "1m": 15,
+    "2m": 30,
+    "5m": 60,
+    "15m": 120,
+    "30m": 300,
+    "60m": 300,
+    "90m": 300,
+    "1h": 300,
+    "1d": 300,
+    "5d": 1800,
+    "1wk": 3600,
+    "1mo": 3600,
+    "3mo": 3600
+}
+DEFAULT_TTL = 300
+
+
+def interval_ttl(interval: str) -> float:
+    """TTL for chart data of the given bar interval"""
+    return INTERVAL_TTLS.get(interval, DEFAULT_TTL)
+
+
+def _is_empty(value: Any) -> bool:
+    """Failed fetches return None or an empty container; those are never cached"""
+    if value is None:
+        return True
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+@dataclass
+class CacheEntry:
+    """Cached value with its freshness deadlines (monotonic seconds)"""
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class MarketDataCache:
+    """Bounded LRU cache with TTLs, stale-while-revalidate and request coalescing"""
+
+    def __init__(self, max_entries: int = 512, default_ttl: float = DEFAULT_TTL,
+                 stale_factor: float = 1.0):
+        """
+        Args:
+            max_entries: Least recently used entries are evicted beyond this size
+            default_ttl: Seconds an entry is fresh when no TTL is given
+            stale_factor: An expired entry is still served, while it is refreshed in
+                the background, for stale_factor * ttl seconds after it expires
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.stale_factor = stale_factor
+
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "fetches": 0,
+            "fetch_errors": 0,
+            "evictions": 0
+        }
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """Return a cached value without fetching, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if now >= entry.stale_until or (now >= entry.fresh_until and not allow_stale):
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def is_fresh(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() < entry.fresh_until
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        ttl = self.default_ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = CacheEntry(value, now + ttl, now + ttl * (1 + self.stale_factor))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                           ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value for key, fetching it at most once across concurrent callers
+
+        A fresh entry is returned directly. An expired entry inside its stale window is
+        returned immediately and refreshed by one background fetch. Otherwise the caller
+        joins the in-flight fetch for key, or starts it. Empty results (None, empty
+        containers) are returned but not cached, so failures are retried next time.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                if now < entry.fresh_until:
+                    self.stats["hits"] += 1
+                    return entry.value
+                self.stats["stale_hits"] += 1
+                stale = entry.value
+            else:
+                self.stats["misses"] += 1
+                stale = None
+
+        task = self._join_or_start(key, fetch, ttl)
+        if stale is not None:
+            return stale
+        return await asyncio.shield(task)
+
+    def _join_or_start(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                       ttl: Optional[float]) -> asyncio.Task:
+        """Return the in-flight fetch for key on this event loop, starting one if needed"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._inflight.get(key)
+            # Tasks from another (possibly closed) loop cannot be awaited here
+            if task is not None and not task.done() and task.get_loop() is loop:
+                self.stats["coalesced"] += 1
+                return task
+            task = loop.create_task(self._fetch(key, fetch, ttl))
+            # Background refreshes are never awaited; mark their errors as retrieved
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+            return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]],
+                     ttl: Optional[float]) -> Any:
+        self.stats["fetches"] += 1
+        try:
+            value = await fetch()
+            if not _is_empty(value):
+                self.set(key, value, ttl)
+            return value
+        except Exception as e:
+            self.stats["fetch_errors"] += 1
+            logger.error(f"Error fetching {key}: {e}")
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is asyncio.current_task():
+                    del self._inflight[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current size"""
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_rate": (self.stats["hits"] + self.stats["stale_hits"]) / lookups if lookups else 0.0
+        }
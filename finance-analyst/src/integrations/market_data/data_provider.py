@@ -1,11 +1,12 @@
 """
 Market Data Provider Integration for the Multi-Agent AI Trading System
 """
+import os
 import sys
 import asyncio
 import time
 from typing import Dict, List, Any, Optional, Union
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from dataclasses import dataclass
 import pandas as pd
 import numpy as np
@@ -16,6 +17,8 @@ from data_api import ApiClient
 
 from config.settings import config
 from src.utils.logging import get_component_logger
+from src.integrations.market_data.timeseries import OHLCVSeries, OHLCVPanel
+from src.integrations.market_data.cache import MarketDataCache, interval_ttl
 
 logger = get_component_logger("market_data")
 
@@ -74,19 +77,37 @@ class YahooFinanceProvider:
         self.rate_limit_delay = 0.1  # 100ms between requests
         self.last_request_time = 0
         
+        # Concurrent identical requests share one upstream call
+        self.cache = MarketDataCache(max_entries=config.market_cache_size)
+        
     async def _rate_limit(self):
         """Apply rate limiting between requests"""
+        # Reserve the next slot before sleeping so concurrent callers stay spaced out
         current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.rate_limit_delay:
-            await asyncio.sleep(self.rate_limit_delay - time_since_last)
+        slot = max(current_time, self.last_request_time + self.rate_limit_delay)
+        self.last_request_time = slot
         
-        self.last_request_time = time.time()
+        if slot > current_time:
+            await asyncio.sleep(slot - current_time)
     
     async def get_stock_chart(self, symbol: str, interval: str = "1d", 
                             range_period: str = "1mo") -> List[MarketDataPoint]:
         """Get stock chart data"""
+        series = await self.get_stock_series(symbol, interval, range_period)
+        return series.to_points()
+    
+    async def get_stock_series(self, symbol: str, interval: str = "1d",
+                               range_period: str = "1mo", use_cache: bool = True) -> OHLCVSeries:
+        """Get stock chart data as a columnar series"""
+        if not use_cache:
+            return await self._fetch_stock_series(symbol, interval, range_period)
+        return await self.cache.get_or_fetch(
+            ("chart", symbol, interval, range_period),
+            lambda: self._fetch_stock_series(symbol, interval, range_period),
+            ttl=interval_ttl(interval)
+        )
+    
+    async def _fetch_stock_series(self, symbol: str, interval: str, range_period: str) -> OHLCVSeries:
         try:
             await self._rate_limit()
             
@@ -99,61 +120,47 @@ class YahooFinanceProvider:
             
             if not response or 'chart' not in response:
                 logger.error(f"Invalid response for {symbol}: {response}")
-                return []
+                return OHLCVSeries.empty(symbol)
             
             chart_data = response['chart']['result'][0] if response['chart']['result'] else None
             if not chart_data:
                 logger.error(f"No chart data for {symbol}")
-                return []
+                return OHLCVSeries.empty(symbol)
             
             timestamps = chart_data.get('timestamp', [])
             indicators = chart_data.get('indicators', {})
             quote_data = indicators.get('quote', [{}])[0] if indicators.get('quote') else {}
             adjclose_data = indicators.get('adjclose', [{}])[0] if indicators.get('adjclose') else {}
             
-            # Extract price data
-            opens = quote_data.get('open', [])
-            highs = quote_data.get('high', [])
-            lows = quote_data.get('low', [])
-            closes = quote_data.get('close', [])
-            volumes = quote_data.get('volume', [])
-            adj_closes = adjclose_data.get('adjclose', [])
-            
-            market_data = []
-            
-            for i, timestamp in enumerate(timestamps):
-                if (i < len(opens) and i < len(highs) and i < len(lows) and 
-                    i < len(closes) and i < len(volumes)):
-                    
-                    # Skip None values
-                    if (opens[i] is None or highs[i] is None or lows[i] is None or 
-                        closes[i] is None or volumes[i] is None):
-                        continue
-                    
-                    adj_close = adj_closes[i] if i < len(adj_closes) and adj_closes[i] is not None else None
-                    
-                    data_point = MarketDataPoint(
-                        symbol=symbol,
-                        timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc),
-                        open=float(opens[i]),
-                        high=float(highs[i]),
-                        low=float(lows[i]),
-                        close=float(closes[i]),
-                        volume=int(volumes[i]),
-                        adjusted_close=float(adj_close) if adj_close is not None else None
-                    )
-                    
-                    market_data.append(data_point)
-            
-            logger.info(f"Retrieved {len(market_data)} data points for {symbol}")
-            return market_data
+            # Bars with a missing (None) price or volume are dropped
+            series = OHLCVSeries.from_columns(
+                symbol,
+                timestamps,
+                quote_data.get('open', []),
+                quote_data.get('high', []),
+                quote_data.get('low', []),
+                quote_data.get('close', []),
+                quote_data.get('volume', []),
+                adjclose_data.get('adjclose', [])
+            )
+            
+            logger.info(f"Retrieved {len(series)} data points for {symbol}")
+            return series
             
         except Exception as e:
             logger.error(f"Error fetching chart data for {symbol}: {e}")
-            return []
+            return OHLCVSeries.empty(symbol)
     
-    async def get_stock_insights(self, symbol: str) -> Optional[StockInsights]:
+    async def get_stock_insights(self, symbol: str, use_cache: bool = True) -> Optional[StockInsights]:
         """Get stock insights and analysis"""
+        if not use_cache:
+            return await self._fetch_stock_insights(symbol)
+        return await self.cache.get_or_fetch(
+            ("insights", symbol),
+            lambda: self._fetch_stock_insights(symbol)
+        )
+    
+    async def _fetch_stock_insights(self, symbol: str) -> Optional[StockInsights]:
         try:
             await self._rate_limit()
             
@@ -218,25 +225,64 @@ class YahooFinanceProvider:
         """Get current stock price"""
         try:
             # Get latest 1-day data
-            data = await self.get_stock_chart(symbol, interval="1m", range_period="1d")
+            data = await self.get_stock_series(symbol, interval="1m", range_period="1d")
             
-            if data:
-                return data[-1].close
+            if len(data):
+                return float(data.close[-1])
             
             return None
             
         except Exception as e:
             logger.error(f"Error fetching current price for {symbol}: {e}")
             return None
+    
+    async def get_current_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Get current prices for several symbols with one quote request
+        
+        Quotes are always fetched fresh (never from the cache), so streaming
+        consumers see real price changes. The request takes one rate limit
+        slot for the whole batch.
+        """
+        prices: Dict[str, Optional[float]] = {symbol: None for symbol in symbols}
+        if not symbols:
+            return prices
+        try:
+            await self._rate_limit()
+            # The download blocks for the whole batch; keep the event loop free meanwhile
+            response = await asyncio.to_thread(
+                self.client.call_api, 'YahooFinance/get_quotes', query={'symbols': list(symbols)}
+            )
+        except NotImplementedError:
+            # Upstreams without the quotes endpoint: fetch fresh 1-minute bars per symbol
+            series = await asyncio.gather(*(
+                self.get_stock_series(symbol, interval="1m", range_period="1d", use_cache=False)
+                for symbol in symbols
+            ))
+            return {symbol: float(data.close[-1]) if len(data) else None
+                    for symbol, data in zip(symbols, series)}
+        except Exception as e:
+            logger.error(f"Error fetching quotes for {len(symbols)} symbols: {e}")
+            return prices
+        
+        if not response or 'quoteResponse' not in response:
+            logger.error(f"Invalid quotes response for {len(symbols)} symbols: {response}")
+            return prices
+        
+        for quote in response['quoteResponse'].get('result', []):
+            symbol, price = quote.get('symbol'), quote.get('regularMarketPrice')
+            if symbol in prices and price is not None:
+                prices[symbol] = float(price)
+        return prices
 
 
 class MarketDataProcessor:
     """Process and validate market data"""
     
     def __init__(self):
-        self.data_cache = {}
-        self.cache_expiry = {}
         self.cache_duration = 300  # 5 minutes cache
+        self.cache = MarketDataCache(max_entries=config.market_cache_size,
+                                     default_ttl=self.cache_duration)
     
     def validate_data_point(self, data_point: MarketDataPoint) -> bool:
         """Validate a single data point"""
@@ -263,94 +309,87 @@ class MarketDataProcessor:
             logger.error(f"Error validating data point: {e}")
             return False
     
-    def clean_data(self, data_points: List[MarketDataPoint]) -> List[MarketDataPoint]:
-        """Clean and validate market data"""
-        cleaned_data = []
+    def _as_series(self, data: Union[OHLCVSeries, List[MarketDataPoint]]) -> OHLCVSeries:
+        """Accept either a series or a list of data points"""
+        if isinstance(data, OHLCVSeries):
+            return data
+        return OHLCVSeries.from_points(data[0].symbol if data else "", data)
+    
+    def clean_data(self, data: Union[OHLCVSeries, List[MarketDataPoint]]
+                   ) -> Union[OHLCVSeries, List[MarketDataPoint]]:
+        """Clean and validate market data, returning the same container type it was given"""
+        series = self._as_series(data)
+        mask = series.valid_mask()
         
-        for data_point in data_points:
-            if self.validate_data_point(data_point):
-                cleaned_data.append(data_point)
-            else:
-                logger.warning(f"Invalid data point removed: {data_point.symbol} at {data_point.timestamp}")
+        if mask.all():
+            return data
+        for index in np.flatnonzero(~mask):
+            timestamp = datetime.fromtimestamp(series.timestamp[index], tz=timezone.utc)
+            logger.warning(f"Invalid data point removed: {series.symbol} at {timestamp}")
         
-        return cleaned_data
+        cleaned = OHLCVSeries(series.symbol, series.data[:, mask])
+        return cleaned if isinstance(data, OHLCVSeries) else cleaned.to_points()
     
-    def calculate_returns(self, data_points: List[MarketDataPoint]) -> List[float]:
+    def calculate_returns(self, data: Union[OHLCVSeries, List[MarketDataPoint]]) -> List[float]:
         """Calculate returns from price data"""
-        if len(data_points) < 2:
-            return []
-        
-        returns = []
-        for i in range(1, len(data_points)):
-            prev_price = data_points[i-1].close
-            curr_price = data_points[i].close
-            
-            if prev_price > 0:
-                return_value = (curr_price - prev_price) / prev_price
-                returns.append(return_value)
-        
-        return returns
+        return self._as_series(data).returns().tolist()
     
-    def calculate_technical_indicators(self, data_points: List[MarketDataPoint]) -> Dict[str, float]:
+    def calculate_technical_indicators(self, data: Union[OHLCVSeries, List[MarketDataPoint]]) -> Dict[str, float]:
         """Calculate basic technical indicators"""
-        if not data_points:
+        series = self._as_series(data)
+        if not len(series):
             return {}
         
-        closes = [dp.close for dp in data_points]
-        highs = [dp.high for dp in data_points]
-        lows = [dp.low for dp in data_points]
-        volumes = [dp.volume for dp in data_points]
+        closes = series.close
+        volumes = series.volume
         
         indicators = {}
         
         # Simple Moving Averages
         if len(closes) >= 20:
-            indicators["sma_20"] = np.mean(closes[-20:])
+            indicators["sma_20"] = float(closes[-20:].mean())
         if len(closes) >= 50:
-            indicators["sma_50"] = np.mean(closes[-50:])
+            indicators["sma_50"] = float(closes[-50:].mean())
         
         # Price change
         if len(closes) >= 2:
-            indicators["price_change"] = (closes[-1] - closes[-2]) / closes[-2]
+            indicators["price_change"] = float((closes[-1] - closes[-2]) / closes[-2])
         
         # Volume average
         if len(volumes) >= 20:
-            indicators["avg_volume"] = np.mean(volumes[-20:])
-            indicators["volume_ratio"] = volumes[-1] / indicators["avg_volume"] if indicators["avg_volume"] > 0 else 1.0
+            indicators["avg_volume"] = float(volumes[-20:].mean())
+            indicators["volume_ratio"] = float(volumes[-1] / indicators["avg_volume"]) if indicators["avg_volume"] > 0 else 1.0
         
         # Volatility (20-day)
         if len(closes) >= 20:
-            returns = [(closes[i] - closes[i-1]) / closes[i-1] for i in range(1, len(closes))]
-            indicators["volatility"] = np.std(returns[-19:]) * np.sqrt(252)  # Annualized
+            returns = np.diff(closes[-20:]) / closes[-20:-1]
+            indicators["volatility"] = float(np.std(returns) * np.sqrt(252))  # Annualized
         
         return indicators
     
     def is_cache_valid(self, symbol: str) -> bool:
         """Check if cached data is still valid"""
-        if symbol not in self.cache_expiry:
-            return False
-        
-        return datetime.now(timezone.utc) < self.cache_expiry[symbol]
+        return self.cache.is_fresh(symbol)
     
     def cache_data(self, symbol: str, data: Any):
         """Cache data with expiry"""
-        self.data_cache[symbol] = data
-        self.cache_expiry[symbol] = datetime.now(timezone.utc) + timedelta(seconds=self.cache_duration)
+        self.cache.set(symbol, data, self.cache_duration)
     
     def get_cached_data(self, symbol: str) -> Optional[Any]:
         """Get cached data if valid"""
-        if self.is_cache_valid(symbol):
-            return self.data_cache.get(symbol)
-        return None
+        return self.cache.get(symbol)
 
 
 class MarketDataManager:
     """Main market data manager"""
     
-    def __init__(self):
+    def __init__(self, history_dir: Optional[str] = None):
         self.yahoo_provider = YahooFinanceProvider()
         self.processor = MarketDataProcessor()
         
+        # Fetched histories are saved here and memory-mapped by other processes
+        self.history_dir = history_dir if history_dir is not None else config.market_data_dir
+        
         # Supported symbols for demo
         self.supported_symbols = [
             "AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "META", "NVDA", "JPM", "JNJ", "V"
@@ -361,47 +400,82 @@ class MarketDataManager:
     async def get_market_data(self, symbol: str, interval: str = "1d", 
                             range_period: str = "1mo") -> List[MarketDataPoint]:
         """Get market data for a symbol"""
+        series = await self.get_market_series(symbol, interval, range_period)
+        return series.to_points()
+    
+    async def get_market_series(self, symbol: str, interval: str = "1d",
+                                range_period: str = "1mo") -> OHLCVSeries:
+        """Get cleaned market data for a symbol as a columnar series"""
         try:
-            # Check cache first
+            # Concurrent callers share one load; stale data is served while it refreshes
             cache_key = f"{symbol}_{interval}_{range_period}"
-            cached_data = self.processor.get_cached_data(cache_key)
-            if cached_data:
-                logger.info(f"Using cached data for {symbol}")
-                return cached_data
-            
-            # Fetch fresh data
-            data = await self.yahoo_provider.get_stock_chart(symbol, interval, range_period)
-            
-            # Clean and validate data
-            cleaned_data = self.processor.clean_data(data)
-            
-            # Cache the data
-            self.processor.cache_data(cache_key, cleaned_data)
-            
-            return cleaned_data
+            return await self.processor.cache.get_or_fetch(
+                cache_key,
+                lambda: self._load_market_series(symbol, interval, range_period, cache_key),
+                ttl=interval_ttl(interval)
+            )
             
         except Exception as e:
             logger.error(f"Error getting market data for {symbol}: {e}")
-            return []
+            return OHLCVSeries.empty(symbol)
+    
+    async def _load_market_series(self, symbol: str, interval: str, range_period: str,
+                                  cache_key: str) -> OHLCVSeries:
+        """Load from the shared on-disk store, or fetch, clean and store"""
+        stored_data = self._load_stored_series(symbol, cache_key, interval_ttl(interval))
+        if stored_data is not None:
+            logger.info(f"Using stored data for {symbol}")
+            return stored_data
+        
+        # The manager caches cleaned data itself, so skip the provider cache
+        data = await self.yahoo_provider.get_stock_series(symbol, interval, range_period, use_cache=False)
+        
+        # Clean and validate data
+        cleaned_data = self.processor.clean_data(data)
+        self._store_series(cache_key, cleaned_data)
+        
+        return cleaned_data
+    
+    async def get_market_panel(self, symbols: List[str], interval: str = "1d",
+                               range_period: str = "1mo") -> OHLCVPanel:
+        """Get cleaned market data for several symbols as a panel"""
+        series = await asyncio.gather(*(
+            self.get_market_series(symbol, interval, range_period) for symbol in symbols
+        ))
+        return OHLCVPanel(dict(zip(symbols, series)))
+    
+    def _history_path(self, cache_key: str) -> str:
+        return os.path.join(self.history_dir, f"{cache_key}.npy")
+    
+    def _load_stored_series(self, symbol: str, cache_key: str, max_age: float) -> Optional[OHLCVSeries]:
+        """Memory-map a stored series if it is younger than max_age seconds"""
+        if not self.history_dir:
+            return None
+        path = self._history_path(cache_key)
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                return None
+            return OHLCVSeries.load(symbol, path)
+        except (OSError, ValueError):
+            return None
+    
+    def _store_series(self, cache_key: str, series: OHLCVSeries):
+        """Save a series for other processes; empty results are not stored"""
+        if not self.history_dir or not len(series):
+            return
+        try:
+            series.save(self._history_path(cache_key))
+        except OSError as e:
+            logger.warning(f"Could not store market data for {cache_key}: {e}")
     
     async def get_stock_insights(self, symbol: str) -> Optional[StockInsights]:
         """Get stock insights"""
         try:
-            # Check cache first
             cache_key = f"{symbol}_insights"
-            cached_insights = self.processor.get_cached_data(cache_key)
-            if cached_insights:
-                logger.info(f"Using cached insights for {symbol}")
-                return cached_insights
-            
-            # Fetch fresh insights
-            insights = await self.yahoo_provider.get_stock_insights(symbol)
-            
-            if insights:
-                # Cache the insights
-                self.processor.cache_data(cache_key, insights)
-            
-            return insights
+            return await self.processor.cache.get_or_fetch(
+                cache_key,
+                lambda: self.yahoo_provider.get_stock_insights(symbol, use_cache=False)
+            )
             
         except Exception as e:
             logger.error(f"Error getting insights for {symbol}: {e}")
@@ -415,11 +489,19 @@ class MarketDataManager:
             logger.error(f"Error getting current price for {symbol}: {e}")
             return None
     
+    async def get_current_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """Get current prices for several symbols"""
+        try:
+            return await self.yahoo_provider.get_current_prices(symbols)
+        except Exception as e:
+            logger.error(f"Error getting current prices for {len(symbols)} symbols: {e}")
+            return {symbol: None for symbol in symbols}
+    
     async def get_market_context(self, symbol: str) -> Dict[str, Any]:
         """Get comprehensive market context for a symbol"""
         try:
             # Get price data
-            price_data = await self.get_market_data(symbol, interval="1d", range_period="3mo")
+            price_data = await self.get_market_series(symbol, interval="1d", range_period="3mo")
             
             # Get insights
             insights = await self.get_stock_insights(symbol)
@@ -431,13 +513,14 @@ class MarketDataManager:
             returns = self.processor.calculate_returns(price_data)
             
             # Get current price
-            current_price = price_data[-1].close if price_data else None
+            current_price = float(price_data.close[-1]) if len(price_data) else None
             
+            price_history = price_data.to_records()
             context = {
                 "symbol": symbol,
                 "current_price": current_price,
-                "price_history": [dp.to_dict() for dp in price_data],
-                "volume_data": [{"timestamp": dp.timestamp.isoformat(), "volume": dp.volume} for dp in price_data],
+                "price_history": price_history,
+                "volume_data": [{"timestamp": bar["timestamp"], "volume": bar["volume"]} for bar in price_history],
                 "market_indicators": technical_indicators,
                 "returns": returns,
                 "insights": insights.to_dict() if insights else None,
@@ -463,6 +546,13 @@ class MarketDataManager:
                 "insights": None
             }
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for the manager and provider caches"""
+        return {
+            "market_data": self.processor.cache.get_stats(),
+            "provider": self.yahoo_provider.cache.get_stats()
+        }
+    
     def get_supported_symbols(self) -> List[str]:
         """Get list of supported symbols"""
         return self.supported_symbols.copy()
@@ -2,9 +2,11 @@
 Real-time Market Data Streaming for the Multi-Agent AI Trading System
 """
 import asyncio
+import inspect
 import json
 import websockets
 from typing import Dict, List, Any, Optional, Callable, Set
+from enum import Enum
 from datetime import datetime, timezone
 from dataclasses import dataclass, asdict
 import threading
@@ -42,12 +44,64 @@ class StreamingUpdate:
         }
 
 
+class DropPolicy(Enum):
+    """What to do with an update when a subscriber's queue is full"""
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued update to make room
+    DROP_NEWEST = "drop_newest"  # Discard the incoming update
+    DISCONNECT = "disconnect"    # Unsubscribe the slow consumer
+
+
+class Subscriber:
+    """Bounded delivery queue and worker task for one subscriber callback"""
+    
+    def __init__(self, callback: Callable[[StreamingUpdate], Any], max_queue_size: int,
+                 drop_policy: DropPolicy):
+        self.callback = callback
+        self.drop_policy = drop_policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.delivered = 0
+        self.dropped = 0
+        self.task = asyncio.create_task(self._deliver())
+    
+    def offer(self, update: StreamingUpdate) -> bool:
+        """Queue an update without blocking; returns False if the subscriber must be disconnected"""
+        if not self.queue.full():
+            self.queue.put_nowait(update)
+            return True
+        
+        self.dropped += 1
+        if self.drop_policy == DropPolicy.DROP_OLDEST:
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait(update)
+        elif self.drop_policy == DropPolicy.DISCONNECT:
+            return False
+        return True
+    
+    async def _deliver(self):
+        """Call the callback for each queued update, awaiting coroutine callbacks"""
+        while True:
+            update = await self.queue.get()
+            try:
+                result = self.callback(update)
+                if inspect.isawaitable(result):
+                    await result
+                self.delivered += 1
+            except Exception as e:
+                logger.error(f"Error calling subscriber callback for {update.symbol}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    def close(self):
+        self.task.cancel()
+
+
 class MarketDataStreamer:
     """Real-time market data streaming manager"""
     
     def __init__(self, market_data_manager: MarketDataManager):
         self.market_data_manager = market_data_manager
-        self.subscribers: Dict[str, Set[Callable]] = {}
+        self.subscribers: Dict[str, Dict[Callable, Subscriber]] = {}
         self.streaming_symbols: Set[str] = set()
         self.is_streaming = False
         self.stream_task = None
@@ -57,6 +111,15 @@ class MarketDataStreamer:
         # Streaming configuration
         self.update_interval = 5  # 5 seconds for demo (real systems would be much faster)
         self.max_subscribers = 100
+        self.batch_size = 25  # Symbols per quote request batch
+        self.max_concurrent_batches = 4
+        self.subscriber_queue_size = 100
+        self.drop_policy = DropPolicy.DROP_OLDEST
+        
+        # Cycle metrics
+        self.cycles = 0
+        self.overruns = 0
+        self.last_cycle_time = 0.0
         
         logger.info("Market Data Streamer initialized")
     
@@ -64,13 +127,18 @@ class MarketDataStreamer:
         """Subscribe to real-time updates for a symbol"""
         try:
             if symbol not in self.subscribers:
-                self.subscribers[symbol] = set()
+                self.subscribers[symbol] = {}
+            
+            if callback in self.subscribers[symbol]:
+                return True
             
             if len(self.subscribers[symbol]) >= self.max_subscribers:
                 logger.warning(f"Max subscribers reached for {symbol}")
                 return False
             
-            self.subscribers[symbol].add(callback)
+            self.subscribers[symbol][callback] = Subscriber(
+                callback, self.subscriber_queue_size, self.drop_policy
+            )
             self.streaming_symbols.add(symbol)
             
             logger.info(f"Subscribed to {symbol}, total subscribers: {len(self.subscribers[symbol])}")
@@ -89,7 +157,7 @@ class MarketDataStreamer:
         """Unsubscribe from real-time updates"""
         try:
             if symbol in self.subscribers and callback in self.subscribers[symbol]:
-                self.subscribers[symbol].remove(callback)
+                self.subscribers[symbol].pop(callback).close()
                 
                 # Remove symbol if no more subscribers
                 if not self.subscribers[symbol]:
@@ -132,14 +200,26 @@ class MarketDataStreamer:
     
     async def _stream_data(self):
         """Main streaming loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+        
         while self.is_streaming:
             try:
-                # Get updates for all subscribed symbols
-                for symbol in list(self.streaming_symbols):
-                    await self._fetch_and_broadcast_update(symbol)
+                cycle_start = loop.time()
                 
-                # Wait for next update cycle
-                await asyncio.sleep(self.update_interval)
+                # Poll all subscribed symbols in batches, a bounded number at a time
+                symbols = list(self.streaming_symbols)
+                batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+                await asyncio.gather(*(self._poll_batch(batch, semaphore) for batch in batches))
+                
+                self.cycles += 1
+                self.last_cycle_time = loop.time() - cycle_start
+                if self.last_cycle_time > self.update_interval:
+                    self.overruns += 1
+                    logger.warning(f"Streaming cycle took {self.last_cycle_time:.2f}s for {len(symbols)} symbols")
+                
+                # Wait for next update cycle, keeping to the schedule
+                await asyncio.sleep(max(0.0, self.update_interval - self.last_cycle_time))
                 
             except asyncio.CancelledError:
                 logger.info("Streaming task cancelled")
@@ -148,15 +228,22 @@ class MarketDataStreamer:
                 logger.error(f"Error in streaming loop: {e}")
                 await asyncio.sleep(1)  # Brief pause before retrying
     
-    async def _fetch_and_broadcast_update(self, symbol: str):
-        """Fetch current data and broadcast to subscribers"""
+    async def _poll_batch(self, symbols: List[str], semaphore: asyncio.Semaphore):
+        """Fetch prices for a batch of symbols and broadcast them"""
         try:
-            # Get current price
-            current_price = await self.market_data_manager.get_current_price(symbol)
+            async with semaphore:
+                prices = await self.market_data_manager.get_current_prices(symbols)
             
-            if current_price is None:
-                return
+            for symbol, current_price in prices.items():
+                if current_price is not None:
+                    self._broadcast_price(symbol, current_price)
             
+        except Exception as e:
+            logger.error(f"Error fetching updates for batch {symbols[0]}..{symbols[-1]}: {e}")
+    
+    def _broadcast_price(self, symbol: str, current_price: float):
+        """Build an update and queue it for every subscriber without waiting on them"""
+        try:
             # Calculate change from last price
             last_price = self.last_prices.get(symbol, current_price)
             change = current_price - last_price
@@ -176,15 +263,13 @@ class MarketDataStreamer:
             self.last_prices[symbol] = current_price
             
             # Broadcast to subscribers
-            if symbol in self.subscribers:
-                for callback in list(self.subscribers[symbol]):
-                    try:
-                        callback(update)
-                    except Exception as e:
-                        logger.error(f"Error calling subscriber callback for {symbol}: {e}")
+            for callback, subscriber in list(self.subscribers.get(symbol, {}).items()):
+                if not subscriber.offer(update):
+                    logger.warning(f"Disconnecting slow subscriber for {symbol}")
+                    self.unsubscribe(symbol, callback)
             
         except Exception as e:
-            logger.error(f"Error fetching update for {symbol}: {e}")
+            logger.error(f"Error broadcasting update for {symbol}: {e}")
     
     def get_streaming_status(self) -> Dict[str, Any]:
         """Get current streaming status"""
@@ -192,10 +277,53 @@ class MarketDataStreamer:
             "is_streaming": self.is_streaming,
             "symbols": list(self.streaming_symbols),
             "total_subscribers": sum(len(subs) for subs in self.subscribers.values()),
-            "update_interval": self.update_interval
+            "update_interval": self.update_interval,
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "last_cycle_time": self.last_cycle_time,
+            "queued_updates": sum(sub.queue.qsize() for subs in self.subscribers.values() for sub in subs.values()),
+            "dropped_updates": sum(sub.dropped for subs in self.subscribers.values() for sub in subs.values())
         }
 
 
+class ClientConnection:
+    """Outbound queue for one WebSocket client, conflated to the latest update per symbol"""
+    
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.symbols: Set[str] = set()
+        self.pending: Dict[str, str] = {}
+        self.wakeup = asyncio.Event()
+        self.sent = 0
+        self.conflated = 0
+        self.task = asyncio.create_task(self._send_loop())
+    
+    def push(self, symbol: str, payload: str):
+        """Queue a serialized update, replacing any unsent update for the same symbol"""
+        if symbol in self.pending:
+            self.conflated += 1
+        self.pending[symbol] = payload
+        self.wakeup.set()
+    
+    async def _send_loop(self):
+        """Write queued updates; a slow socket only delays its own queue"""
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                pending, self.pending = self.pending, {}
+                for payload in pending.values():
+                    await self.websocket.send(payload)
+                    self.sent += 1
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending updates to client: {e}")
+    
+    def close(self):
+        self.task.cancel()
+
+
 class WebSocketServer:
     """WebSocket server for real-time market data"""
     
@@ -205,6 +333,9 @@ class WebSocketServer:
         self.port = port
         self.clients: Set[websockets.WebSocketServerProtocol] = set()
         self.client_subscriptions: Dict[websockets.WebSocketServerProtocol, Set[str]] = {}
+        self.connections: Dict[websockets.WebSocketServerProtocol, ClientConnection] = {}
+        self.symbol_clients: Dict[str, Set[ClientConnection]] = {}
+        self.max_symbols_per_client = 200
         self.server = None
         
         logger.info(f"WebSocket server configured for {host}:{port}")
@@ -212,10 +343,12 @@ class WebSocketServer:
     async def start_server(self):
         """Start the WebSocket server"""
         try:
+            # Compression would re-encode every shared payload once per client
             self.server = await websockets.serve(
                 self.handle_client,
                 self.host,
-                self.port
+                self.port,
+                compression=None
             )
             logger.info(f"WebSocket server started on {self.host}:{self.port}")
             
@@ -233,8 +366,10 @@ class WebSocketServer:
     async def handle_client(self, websocket, path):
         """Handle WebSocket client connection"""
         try:
+            connection = ClientConnection(websocket)
             self.clients.add(websocket)
-            self.client_subscriptions[websocket] = set()
+            self.connections[websocket] = connection
+            self.client_subscriptions[websocket] = connection.symbols
             
             logger.info(f"Client connected: {websocket.remote_address}")
             
@@ -290,15 +425,22 @@ class WebSocketServer:
     async def subscribe_client(self, websocket, symbol: str):
         """Subscribe client to symbol updates"""
         try:
-            # Create callback for this client
-            def client_callback(update: StreamingUpdate):
-                asyncio.create_task(self.send_update(websocket, update))
+            connection = self.connections[websocket]
+            if symbol not in connection.symbols and len(connection.symbols) >= self.max_symbols_per_client:
+                await self.send_error(websocket, f"Subscription limit of {self.max_symbols_per_client} symbols reached")
+                return
             
-            # Subscribe to streamer
-            success = self.streamer.subscribe(symbol, client_callback)
+            # The server holds one streamer subscription per symbol and fans out itself
+            if symbol in self.symbol_clients:
+                success = True
+            else:
+                success = self.streamer.subscribe(symbol, self.broadcast_update)
+                if success:
+                    self.symbol_clients[symbol] = set()
             
             if success:
-                self.client_subscriptions[websocket].add(symbol)
+                self.symbol_clients[symbol].add(connection)
+                connection.symbols.add(symbol)
                 await websocket.send(json.dumps({
                     "type": "subscription_success",
                     "symbol": symbol,
@@ -315,10 +457,9 @@ class WebSocketServer:
     async def unsubscribe_client(self, websocket, symbol: str):
         """Unsubscribe client from symbol updates"""
         try:
-            if symbol in self.client_subscriptions.get(websocket, set()):
-                # Note: In a real implementation, we'd need to track the specific callback
-                # For now, we'll just remove from client subscriptions
-                self.client_subscriptions[websocket].discard(symbol)
+            connection = self.connections.get(websocket)
+            if connection and symbol in connection.symbols:
+                self._remove_subscription(connection, symbol)
                 
                 await websocket.send(json.dumps({
                     "type": "unsubscription_success",
@@ -333,28 +474,48 @@ class WebSocketServer:
             logger.error(f"Error unsubscribing client from {symbol}: {e}")
             await self.send_error(websocket, "Unsubscription failed")
     
+    def _remove_subscription(self, connection: ClientConnection, symbol: str):
+        """Drop one client subscription, releasing the streamer subscription when it was the last"""
+        connection.symbols.discard(symbol)
+        connection.pending.pop(symbol, None)
+        clients = self.symbol_clients.get(symbol)
+        if clients is not None:
+            clients.discard(connection)
+            if not clients:
+                del self.symbol_clients[symbol]
+                self.streamer.unsubscribe(symbol, self.broadcast_update)
+    
+    def broadcast_update(self, update: StreamingUpdate):
+        """Serialize an update once and queue the same payload for every subscribed client"""
+        clients = self.symbol_clients.get(update.symbol)
+        if not clients:
+            return
+        payload = json.dumps({
+            "type": "market_update",
+            "data": update.to_dict()
+        })
+        for connection in clients:
+            connection.push(update.symbol, payload)
+    
     async def send_update(self, websocket, update: StreamingUpdate):
         """Send market data update to client"""
-        try:
-            message = {
+        connection = self.connections.get(websocket)
+        if connection:
+            connection.push(update.symbol, json.dumps({
                 "type": "market_update",
                 "data": update.to_dict()
-            }
-            await websocket.send(json.dumps(message))
-            
-        except websockets.exceptions.ConnectionClosed:
-            # Client disconnected, will be cleaned up
-            pass
-        except Exception as e:
-            logger.error(f"Error sending update to client: {e}")
+            }))
     
     async def send_status(self, websocket):
         """Send streaming status to client"""
         try:
             status = self.streamer.get_streaming_status()
+            connection = self.connections.get(websocket)
             status.update({
                 "type": "status",
                 "connected_clients": len(self.clients),
+                "updates_sent": connection.sent if connection else 0,
+                "updates_conflated": connection.conflated if connection else 0,
                 "timestamp": datetime.now(timezone.utc).isoformat()
             })
             await websocket.send(json.dumps(status))
@@ -379,14 +540,14 @@ class WebSocketServer:
         """Clean up client connection"""
         try:
             self.clients.discard(websocket)
+            self.client_subscriptions.pop(websocket, None)
             
             # Unsubscribe from all symbols
-            if websocket in self.client_subscriptions:
-                subscribed_symbols = self.client_subscriptions[websocket].copy()
-                for symbol in subscribed_symbols:
-                    # In a real implementation, we'd properly unsubscribe the callback
-                    pass
-                del self.client_subscriptions[websocket]
+            connection = self.connections.pop(websocket, None)
+            if connection:
+                for symbol in list(connection.symbols):
+                    self._remove_subscription(connection, symbol)
+                connection.close()
             
             logger.info(f"Cleaned up client: {websocket.remote_address}")
             
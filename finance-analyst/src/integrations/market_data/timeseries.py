@@ -0,0 +1,276 @@
+"""
+Columnar OHLCV time series for the Multi-Agent AI Trading System
+
+A series stores every field as a contiguous NumPy row of one (fields x bars)
+float64 matrix, so validation, returns and indicators run as array operations
+instead of loops over MarketDataPoint objects. Series and symbol-indexed
+panels can be saved as .npy files and loaded memory-mapped, letting worker
+processes share history through the page cache without copying or refetching.
+"""
+import json
+import math
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume", "adjusted_close")
+_ROW = {name: row for row, name in enumerate(FIELDS)}
+
+
+def _write_atomic(path: str, write, suffix: str = ".tmp"):
+    """Write a file through a temporary file in the same directory and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=suffix)
+    try:
+        # mkstemp creates the file readable by its owner only
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class OHLCVSeries:
+    """OHLCV bars for one symbol, stored column-wise"""
+
+    def __init__(self, symbol: str, data: np.ndarray):
+        """
+        Wrap a (fields x bars) matrix
+
+        Args:
+            symbol: Ticker symbol
+            data: float64 matrix with one row per entry of FIELDS; timestamps are
+                epoch seconds and a missing adjusted close is NaN
+        """
+        if data.ndim != 2 or data.shape[0] != len(FIELDS):
+            raise ValueError(f"Expected a ({len(FIELDS)}, n) matrix, got {data.shape}")
+        self.symbol = symbol
+        self.data = data
+
+    @classmethod
+    def empty(cls, symbol: str) -> "OHLCVSeries":
+        return cls(symbol, np.empty((len(FIELDS), 0)))
+
+    @classmethod
+    def from_columns(cls, symbol: str, timestamp: Sequence[Any], open: Sequence[Any],
+                     high: Sequence[Any], low: Sequence[Any], close: Sequence[Any],
+                     volume: Sequence[Any], adjusted_close: Optional[Sequence[Any]] = None) -> "OHLCVSeries":
+        """
+        Build a series from per-field sequences, e.g. a chart API response
+
+        None entries become NaN, and bars missing any OHLCV value are dropped.
+        Columns of different lengths are truncated to the shortest.
+        """
+        columns = [timestamp, open, high, low, close, volume]
+        length = min(len(column) for column in columns)
+        data = np.full((len(FIELDS), length), np.nan)
+        for row, column in enumerate(columns):
+            data[row] = np.array(column[:length], dtype=float)
+        if adjusted_close is not None:
+            adjusted = np.array(adjusted_close[:length], dtype=float)
+            data[_ROW["adjusted_close"], :len(adjusted)] = adjusted
+
+        complete = ~np.isnan(data[:_ROW["adjusted_close"]]).any(axis=0)
+        return cls(symbol, data[:, complete] if not complete.all() else data)
+
+    @classmethod
+    def from_points(cls, symbol: str, points: Sequence[Any]) -> "OHLCVSeries":
+        """Build a series from MarketDataPoint objects"""
+        return cls.from_columns(
+            symbol,
+            [point.timestamp.timestamp() for point in points],
+            [point.open for point in points],
+            [point.high for point in points],
+            [point.low for point in points],
+            [point.close for point in points],
+            [point.volume for point in points],
+            [point.adjusted_close for point in points]
+        )
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    def __getitem__(self, index: slice) -> "OHLCVSeries":
+        """Slice bars; the result is a view that shares memory with this series"""
+        if not isinstance(index, slice):
+            raise TypeError("OHLCVSeries only supports slicing")
+        return OHLCVSeries(self.symbol, self.data[:, index])
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.data[_ROW["timestamp"]]
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.data[_ROW["open"]]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.data[_ROW["high"]]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.data[_ROW["low"]]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.data[_ROW["close"]]
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.data[_ROW["volume"]]
+
+    @property
+    def adjusted_close(self) -> np.ndarray:
+        return self.data[_ROW["adjusted_close"]]
+
+    def valid_mask(self) -> np.ndarray:
+        """Bars with positive prices, a consistent high/low range and non-negative volume"""
+        open_, high, low, close = self.open, self.high, self.low, self.close
+        return (
+            (open_ > 0) & (high > 0) & (low > 0) & (close > 0)
+            & (high >= low)
+            & (open_ <= high) & (open_ >= low)
+            & (close <= high) & (close >= low)
+            & (self.volume >= 0)
+        )
+
+    def clean(self) -> "OHLCVSeries":
+        """Return the series without invalid bars (self if every bar is valid)"""
+        mask = self.valid_mask()
+        return self if mask.all() else OHLCVSeries(self.symbol, self.data[:, mask])
+
+    def returns(self) -> np.ndarray:
+        """Simple close-to-close returns, skipping steps from a non-positive close"""
+        previous, current = self.close[:-1], self.close[1:]
+        positive = previous > 0
+        return (current[positive] - previous[positive]) / previous[positive]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Yield bars in the MarketDataPoint.to_dict layout"""
+        rows = self.data.T.tolist()
+        for timestamp, open_, high, low, close, volume, adjusted in rows:
+            yield {
+                "symbol": self.symbol,
+                "timestamp": datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(),
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": int(volume),
+                "adjusted_close": None if math.isnan(adjusted) else adjusted
+            }
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return list(self.iter_records())
+
+    def to_points(self) -> List[Any]:
+        """Convert to MarketDataPoint objects for callers that still expect them"""
+        from src.integrations.market_data.data_provider import MarketDataPoint
+
+        return [
+            MarketDataPoint(
+                symbol=self.symbol,
+                timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc),
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                volume=int(volume),
+                adjusted_close=None if math.isnan(adjusted) else adjusted
+            )
+            for timestamp, open_, high, low, close, volume, adjusted in self.data.T.tolist()
+        ]
+
+    def save(self, path: str):
+        """Write the series to a .npy file atomically, so concurrent readers never see a partial file"""
+        _write_atomic(path, lambda f: np.save(f, np.ascontiguousarray(self.data)), suffix=".npy.tmp")
+
+    @classmethod
+    def load(cls, symbol: str, path: str, mmap: bool = True) -> "OHLCVSeries":
+        """Load a saved series, memory-mapped read-only by default"""
+        return cls(symbol, np.load(path, mmap_mode="r" if mmap else None))
+
+
+class OHLCVPanel:
+    """Symbol-indexed collection of OHLCV series with cross-symbol array views"""
+
+    def __init__(self, series: Optional[Dict[str, OHLCVSeries]] = None):
+        self.series: Dict[str, OHLCVSeries] = dict(series or {})
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.series
+
+    def __getitem__(self, symbol: str) -> OHLCVSeries:
+        return self.series[symbol]
+
+    def __setitem__(self, symbol: str, series: OHLCVSeries):
+        self.series[symbol] = series
+
+    def __len__(self) -> int:
+        return len(self.series)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self.series)
+
+    def matrix(self, field: str = "close", length: Optional[int] = None,
+               symbols: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Right-aligned (symbols x bars) matrix of one field, NaN-padded
+
+        Args:
+            field: Name from FIELDS
+            length: Keep only the last `length` bars (defaults to the longest series)
+            symbols: Row order (defaults to every symbol)
+        """
+        symbols = list(symbols) if symbols is not None else self.symbols
+        row = _ROW[field]
+        lengths = [len(self.series[symbol]) for symbol in symbols]
+        width = length if length is not None else max(lengths, default=0)
+        result = np.full((len(symbols), width), np.nan)
+        for i, symbol in enumerate(symbols):
+            values = self.series[symbol].data[row, -width:] if width else self.series[symbol].data[row, :0]
+            if len(values):
+                result[i, width - len(values):] = values
+        return result
+
+    def returns(self, length: Optional[int] = None) -> np.ndarray:
+        """Close-to-close returns for every symbol, NaN where a bar is missing"""
+        closes = self.matrix("close", None if length is None else length + 1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.diff(closes, axis=1) / closes[:, :-1]
+
+    def clean(self) -> "OHLCVPanel":
+        """Panel with invalid bars removed from every series"""
+        return OHLCVPanel({symbol: series.clean() for symbol, series in self.series.items()})
+
+    def save(self, directory: str):
+        """Save every series plus a manifest mapping symbols to files"""
+        os.makedirs(directory, exist_ok=True)
+        manifest = {}
+        for i, (symbol, series) in enumerate(self.series.items()):
+            filename = f"{i:05d}.npy"
+            series.save(os.path.join(directory, filename))
+            manifest[symbol] = filename
+        # Replace the manifest last and atomically, so a concurrent load sees either
+        # the previous manifest or the complete new one
+        _write_atomic(os.path.join(directory, "manifest.json"),
+                      lambda f: f.write(json.dumps(manifest).encode()), suffix=".json.tmp")
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "OHLCVPanel":
+        """Load a saved panel, memory-mapping each series by default"""
+        with open(os.path.join(directory, "manifest.json")) as f:
+            manifest = json.load(f)
+        return cls({
+            symbol: OHLCVSeries.load(symbol, os.path.join(directory, filename), mmap=mmap)
+            for symbol, filename in manifest.items()
+        })
@@ -0,0 +1,263 @@
+"""
+WebSocket fan-out load test for the Multi-Agent AI Trading System
+
+Starts a WebSocketServer fed by synthetic prices and connects many dashboard
+clients over real sockets from separate worker processes, then reports
+update latency measured from when each update was created. A share of the
+clients never read: they connect with a small receive buffer and subscribe to
+many symbols, so their sockets back up within a few ticks. The report shows
+how many updates were conflated for each of them, to show that slow sockets
+are conflated instead of stalling the others.
+
+Usage (from the finance-analyst directory):
+    python -m src.integrations.market_data.websocket_loadtest --clients 2000
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import websockets
+
+from src.integrations.market_data.streaming import MarketDataStreamer, WebSocketServer
+
+
+class SyntheticMarketData:
+    """Stand-in for MarketDataManager that returns random-walk prices"""
+
+    def __init__(self):
+        self.prices: Dict[str, float] = {}
+
+    async def get_current_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        for symbol in symbols:
+            price = self.prices.get(symbol, 100.0)
+            self.prices[symbol] = price * (1 + random.gauss(0, 0.001))
+        return {symbol: self.prices[symbol] for symbol in symbols}
+
+    async def get_current_price(self, symbol: str) -> Optional[float]:
+        return (await self.get_current_prices([symbol]))[symbol]
+
+
+def _raise_file_limit(required: int):
+    """Lift the soft open-file limit towards the hard limit for many sockets"""
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < required:
+        target = required if hard == resource.RLIM_INFINITY else min(required, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _connect_small_buffer(url: str, receive_buffer: int) -> socket.socket:
+    """Open a TCP connection with a small receive buffer, set before connecting so the window stays small"""
+    address = urlparse(url)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, (address.hostname, address.port))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+async def _client(url: str, symbols: List[str], latencies: List[float], slow: bool,
+                  receive_buffer: int, slow_ports: List[int], ready: asyncio.Event,
+                  connected: List[int], total: int, stop: asyncio.Event):
+    try:
+        if slow:
+            sock = await _connect_small_buffer(url, receive_buffer)
+            websocket = await websockets.connect(url, sock=sock, compression=None, open_timeout=60,
+                                                 max_queue=1)
+            # The server knows this client by its address, which is how its counters are matched
+            slow_ports.append(websocket.local_address[1])
+        else:
+            websocket = await websockets.connect(url, compression=None, open_timeout=60, max_queue=None)
+        await websocket.recv()  # welcome
+        for symbol in symbols:
+            await websocket.send(json.dumps({"type": "subscribe", "symbol": symbol}))
+    finally:
+        # Failed clients count too, so the worker never waits on them
+        connected[0] += 1
+        if connected[0] == total:
+            ready.set()
+
+    try:
+        if slow:
+            # Never read again; the socket buffers fill up and the server conflates
+            await stop.wait()
+            return
+        receiver = asyncio.create_task(_receive(websocket, latencies, ready))
+        await stop.wait()
+        receiver.cancel()
+    finally:
+        await websocket.close()
+
+
+async def _receive(websocket, latencies: List[float], ready: asyncio.Event):
+    async for message in websocket:
+        data = json.loads(message)
+        if data.get("type") == "market_update" and ready.is_set():
+            sent = datetime.fromisoformat(data["data"]["timestamp"])
+            latencies.append((datetime.now(timezone.utc) - sent).total_seconds())
+
+
+async def _run_clients(url: str, clients: int, universe: List[str], symbols_per_client: int,
+                       slow_fraction: float, slow_symbols: int, receive_buffer: int,
+                       duration: float, events: Any) -> Dict[str, Any]:
+    ready = asyncio.Event()
+    stop = asyncio.Event()
+    connected = [0]
+    latencies: List[float] = []
+    slow_ports: List[int] = []
+
+    tasks = []
+    for i in range(clients):
+        slow = random.random() < slow_fraction
+        tasks.append(asyncio.create_task(_client(
+            url, random.sample(universe, slow_symbols if slow else symbols_per_client), latencies,
+            slow, receive_buffer, slow_ports, ready, connected, clients, stop
+        )))
+        if i % 100 == 99:
+            await asyncio.sleep(0.01)  # Spread the connection burst
+
+    # Measure only once every client in this worker is subscribed
+    await ready.wait()
+    events.put(slow_ports)
+    await asyncio.sleep(duration)
+    stop.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    return {
+        "latencies": latencies,
+        "errors": sum(isinstance(result, Exception) for result in results)
+    }
+
+
+def _client_worker(url: str, clients: int, universe: List[str], symbols_per_client: int,
+                   slow_fraction: float, slow_symbols: int, receive_buffer: int, duration: float,
+                   events: Any, results: Any):
+    _raise_file_limit(clients + 256)
+    results.put(asyncio.run(_run_clients(
+        url, clients, universe, symbols_per_client, slow_fraction, slow_symbols, receive_buffer,
+        duration, events
+    )))
+
+
+async def run_load_test(clients: int, symbols: int, symbols_per_client: int, duration: float,
+                        update_interval: float, slow_fraction: float, port: int,
+                        workers: int, slow_symbols: int = 100,
+                        receive_buffer: int = 4096) -> Dict[str, Any]:
+    """Run the server in this process and the clients in worker processes"""
+    _raise_file_limit(clients + 256)
+    loop = asyncio.get_running_loop()
+
+    streamer = MarketDataStreamer(SyntheticMarketData())
+    streamer.update_interval = update_interval
+    server = WebSocketServer(streamer, host="127.0.0.1", port=port)
+    await server.start_server()
+
+    universe = [f"SYM{i:04d}" for i in range(symbols)]
+    url = f"ws://127.0.0.1:{port}"
+    events = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    processes = []
+    for worker in range(workers):
+        share = clients // workers + (1 if worker < clients % workers else 0)
+        process = multiprocessing.Process(target=_client_worker, args=(
+            url, share, universe, symbols_per_client, slow_fraction, min(slow_symbols, symbols),
+            receive_buffer, duration, events, results
+        ), daemon=True)
+        process.start()
+        processes.append(process)
+
+    slow_ports = set()
+    for _ in processes:
+        slow_ports.update(await loop.run_in_executor(None, events.get))
+    overruns_before = streamer.overruns
+    # Kept to read counters after disconnect; slow clients are found by their port
+    slow_connections = []
+    fast_connections = []
+    for websocket, connection in server.connections.items():
+        is_slow = websocket.remote_address[1] in slow_ports
+        (slow_connections if is_slow else fast_connections).append(connection)
+    started = time.perf_counter()
+
+    outcomes = [await loop.run_in_executor(None, results.get) for _ in processes]
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    latencies = [latency for outcome in outcomes for latency in outcome["latencies"]]
+    slow_conflated = [connection.conflated for connection in slow_connections]
+    overruns = streamer.overruns - overruns_before
+    await server.stop_server()
+    streamer._stop_streaming()
+
+    return {
+        "clients": clients,
+        "client_errors": sum(outcome["errors"] for outcome in outcomes),
+        "updates_received": len(latencies),
+        "updates_per_second": len(latencies) / elapsed,
+        "latency_p50_ms": _percentile(latencies, 50) * 1000,
+        "latency_p99_ms": _percentile(latencies, 99) * 1000,
+        "latency_max_ms": max(latencies, default=0.0) * 1000,
+        "updates_conflated": sum(slow_conflated) + sum(c.conflated for c in fast_connections),
+        "slow_clients": len(slow_connections),
+        "slow_clients_conflated": sum(1 for conflated in slow_conflated if conflated),
+        "slow_conflated_min": min(slow_conflated, default=0),
+        "slow_conflated_p50": _percentile(slow_conflated, 50),
+        "fast_clients_conflated": sum(1 for c in fast_connections if c.conflated),
+        "stream_overruns": overruns
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the market data WebSocket fan-out")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--symbols-per-client", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--update-interval", type=float, default=1.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.05)
+    parser.add_argument("--slow-symbols", type=int, default=100,
+                        help="Symbols each slow client subscribes to, so its socket backs up quickly")
+    parser.add_argument("--receive-buffer", type=int, default=4096,
+                        help="SO_RCVBUF of slow clients in bytes")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load_test(
+        args.clients, args.symbols, args.symbols_per_client, args.duration,
+        args.update_interval, args.slow_fraction, args.port, args.workers,
+        args.slow_symbols, args.receive_buffer
+    ))
+    for name, value in stats.items():
+        print(f"{name:>22}: {value:.2f}" if isinstance(value, float) else f"{name:>22}: {value}")
+    if stats["slow_clients_conflated"] < stats["slow_clients"]:
+        # Without backpressure on every slow client the run does not test conflation
+        print(f"Only {stats['slow_clients_conflated']} of {stats['slow_clients']} slow clients were conflated; "
+              f"try a longer --duration or more --slow-symbols")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from src.integrations.market_data.data_provider import YahooFinanceProvider
+from src.integrations.market_data.streaming import MarketDataStreamer
+
+
+class QuoteClient:
+    """Stand-in for ApiClient that serves the quotes endpoint from a price table"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def call_api(self, endpoint, query):
+        self.calls.append((endpoint, query))
+        if endpoint != 'YahooFinance/get_quotes':
+            raise AssertionError(f"unexpected endpoint {endpoint}")
+        return {'quoteResponse': {'result': [
+            {'symbol': symbol, 'regularMarketPrice': self.prices[symbol]}
+            for symbol in query['symbols'] if symbol in self.prices
+        ]}}
+
+
+@pytest.fixture
+def provider():
+    provider = YahooFinanceProvider()
+    provider.client = QuoteClient({"AAPL": 190.0, "MSFT": 410.5})
+    return provider
+
+
+@pytest.mark.asyncio
+async def test_batch_is_one_request(provider):
+    prices = await provider.get_current_prices(["AAPL", "MSFT", "NOPE"])
+    assert prices == {"AAPL": 190.0, "MSFT": 410.5, "NOPE": None}
+    assert provider.client.calls == [('YahooFinance/get_quotes', {'symbols': ["AAPL", "MSFT", "NOPE"]})]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_per_batch(provider):
+    provider.rate_limit_delay = 0.05
+    symbols = [f"SYM{i}" for i in range(200)]
+    provider.client.prices = {symbol: 1.0 for symbol in symbols}
+
+    start = asyncio.get_running_loop().time()
+    await asyncio.gather(*(provider.get_current_prices(symbols[i:i + 50]) for i in range(0, 200, 50)))
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert len(provider.client.calls) == 4
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_quotes_are_never_served_from_cache(provider):
+    await provider.get_current_prices(["AAPL"])
+    provider.client.prices["AAPL"] = 191.0
+    assert await provider.get_current_prices(["AAPL"]) == {"AAPL": 191.0}
+    assert provider.cache.get_stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_streamer_broadcasts_price_changes(provider):
+    class Manager:
+        get_current_prices = staticmethod(provider.get_current_prices)
+
+    streamer = MarketDataStreamer(Manager())
+    updates = []
+    streamer.subscribe("AAPL", updates.append)
+    streamer._stop_streaming()
+
+    semaphore = asyncio.Semaphore(1)
+    await streamer._poll_batch(["AAPL"], semaphore)
+    provider.client.prices["AAPL"] = 192.0
+    await streamer._poll_batch(["AAPL"], semaphore)
+    await streamer.subscribers["AAPL"][updates.append].queue.join()
+    streamer.unsubscribe("AAPL", updates.append)
+    await asyncio.sleep(0)
+
+    assert [update.price for update in updates] == [190.0, 192.0]
+    assert updates[-1].change == pytest.approx(2.0)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from src.integrations.market_data.cache import MarketDataCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    cache = MarketDataCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    results = await asyncio.gather(*(cache.get_or_fetch("AAPL", fetch) for _ in range(10)))
+    assert results == [[1, 2, 3]] * 10
+    assert len(calls) == 1
+    assert cache.stats["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_one_refresh_runs():
+    cache = MarketDataCache(stale_factor=10.0)
+    cache.set("AAPL", "old", ttl=0.01)
+    await asyncio.sleep(0.02)
+    refreshed = asyncio.Event()
+
+    async def fetch():
+        refreshed.set()
+        return "new"
+
+    assert await cache.get_or_fetch("AAPL", fetch, ttl=60) == "old"
+    assert await cache.get_or_fetch("AAPL", fetch, ttl=60) == "old"
+    await asyncio.wait_for(refreshed.wait(), 1)
+    await asyncio.sleep(0)
+    assert await cache.get_or_fetch("AAPL", fetch, ttl=60) == "new"
+    assert cache.stats["fetches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_results_are_not_cached():
+    cache = MarketDataCache()
+
+    async def fetch():
+        return []
+
+    assert await cache.get_or_fetch("AAPL", fetch) == []
+    assert await cache.get_or_fetch("AAPL", fetch) == []
+    assert cache.stats["fetches"] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = MarketDataCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats["evictions"] == 1
@@ -4,13 +4,17 @@ This module handles the conversion of user text input into emotion and occasion
 """
 
 import os
+import re
+import atexit
 import openai
 from dotenv import load_dotenv
 import json
+from functools import lru_cache
 
 
 # Import font database to access all emotions and occasions
 from font_database import get_all_emotions, get_all_occasions
+from analysis_cache import AnalysisCache, load_embedder
 from fi_instrumentation.fi_types import SpanAttributes, FiSpanKindValues
 from opentelemetry import trace
 
@@ -21,6 +25,17 @@ load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY", "")
 tracer = trace.get_tracer(__name__)
 
+# Cache of LLM analysis results, shared by all requests and persisted to disk
+analysis_cache = AnalysisCache(
+    path=os.getenv("FONT_ANALYSIS_CACHE_PATH", os.path.join(os.path.dirname(__file__), "analysis_cache.json")),
+    max_entries=int(os.getenv("FONT_ANALYSIS_CACHE_SIZE", 1000)),
+    ttl_seconds=float(os.getenv("FONT_ANALYSIS_CACHE_TTL", 7 * 24 * 3600)),
+    vocabulary=get_all_emotions() + get_all_occasions(),
+    similarity_threshold=float(os.getenv("FONT_ANALYSIS_CACHE_SIMILARITY", 0.85)),
+    embedder=load_embedder(os.getenv("FONT_ANALYSIS_EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+)
+atexit.register(analysis_cache.flush)
+
 def analyze_text_with_openai(text, emotions, occasions):
     """
     Use OpenAI to analyze text and generate weights for emotions and occasions.
@@ -108,6 +123,8 @@ def analyze_text_with_openai(text, emotions, occasions):
                     "occasion_weights": weights["occasion_weights"]
                 }
             ))
+            # Only successful LLM results are cached, never the fallback
+            analysis_cache.put(text, weights["emotion_weights"], weights["occasion_weights"])
             return weights["emotion_weights"], weights["occasion_weights"]
             
         except Exception as e:
@@ -115,10 +132,71 @@ def analyze_text_with_openai(text, emotions, occasions):
             # Fallback to simpler method if API call fails
             return fallback_text_analysis(text, emotions, occasions)
 
+# Words in user text and tags are split on anything that is not a letter or digit
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Weights assigned by the keyword fallback
+FULL_MATCH_WEIGHT = 0.8
+PARTIAL_MATCH_WEIGHT = 0.5
+
+def _stem(word):
+    """
+    Reduce a word to a crude stem so that simple inflections match.
+    The same rules are applied to tags and user text, so the stems only need to be consistent.
+    
+    Args:
+        word (str): Lowercase word
+        
+    Returns:
+        str: Stemmed word
+    """
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    if len(word) > 5 and word.endswith("ing"):
+        word = word[:-3]
+    elif len(word) > 4 and word.endswith("ed"):
+        word = word[:-2]
+    return word
+
+def _stem_phrase(phrase):
+    """Return the tuple of stemmed words in a phrase."""
+    return tuple(_stem(word) for word in WORD_PATTERN.findall(phrase.lower()))
+
+@lru_cache(maxsize=8)
+def _build_keyword_matcher(emotions, occasions):
+    """
+    Build a phrase index mapping stemmed word sequences to the tags they match.
+    A tag matches fully on its whole phrase and partially on each hyphen-separated part.
+    
+    Args:
+        emotions (tuple): All possible emotions
+        occasions (tuple): All possible occasions
+        
+    Returns:
+        tuple: (phrase_index, max_phrase_length) where phrase_index maps a tuple of stems
+            to a list of (is_occasion, tag, weight) entries
+    """
+    phrase_index = {}
+    for is_occasion, tags in ((False, emotions), (True, occasions)):
+        for tag in tags:
+            full = _stem_phrase(tag)
+            if full:
+                phrase_index.setdefault(full, []).append((is_occasion, tag, FULL_MATCH_WEIGHT))
+            for part in tag.lower().split('-'):
+                stems = _stem_phrase(part)
+                if stems and stems != full:
+                    phrase_index.setdefault(stems, []).append((is_occasion, tag, PARTIAL_MATCH_WEIGHT))
+
+    max_phrase_length = max((len(phrase) for phrase in phrase_index), default=0)
+    return phrase_index, max_phrase_length
+
 def fallback_text_analysis(text, emotions, occasions):
     """
     Fallback method for text analysis when OpenAI API is not available.
-    Uses simple keyword matching to assign weights.
+    Uses keyword matching on stemmed words to assign weights, with a phrase
+    index built once per vocabulary so each call is a single scan of the text.
     
     Args:
         text (str): User input text describing the purpose or occasion
@@ -128,25 +206,20 @@ def fallback_text_analysis(text, emotions, occasions):
     Returns:
         tuple: (emotion_weights, occasion_weights) dictionaries
     """
-    text = text.lower()
+    phrase_index, max_phrase_length = _build_keyword_matcher(tuple(emotions), tuple(occasions))
+    words = _stem_phrase(text)
     
     # Initialize weights
     emotion_weights = {}
     occasion_weights = {}
     
-    # Simple keyword matching for emotions
-    for emotion in emotions:
-        if emotion.lower() in text:
-            emotion_weights[emotion] = 0.8
-        elif any(word in text for word in emotion.lower().split('-')):
-            emotion_weights[emotion] = 0.5
-    
-    # Simple keyword matching for occasions
-    for occasion in occasions:
-        if occasion.lower() in text:
-            occasion_weights[occasion] = 0.8
-        elif any(word in text for word in occasion.lower().split('-')):
-            occasion_weights[occasion] = 0.5
+    # Look up every word sequence up to the longest tag phrase
+    for start in range(len(words)):
+        for end in range(start + 1, min(start + max_phrase_length, len(words)) + 1):
+            for is_occasion, tag, weight in phrase_index.get(words[start:end], ()):
+                weights = occasion_weights if is_occasion else emotion_weights
+                if weight > weights.get(tag, 0):
+                    weights[tag] = weight
     
     # Add some default weights if nothing matched
     if not emotion_weights:
@@ -175,6 +248,11 @@ def process_user_input(text):
     Returns:
         tuple: (emotion_weights, occasion_weights) dictionaries
     """
+    # Serve repeated prompts from the cache
+    cached = analysis_cache.get(text)
+    if cached is not None:
+        return cached
+    
     # Get all possible emotions and occasions from the database
     emotions = get_all_emotions()
     occasions = get_all_occasions()
@@ -0,0 +1,374 @@
+"""
+Semantic cache for text analysis results in the font search application.
+This module stores emotion and occasion weights returned by the LLM so that
+repeated or paraphrased prompts can skip the API call.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # sentence-transformers is optional; hashed embeddings are used without it
+    SentenceTransformer = None
+
+# Dimension of the hashed text embeddings
+EMBEDDING_DIM = 512
+
+# Common words that carry no meaning for font selection
+STOP_WORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "for", "from", "i", "i'm", "im", "in", "is",
+    "it", "looks", "my", "need", "needs", "of", "on", "or", "that", "the", "this", "to",
+    "want", "with", "font", "fonts", "something", "some", "like", "would", "should",
+])
+
+# Words that invert or grade the word after them; prompts that differ in them never share a result
+NEGATION_WORDS = frozenset([
+    "not", "no", "non", "never", "without", "don't", "dont", "isn't", "isnt", "nothing", "nor", "anti",
+])
+MODIFIER_WORDS = frozenset([
+    "very", "more", "less", "most", "least", "too", "extra", "super", "slightly", "somewhat", "really",
+    "extremely", "highly", "quite", "rather", "bit", "little", "overly", "barely", "hardly", "but", "except",
+])
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def normalize_text(text):
+    """
+    Normalize text into a cache key.
+
+    Only case, punctuation, whitespace and filler words are ignored. Word order
+    and every content word, including negations such as "not", are kept, so two
+    prompts share a key only when they ask for the same thing.
+
+    Args:
+        text (str): User input text
+
+    Returns:
+        str: Lowercased content words separated by single spaces
+    """
+    return " ".join(token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS)
+
+
+def embed_text(text):
+    """
+    Compute a local embedding for text using feature hashing.
+
+    Content words and their character trigrams are hashed into a fixed-size
+    vector, so paraphrases that share most words land close together.
+
+    Args:
+        text (str): User input text
+
+    Returns:
+        numpy.ndarray: L2-normalized embedding of length EMBEDDING_DIM
+    """
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token in normalize_text(text).split():
+        features = [(f"w:{token}", 1.0)]
+        padded = f"<{token}>"
+        features.extend((f"c:{padded[i:i + 3]}", 0.5) for i in range(len(padded) - 2))
+        for feature, weight in features:
+            digest = hashlib.md5(feature.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[index] += sign * weight
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def load_embedder(model_name=None):
+    """
+    Return a function that embeds text locally.
+
+    A sentence-transformers model is used when the package is installed and a
+    model name is given; otherwise texts are embedded with embed_text.
+
+    Args:
+        model_name (str, optional): Name or path of a sentence-transformers model
+
+    Returns:
+        callable: Function mapping a text to an L2-normalized numpy vector
+    """
+    if not model_name or SentenceTransformer is None:
+        return embed_text
+    try:
+        model = SentenceTransformer(model_name)
+    except Exception as e:
+        print(f"Error loading embedding model {model_name}: {e}")
+        return embed_text
+
+    def embed(text):
+        return np.asarray(model.encode(text, normalize_embeddings=True), dtype=np.float32)
+
+    return embed
+
+
+def same_meaning(text, other):
+    """
+    Check that two similar prompts do not differ in a way embeddings blur.
+
+    Negation and modifier words must match together with the word they apply
+    to, and the content words both prompts share must appear in the same order.
+
+    Args:
+        text (str): User input text
+        other (str): Text of a cached prompt
+
+    Returns:
+        bool: True if a cached result for other may be served for text
+    """
+    tokens = normalize_text(text).split()
+    other_tokens = normalize_text(other).split()
+    if _qualifiers(tokens) != _qualifiers(other_tokens):
+        return False
+
+    shared = set(tokens) & set(other_tokens)
+    return [token for token in tokens if token in shared] == [token for token in other_tokens if token in shared]
+
+
+def _qualifiers(tokens):
+    """Return each negation or modifier word paired with the word it applies to."""
+    qualifier_words = NEGATION_WORDS | MODIFIER_WORDS
+    pairs = Counter()
+    for i, token in enumerate(tokens):
+        if token in qualifier_words:
+            target = next((word for word in tokens[i + 1:] if word not in qualifier_words), None)
+            pairs[(token, target)] += 1
+    return pairs
+
+
+class AnalysisCache:
+    """
+    Two-tier cache of text analysis results.
+
+    Lookups first try an exact match on the normalized text, then the nearest
+    cached embedding above a cosine similarity threshold, as long as the two
+    prompts pass same_meaning(). Entries expire after a TTL and the least
+    recently used entries are evicted beyond max_entries. The cache is
+    persisted to a JSON file in batches by a background thread, and on flush().
+    """
+
+    def __init__(self, path=None, max_entries=1000, ttl_seconds=7 * 24 * 3600,
+                 vocabulary=None, flush_interval=30.0, flush_batch=20,
+                 similarity_threshold=0.85, embedder=None):
+        """
+        Initialize the cache and load persisted entries.
+
+        Args:
+            path (str, optional): JSON file used for persistence, None to keep the cache in memory only
+            max_entries (int): Maximum number of cached results
+            ttl_seconds (float): Time after which an entry expires
+            vocabulary (list, optional): Emotions and occasions the results refer to; a cache file
+                written for a different vocabulary is discarded
+            flush_interval (float): Seconds after which pending changes are written in the background
+            flush_batch (int): Number of pending changes that triggers a background write sooner
+            similarity_threshold (float): Minimum cosine similarity for a nearest-neighbour hit
+            embedder (callable, optional): Function embedding a text locally, embed_text by default
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder or embed_text
+        self.vocabulary_hash = hashlib.md5(json.dumps(vocabulary or []).encode("utf-8")).hexdigest()
+        self._entries = OrderedDict()
+        self._vectors = {}
+        self._index_keys = []
+        self._index = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = 0
+        self._last_save = time.time()
+        self._flusher = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._load()
+
+    def get(self, text):
+        """
+        Look up cached weights for a text.
+
+        Args:
+            text (str): User input text
+
+        Returns:
+            tuple: (emotion_weights, occasion_weights) dictionaries, or None on a miss
+        """
+        key = normalize_text(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                self._remove(key)
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry["emotion_weights"]), dict(entry["occasion_weights"])
+            if not key or not self._entries:
+                self.misses += 1
+                return None
+
+        # Embed outside the lock so a slow model does not block other requests
+        vector = self.embedder(text)
+        with self._lock:
+            self._build_index()
+            candidates = []
+            if self._index_keys:
+                similarities = self._index @ vector
+                candidates = [self._index_keys[i] for i in np.argsort(-similarities)
+                              if similarities[i] >= self.similarity_threshold]
+
+            for candidate in candidates:
+                entry = self._entries.get(candidate)
+                if entry is None or self._is_expired(entry) or not same_meaning(text, entry["text"]):
+                    continue
+                self._entries.move_to_end(candidate)
+                self.hits += 1
+                self.semantic_hits += 1
+                return dict(entry["emotion_weights"]), dict(entry["occasion_weights"])
+
+            self.misses += 1
+            return None
+
+    def put(self, text, emotion_weights, occasion_weights):
+        """
+        Store the weights computed for a text.
+
+        Args:
+            text (str): User input text
+            emotion_weights (dict): Dictionary mapping emotions to weights
+            occasion_weights (dict): Dictionary mapping occasions to weights
+        """
+        key = normalize_text(text)
+        if not key:
+            return
+        vector = self.embedder(text)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {
+                "text": text,
+                "emotion_weights": dict(emotion_weights),
+                "occasion_weights": dict(occasion_weights),
+                "created": time.time(),
+            }
+            self._vectors[key] = vector
+            self._index = None
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._dirty += 1
+            due = self._dirty >= self.flush_batch or time.time() - self._last_save >= self.flush_interval
+        if due:
+            self._schedule_flush()
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = [entry for entry in self._entries.values() if not self._is_expired(entry)]
+                self._dirty = 0
+                self._last_save = time.time()
+            self._save(entries)
+
+    def get_stats(self):
+        """Return cache statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _is_expired(self, entry):
+        return entry["created"] < time.time() - self.ttl_seconds
+
+    def _remove(self, key):
+        """Drop an entry and its embedding. Caller holds the lock."""
+        if self._entries.pop(key, None) is not None:
+            self._vectors.pop(key, None)
+            self._index = None
+
+    def _build_index(self):
+        """Stack the embeddings of the current entries into a matrix if it is stale. Caller holds the lock."""
+        if self._index is not None:
+            return
+        for key, entry in self._entries.items():
+            if key not in self._vectors:
+                self._vectors[key] = self.embedder(entry["text"])
+        self._index_keys = list(self._entries.keys())
+        if self._index_keys:
+            self._index = np.vstack([self._vectors[key] for key in self._index_keys])
+        else:
+            self._index = np.zeros((0, 0), dtype=np.float32)
+
+    def _schedule_flush(self):
+        """Start a background write unless one is already running."""
+        if not self.path:
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(target=self.flush, daemon=True)
+            self._flusher.start()
+
+    def _load(self):
+        """Load persisted entries from disk."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading analysis cache: {e}")
+            return
+        if data.get("vocabulary_hash") != self.vocabulary_hash:
+            return
+
+        with self._lock:
+            for entry in data.get("entries", []):
+                if not self._is_expired(entry):
+                    self._entries[normalize_text(entry["text"])] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _save(self, entries):
+        """Write entries to disk atomically. Caller holds the save lock."""
+        data = {
+            "vocabulary_hash": self.vocabulary_hash,
+            "entries": entries,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        except OSError as e:
+            print(f"Error saving analysis cache: {e}")
+            return
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving analysis cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
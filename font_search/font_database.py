@@ -2,6 +2,12 @@
 Expanded font database with emotional and occasion tags, URLs, and image paths.
 """
 
+import sys
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+
 # Font database with emotional and occasion tags, URLs, and image paths
 FONT_DATABASE = {
     "ABeeZee": {
@@ -2007,12 +2013,113 @@ FONT_DATABASE = {
 }
 
 
-# All possible emotions and occasions for reference
-ALL_EMOTIONS = sorted(list(set([emotion for font_data in FONT_DATABASE.values() 
-                           for emotion in font_data["emotions"]])))
+class FontRecord(Mapping):
+    """
+    Compact, read-only record for a single font.
+
+    Tags are stored as interned integer IDs into ALL_EMOTIONS/ALL_OCCASIONS,
+    and the record behaves like the original font dictionary for lookups.
+    """
+
+    __slots__ = ("font_id", "name", "emotion_ids", "occasion_ids",
+                 "url", "category", "image_path", "image_filename")
+
+    _FIELDS = ("emotions", "occasions", "url", "category", "image_path", "image_filename")
+
+    def __init__(self, font_id, name, emotion_ids, occasion_ids, url, category, image_path, image_filename):
+        self.font_id = font_id
+        self.name = name
+        self.emotion_ids = emotion_ids
+        self.occasion_ids = occasion_ids
+        self.url = url
+        self.category = category
+        self.image_path = image_path
+        self.image_filename = image_filename
+
+    @property
+    def emotions(self):
+        """Return the emotion tags of this font."""
+        return [ALL_EMOTIONS[i] for i in self.emotion_ids]
 
-ALL_OCCASIONS = sorted(list(set([occasion for font_data in FONT_DATABASE.values() 
-                            for occasion in font_data["occasions"]])))
+    @property
+    def occasions(self):
+        """Return the occasion tags of this font."""
+        return [ALL_OCCASIONS[i] for i in self.occasion_ids]
+
+    def __getitem__(self, key):
+        if key in self._FIELDS and getattr(self, key) is not None:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return (field for field in self._FIELDS if getattr(self, field) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def to_dict(self):
+        """Return the font data as a plain dictionary (JSON serializable)."""
+        font_data = {
+            "emotions": self.emotions,
+            "occasions": self.occasions,
+            "url": self.url,
+            "category": self.category,
+            "image_path": self.image_path,
+            "image_filename": self.image_filename,
+        }
+        return {key: value for key, value in font_data.items() if value is not None}
+
+def _build_font_store(font_database):
+    """
+    Build the compact font store from the literal font database.
+    
+    Args:
+        font_database (dict): Mapping of font name to font data dictionary
+        
+    Returns:
+        tuple: (records, emotions, occasions, emotion_postings, occasion_postings) where
+            the postings map each tag ID to the array of font IDs carrying that tag
+    """
+    emotions = sorted({sys.intern(emotion) for font_data in font_database.values()
+                       for emotion in font_data["emotions"]})
+    occasions = sorted({sys.intern(occasion) for font_data in font_database.values()
+                        for occasion in font_data["occasions"]})
+    emotion_ids = {emotion: i for i, emotion in enumerate(emotions)}
+    occasion_ids = {occasion: i for i, occasion in enumerate(occasions)}
+
+    records = []
+    emotion_postings = [[] for _ in emotions]
+    occasion_postings = [[] for _ in occasions]
+
+    for font_id, (font_name, font_data) in enumerate(font_database.items()):
+        record = FontRecord(
+            font_id=font_id,
+            name=sys.intern(font_name),
+            emotion_ids=array("H", (emotion_ids[emotion] for emotion in font_data["emotions"])),
+            occasion_ids=array("H", (occasion_ids[occasion] for occasion in font_data["occasions"])),
+            url=font_data.get("url"),
+            category=font_data.get("category"),
+            image_path=font_data.get("image_path"),
+            image_filename=font_data.get("image_filename"),
+        )
+        records.append(record)
+
+        # Tags can repeat within a font, and each occurrence adds to the score,
+        # so postings keep one entry per occurrence
+        for tag_id in record.emotion_ids:
+            emotion_postings[tag_id].append(font_id)
+        for tag_id in record.occasion_ids:
+            occasion_postings[tag_id].append(font_id)
+
+    emotion_postings = [np.array(postings, dtype=np.intp) for postings in emotion_postings]
+    occasion_postings = [np.array(postings, dtype=np.intp) for postings in occasion_postings]
+
+    return records, emotions, occasions, emotion_postings, occasion_postings
+
+# Compact store, built once at import. FONT_DATABASE keeps its name-based
+# interface, but its values are now FontRecord objects.
+FONT_RECORDS, ALL_EMOTIONS, ALL_OCCASIONS, EMOTION_POSTINGS, OCCASION_POSTINGS = _build_font_store(FONT_DATABASE)
+FONT_DATABASE = {record.name: record for record in FONT_RECORDS}
 
 def get_all_emotions():
     """Return a list of all emotions used in the database."""
@@ -2022,10 +2129,94 @@ def get_all_occasions():
     """Return a list of all occasions used in the database."""
     return ALL_OCCASIONS
 
+def _build_tag_matrix():
+    """
+    Build the dense font x tag count matrix used for batch scoring.
+
+    Columns are laid out as all emotions followed by all occasions, so a
+    query only needs a single weight vector in the same order.
+
+    Returns:
+        numpy.ndarray: Matrix of shape (len(FONT_RECORDS), len(ALL_EMOTIONS) + len(ALL_OCCASIONS))
+    """
+    matrix = np.zeros((len(FONT_RECORDS), len(ALL_EMOTIONS) + len(ALL_OCCASIONS)), dtype=np.uint8)
+    offset = len(ALL_EMOTIONS)
+
+    for record in FONT_RECORDS:
+        for tag_id in record.emotion_ids:
+            matrix[record.font_id, tag_id] += 1
+        for tag_id in record.occasion_ids:
+            matrix[record.font_id, offset + tag_id] += 1
+
+    return matrix
+
+# Precomputed scoring structures, built once at import
+EMOTION_INDEX = {emotion: i for i, emotion in enumerate(ALL_EMOTIONS)}
+OCCASION_INDEX = {occasion: i for i, occasion in enumerate(ALL_OCCASIONS)}
+FONT_TAG_MATRIX = _build_tag_matrix()
+
+def _weights_to_vector(emotion_weights, occasion_weights):
+    """
+    Convert emotion and occasion weight dictionaries into a query vector.
+    Tags that are not in the database vocabulary are ignored.
+    
+    Args:
+        emotion_weights (dict): Dictionary mapping emotions to weights (0-1)
+        occasion_weights (dict): Dictionary mapping occasions to weights (0-1)
+        
+    Returns:
+        numpy.ndarray: Weight vector aligned with the columns of FONT_TAG_MATRIX
+    """
+    vector = np.zeros(FONT_TAG_MATRIX.shape[1], dtype=np.float64)
+    offset = len(ALL_EMOTIONS)
+
+    for emotion, weight in (emotion_weights or {}).items():
+        if emotion in EMOTION_INDEX:
+            vector[EMOTION_INDEX[emotion]] = float(weight)
+    for occasion, weight in (occasion_weights or {}).items():
+        if occasion in OCCASION_INDEX:
+            vector[offset + OCCASION_INDEX[occasion]] = float(weight)
+
+    return vector
+
+def _ordered_top(scores, font_ids, top_n):
+    """
+    Select the top N fonts from parallel score and font ID arrays.
+    Ties are broken by database order, matching a stable sort over all fonts.
+    
+    Args:
+        scores (numpy.ndarray): Candidate scores
+        font_ids (numpy.ndarray): Font ID of each candidate
+        top_n (int): Number of fonts to return
+        
+    Returns:
+        list: List of tuples (font_name, score, font_data) sorted by score in descending order
+    """
+    top_n = min(max(int(top_n), 0), len(scores))
+    if top_n == 0:
+        return []
+    if top_n < len(scores):
+        # Only the k-th best score is needed to know which fonts make the cut
+        threshold = -np.partition(-scores, top_n - 1)[top_n - 1]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)
+        tied = tied[np.argsort(font_ids[tied], kind="stable")][:top_n - len(above)]
+        candidates = np.concatenate((above, tied))
+    else:
+        candidates = np.arange(len(scores))
+
+    order = np.lexsort((font_ids[candidates], -scores[candidates]))
+    return [(FONT_RECORDS[font_ids[i]].name, float(scores[i]), FONT_RECORDS[font_ids[i]].to_dict())
+            for i in candidates[order]]
+
 def get_fonts_by_weights(emotion_weights, occasion_weights, top_n=5):
     """
     Search fonts based on emotion and occasion weights.
     
+    Only fonts that share at least one weighted tag are scored, using the
+    inverted tag index. Remaining slots are filled with zero-score fonts in
+    database order.
+    
     Args:
         emotion_weights (dict): Dictionary mapping emotions to weights (0-1)
         occasion_weights (dict): Dictionary mapping occasions to weights (0-1)
@@ -2034,25 +2225,49 @@ def get_fonts_by_weights(emotion_weights, occasion_weights, top_n=5):
     Returns:
         list: List of tuples (font_name, score, font_data) sorted by score in descending order
     """
-    font_scores = {}
+    postings = []
+    weights = []
+    for tag_weights, tag_index, tag_postings in ((emotion_weights, EMOTION_INDEX, EMOTION_POSTINGS),
+                                                 (occasion_weights, OCCASION_INDEX, OCCASION_POSTINGS)):
+        for tag, weight in (tag_weights or {}).items():
+            if tag in tag_index and float(weight) != 0:
+                postings.append(tag_postings[tag_index[tag]])
+                weights.append(float(weight))
+
+    if postings:
+        lengths = [len(font_ids) for font_ids in postings]
+        font_ids, inverse = np.unique(np.concatenate(postings), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.repeat(weights, lengths))
+    else:
+        font_ids = np.empty(0, dtype=np.intp)
+        scores = np.empty(0, dtype=np.float64)
+
+    # Fonts without any weighted tag score 0; only the first few can be needed
+    missing = max(int(top_n), 0) - len(font_ids)
+    if missing > 0:
+        fillers = np.setdiff1d(np.arange(len(FONT_RECORDS)), font_ids, assume_unique=True)[:missing]
+        font_ids = np.concatenate((font_ids, fillers))
+        scores = np.concatenate((scores, np.zeros(len(fillers))))
+
+    return _ordered_top(scores, font_ids, top_n)
+
+def get_fonts_by_weights_batch(queries, top_n=5):
+    """
+    Search fonts for many queries at once with a single matrix product.
     
-    for font_name, font_data in FONT_DATABASE.items():
-        score = 0
-        
-        # Calculate score based on emotion weights
-        for emotion in font_data["emotions"]:
-            if emotion in emotion_weights:
-                score += emotion_weights[emotion]
-                
-        # Calculate score based on occasion weights
-        for occasion in font_data["occasions"]:
-            if occasion in occasion_weights:
-                score += occasion_weights[occasion]
+    Args:
+        queries (list): List of (emotion_weights, occasion_weights) tuples
+        top_n (int): Number of top fonts to return per query
         
-        font_scores[font_name] = (score, font_data)
-    
-    # Sort fonts by score in descending order
-    sorted_fonts = sorted(font_scores.items(), key=lambda x: x[1][0], reverse=True)
-    
-    # Return top N fonts with their data
-    return [(font_name, score, font_data) for font_name, (score, font_data) in sorted_fonts[:top_n]]
+    Returns:
+        list: One result list per query, each in the format returned by get_fonts_by_weights
+    """
+    if not queries:
+        return []
+
+    query_matrix = np.vstack([_weights_to_vector(emotion_weights, occasion_weights)
+                              for emotion_weights, occasion_weights in queries])
+    all_scores = query_matrix @ FONT_TAG_MATRIX.T
+
+    font_ids = np.arange(len(FONT_RECORDS))
+    return [_ordered_top(scores, font_ids, top_n) for scores in all_scores]
@@ -0,0 +1,188 @@
+"""
+Preview image cache for the font search application.
+This module keeps base64-encoded font preview images in memory so that popular
+fonts are not re-read and re-encoded on every search.
+"""
+
+import base64
+import io
+import json
+import os
+import threading
+from collections import Counter, OrderedDict
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; thumbnails are disabled without it
+    Image = None
+
+
+class PreviewImageCache:
+    """
+    LRU cache of base64-encoded preview images, bounded by total encoded size.
+
+    Entries are keyed by image path and invalidated when the file's
+    modification time or size changes. When max_width is set, images wider
+    than it are downscaled once (requires Pillow) before being encoded.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_width=None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes (int): Maximum total size of encoded images kept in memory
+            max_width (int, optional): Width to downscale previews to, None to keep originals
+        """
+        self.max_bytes = max_bytes
+        self.max_width = max_width if Image is not None else None
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.popularity = Counter()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_path):
+        """
+        Return the base64-encoded preview for an image, loading it if needed.
+
+        Args:
+            image_path (str): Path of the preview image
+
+        Returns:
+            str: Base64-encoded PNG data, or None if the image does not exist
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            self.popularity[image_path] += 1
+            entry = self._entries.get(image_path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(image_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Encode outside the lock so slow disk reads do not block other requests
+        try:
+            img_data = self._encode(image_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            self._store(image_path, signature, img_data)
+        return img_data
+
+    def warm(self, image_paths):
+        """
+        Load a list of images into the cache ahead of the first request.
+
+        Args:
+            image_paths (list): Paths of the images to preload, most important first
+
+        Returns:
+            int: Number of images loaded
+        """
+        loaded = []
+        with self._lock:
+            budget = self.max_bytes - self._size
+        for image_path in image_paths:
+            try:
+                stat = os.stat(image_path)
+                img_data = self._encode(image_path)
+            except OSError:
+                continue
+            if len(img_data) > budget:
+                break
+            budget -= len(img_data)
+            loaded.append((image_path, (stat.st_mtime_ns, stat.st_size), img_data))
+
+        # Insert least important first so the most popular end up most recently used
+        with self._lock:
+            for image_path, signature, img_data in reversed(loaded):
+                self._store(image_path, signature, img_data)
+        return len(loaded)
+
+    def most_popular(self, n=None):
+        """Return the most requested image paths, most popular first."""
+        with self._lock:
+            return [image_path for image_path, _ in self.popularity.most_common(n)]
+
+    def load_popularity(self, stats_path):
+        """
+        Load request counts saved by a previous run.
+
+        Args:
+            stats_path (str): Path of the JSON popularity file
+        """
+        try:
+            with open(stats_path, "r") as f:
+                counts = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self.popularity.update({path: int(count) for path, count in counts.items()})
+
+    def save_popularity(self, stats_path):
+        """
+        Save request counts so the next run can warm the most returned fonts.
+
+        Args:
+            stats_path (str): Path of the JSON popularity file
+        """
+        with self._lock:
+            counts = dict(self.popularity)
+        try:
+            with open(stats_path, "w") as f:
+                json.dump(counts, f)
+        except OSError as e:
+            print(f"Error saving preview popularity: {e}")
+
+    def get_stats(self):
+        """Return cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _encode(self, image_path):
+        """Read an image from disk, downscale it if configured, and base64-encode it."""
+        with open(image_path, "rb") as img_file:
+            raw = img_file.read()
+
+        if self.max_width:
+            try:
+                with Image.open(io.BytesIO(raw)) as img:
+                    if img.width > self.max_width:
+                        height = max(1, round(img.height * self.max_width / img.width))
+                        buffer = io.BytesIO()
+                        img.resize((self.max_width, height), Image.LANCZOS).save(buffer, format="PNG", optimize=True)
+                        raw = buffer.getvalue()
+            except Exception as e:
+                print(f"Error creating thumbnail for {image_path}: {e}")
+
+        return base64.b64encode(raw).decode('utf-8')
+
+    def _store(self, image_path, signature, img_data):
+        """Insert an entry and evict least recently used ones. Caller holds the lock."""
+        previous = self._entries.pop(image_path, None)
+        if previous is not None:
+            self._size -= len(previous[1])
+
+        if len(img_data) > self.max_bytes:
+            return
+
+        self._entries[image_path] = (signature, img_data)
+        self._size += len(img_data)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
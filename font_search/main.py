@@ -3,11 +3,11 @@ Main application file for the AI Font Finder.
 This application helps users find fonts based on their described needs using AI analysis.
 """
 
+import atexit
 import json
 import os
 import gradio as gr
 from dotenv import load_dotenv
-import base64
 from fi_instrumentation.fi_types import SpanAttributes, FiSpanKindValues
 from eval_tags import eval_tags
 
@@ -29,7 +29,7 @@ load_dotenv()
 # Import components
 from font_database import get_fonts_by_weights, get_all_emotions, get_all_occasions, FONT_DATABASE
 from ai_prompt_processor import process_user_input
-
+from image_cache import PreviewImageCache
 
 from fi_instrumentation import register
 from fi_instrumentation.fi_types import ProjectType
@@ -50,6 +50,16 @@ from opentelemetry import trace
 trace.set_tracer_provider(trace_provider)
 tracer = trace.get_tracer(__name__)
 
+# Cache of base64-encoded preview images, warmed with the most returned fonts
+PREVIEW_STATS_PATH = os.path.join(os.path.dirname(__file__), 'preview_popularity.json')
+preview_cache = PreviewImageCache(
+    max_bytes=int(os.getenv("FONT_PREVIEW_CACHE_BYTES", 32 * 1024 * 1024)),
+    max_width=int(os.getenv("FONT_PREVIEW_MAX_WIDTH", 0)) or None
+)
+preview_cache.load_popularity(PREVIEW_STATS_PATH)
+preview_cache.warm(preview_cache.most_popular(int(os.getenv("FONT_PREVIEW_WARM_COUNT", 50))))
+atexit.register(preview_cache.save_popularity, PREVIEW_STATS_PATH)
+
 def search_fonts(text_input, api_key=None):
     """
     Process user input and return font suggestions with images.
@@ -146,12 +156,10 @@ def search_fonts(text_input, api_key=None):
         results_html += f"<div style='margin-bottom: 30px; padding: 20px; border-radius: 10px; background-color: {'#f0f7ff' if i % 2 == 0 else '#fff0f0'}; box-shadow: 0 2px 10px rgba(0,0,0,0.1);'>"
         results_html += f"<h4 style='margin: 0; font-size: 20px;'>{i}. {font_name} <span style='font-size: 14px; color: #666; margin-left: 10px;'>(Score: {score:.2f})</span></h4>"
         
-        # Add font image
-        if os.path.exists(image_path):
-            # Convert image to base64 for embedding
-            with open(image_path, "rb") as img_file:
-                img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                results_html += f"<div style='margin: 15px 0;'><img src='data:image/png;base64,{img_data}' alt='{font_name} sample' style='max-width: 100%; border: 1px solid #ddd; border-radius: 5px;'/></div>"
+        # Add font image (base64 preview served from the cache)
+        img_data = preview_cache.get(image_path) if image_path else None
+        if img_data:
+            results_html += f"<div style='margin: 15px 0;'><img src='data:image/png;base64,{img_data}' alt='{font_name} sample' style='max-width: 100%; border: 1px solid #ddd; border-radius: 5px;'/></div>"
         else:
             results_html += f"<div style='margin: 15px 0; padding: 20px; background-color: #f5f5f5; border-radius: 5px; text-align: center;'>Image not available for {font_name}</div>"
         
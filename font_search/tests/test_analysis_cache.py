@@ -0,0 +1,113 @@
+"""Tests for the text analysis cache."""
+
+import json
+import os
+import time
+
+from analysis_cache import AnalysisCache, normalize_text, same_meaning
+
+EMOTIONS = {"elegant": 0.9, "playful": 0.1}
+OCCASIONS = {"wedding": 1.0}
+
+
+def test_normalized_prompts_share_an_entry():
+    cache = AnalysisCache()
+    cache.put("Elegant wedding invitation!", EMOTIONS, OCCASIONS)
+
+    assert cache.get("an elegant font for a wedding invitation") == (EMOTIONS, OCCASIONS)
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_negated_or_changed_prompts_miss():
+    cache = AnalysisCache()
+    cache.put("elegant wedding invitation", EMOTIONS, OCCASIONS)
+    cache.put("romantic wedding invitation", EMOTIONS, OCCASIONS)
+
+    assert cache.get("not elegant wedding invitation") is None
+    assert cache.get("playful wedding invitation") is None
+    assert cache.get("wedding invitation elegant") is None
+    assert normalize_text("not elegant") != normalize_text("elegant")
+
+
+def test_paraphrased_prompt_hits_the_nearest_entry():
+    cache = AnalysisCache()
+    cache.put("elegant wedding invitation", EMOTIONS, OCCASIONS)
+
+    assert cache.get("Elegant wedding invitations") == (EMOTIONS, OCCASIONS)
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_near_match_with_different_negation_or_modifier_misses():
+    cache = AnalysisCache(similarity_threshold=0.5)
+    cache.put("elegant wedding invitation", EMOTIONS, OCCASIONS)
+    cache.put("not playful birthday card", EMOTIONS, OCCASIONS)
+
+    assert cache.get("very elegant wedding invitations") is None
+    assert cache.get("not elegant wedding invitations") is None
+    assert cache.get("playful birthday cards") is None
+    assert cache.get("not playful birthday cards") == (EMOTIONS, OCCASIONS)
+    assert not same_meaning("slightly elegant wedding", "elegant slightly wedding")
+
+
+def test_returned_weights_are_copies():
+    cache = AnalysisCache()
+    cache.put("elegant wedding", EMOTIONS, OCCASIONS)
+
+    emotion_weights, _ = cache.get("elegant wedding")
+    emotion_weights["elegant"] = 0.0
+
+    assert cache.get("elegant wedding")[0]["elegant"] == 0.9
+
+
+def test_expired_entries_miss():
+    cache = AnalysisCache(ttl_seconds=60)
+    cache.put("elegant wedding", EMOTIONS, OCCASIONS)
+    cache._entries["elegant wedding"]["created"] = time.time() - 120
+
+    assert cache.get("elegant wedding") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(max_entries=2)
+    cache.put("elegant", EMOTIONS, OCCASIONS)
+    cache.put("playful", EMOTIONS, OCCASIONS)
+    cache.get("elegant")
+    cache.put("romantic", EMOTIONS, OCCASIONS)
+
+    assert cache.get("playful") is None
+    assert cache.get("elegant") is not None
+    assert cache.get("romantic") is not None
+
+
+def test_put_does_not_write_until_flushed(tmp_path):
+    path = str(tmp_path / "analysis_cache.json")
+    cache = AnalysisCache(path=path, flush_batch=100, flush_interval=3600)
+    cache.put("elegant wedding", EMOTIONS, OCCASIONS)
+
+    assert not os.path.exists(path)
+
+    cache.flush()
+    reloaded = AnalysisCache(path=path)
+    assert reloaded.get("elegant wedding") == (EMOTIONS, OCCASIONS)
+    assert os.listdir(tmp_path) == ["analysis_cache.json"]
+
+
+def test_batch_of_puts_is_written_in_the_background(tmp_path):
+    path = str(tmp_path / "analysis_cache.json")
+    cache = AnalysisCache(path=path, flush_batch=3, flush_interval=3600)
+    for text in ("elegant", "playful", "romantic"):
+        cache.put(text, EMOTIONS, OCCASIONS)
+    cache._flusher.join(timeout=5)
+
+    with open(path) as f:
+        assert len(json.load(f)["entries"]) == 3
+
+
+def test_cache_file_for_another_vocabulary_is_ignored(tmp_path):
+    path = str(tmp_path / "analysis_cache.json")
+    cache = AnalysisCache(path=path, vocabulary=["elegant"])
+    cache.put("elegant wedding", EMOTIONS, OCCASIONS)
+    cache.flush()
+
+    assert AnalysisCache(path=path, vocabulary=["playful"]).get("elegant wedding") is None
@@ -0,0 +1,660 @@
+"""
+Benchmark Harness for Text-to-SQL Agent
+
+Seeds a SQLite database with SyntheticDataGenerator, replaces the OpenAI,
+ChromaDB and evaluation clients with deterministic local stand-ins that
+sleep for a configurable latency, and replays a question corpus through
+Text2SQLAgentSQLite at a given concurrency. Per-stage latency percentiles
+are written to JSON so that runs can be compared across changes.
+
+Usage:
+    python src/benchmark.py --concurrency 8 --repeat 3 --output benchmark_results.json
+    python src/benchmark.py --baseline benchmark_results.json --max-regression 0.2
+"""
+
+import os
+import sys
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import platform
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from data.synthetic_data_generator import SyntheticDataGenerator
+from models import response_generator, sql_generator, text2sql_agent_sqlite, vector_store
+from models.text2sql_agent_sqlite import Text2SQLAgentSQLite, AgentConfig
+
+
+# Questions replayed by default, taken from the sample questions in the README
+DEFAULT_QUESTIONS = [
+    "What is the current price for UPC code '0020282000000'?",
+    "Show me the top 10 items by elasticity in the frozen food category",
+    "Which items have a CPI value higher than 1.05?",
+    "What are the pricing strategies for BREAD & WRAPS in Banner 2?",
+    "Show me the top 10 selling items within frozen food",
+    "What are the top 10 items by forecast sales within the bakery category?",
+    "Show me revenue by level 2 for the last 6 months",
+    "Show me the bottom 10 lowest margin items",
+    "Show me all items with negative margin",
+    "List articles where Walmart prices are higher than our prices",
+    "What is the competitive price index for each subcategory under grocery?",
+    "How many products are in each category?",
+]
+
+# SQL returned by the stub model, chosen by the first rule whose keywords all
+# appear in the question. Every query runs against the synthetic schema.
+SQL_RULES = [
+    (("upc",), """
+        SELECT p.upc_code, p.product_name, pr.store_id, pr.current_price, pr.suggested_price
+        FROM products p JOIN pricing pr ON p.upc_code = pr.upc_code
+        WHERE p.upc_code = '0020282000000'
+        ORDER BY pr.price_date DESC LIMIT 10
+    """),
+    (("elasticity",), """
+        SELECT p.upc_code, p.product_name, e.elasticity_value, e.elasticity_category
+        FROM elasticity e JOIN products p ON e.upc_code = p.upc_code
+        WHERE p.category_level_2 = 'FROZEN FOOD'
+        ORDER BY e.elasticity_value DESC LIMIT 10
+    """),
+    (("strateg",), """
+        SELECT pr.pricing_strategy, COUNT(*) AS items, AVG(pr.current_price) AS avg_price
+        FROM pricing pr
+        JOIN products p ON pr.upc_code = p.upc_code
+        JOIN stores s ON pr.store_id = s.store_id
+        WHERE p.category_level_2 = 'BREAD & WRAPS' AND s.banner = 'Banner 2'
+        GROUP BY pr.pricing_strategy ORDER BY items DESC
+    """),
+    (("forecast",), """
+        SELECT p.upc_code, p.product_name, SUM(sd.forecast_revenue) AS forecast_revenue
+        FROM sales_data sd JOIN products p ON sd.upc_code = p.upc_code
+        WHERE p.category_level_1 = 'BAKERY'
+        GROUP BY p.upc_code, p.product_name ORDER BY forecast_revenue DESC LIMIT 10
+    """),
+    (("selling",), """
+        SELECT p.upc_code, p.product_name, SUM(sd.units_sold) AS units_sold
+        FROM sales_data sd JOIN products p ON sd.upc_code = p.upc_code
+        WHERE p.category_level_2 = 'FROZEN FOOD'
+        GROUP BY p.upc_code, p.product_name ORDER BY units_sold DESC LIMIT 10
+    """),
+    (("revenue",), """
+        SELECT p.category_level_2, strftime('%Y-%m', sd.week_ending_date) AS month,
+               SUM(sd.revenue) AS revenue
+        FROM sales_data sd JOIN products p ON sd.upc_code = p.upc_code
+        GROUP BY p.category_level_2, month ORDER BY month, revenue DESC
+    """),
+    (("negative", "margin"), """
+        SELECT upc_code, store_id, analysis_date, margin_amount, margin_percent
+        FROM margin_analysis WHERE margin_amount < 0
+        ORDER BY margin_amount LIMIT 100
+    """),
+    (("margin",), """
+        SELECT p.upc_code, p.product_name, AVG(m.margin_percent) AS margin_percent
+        FROM margin_analysis m JOIN products p ON m.upc_code = p.upc_code
+        GROUP BY p.upc_code, p.product_name ORDER BY margin_percent ASC LIMIT 10
+    """),
+    (("walmart",), """
+        SELECT upc_code, competitor_price, our_price, price_gap
+        FROM competitive_pricing
+        WHERE competitor_name = 'Walmart' AND competitor_price > our_price
+        ORDER BY price_gap DESC LIMIT 100
+    """),
+    (("cpi",), """
+        SELECT upc_code, competitor_name, cpi_value, observation_date
+        FROM competitive_pricing WHERE cpi_value > 1.05
+        ORDER BY cpi_value DESC LIMIT 100
+    """),
+    (("competitive", "index"), """
+        SELECT p.category_level_3, AVG(c.cpi_value) AS avg_cpi
+        FROM competitive_pricing c JOIN products p ON c.upc_code = p.upc_code
+        WHERE p.category_level_1 = 'GROCERY'
+        GROUP BY p.category_level_3 ORDER BY avg_cpi DESC
+    """),
+]
+
+FALLBACK_SQL = """
+    SELECT category_level_1, category_level_2, COUNT(*) AS products
+    FROM products GROUP BY category_level_1, category_level_2 ORDER BY products DESC
+"""
+
+# Stages timed for every question, in pipeline order
+STAGES = ["processing", "retrieval", "schema", "generation", "execution", "response", "total"]
+
+_TOKEN = re.compile(r"[a-z0-9_]+")
+
+
+@dataclass
+class StubLatency:
+    """Seconds each stubbed remote call sleeps before returning"""
+    llm: float = 0.25
+    embedding: float = 0.03
+    vector_query: float = 0.01
+    evaluation: float = 0.0
+
+
+@dataclass
+class BenchmarkConfig:
+    """Configuration for one benchmark run"""
+    database_path: str = "benchmark.db"
+    scale_factor: float = 0.1
+    reseed: bool = False
+    questions: List[str] = field(default_factory=lambda: list(DEFAULT_QUESTIONS))
+    concurrency: int = 4
+    repeat: int = 3
+    warmup: int = 0
+    mode: str = "sync"
+    enable_cache: bool = True
+    latency: StubLatency = field(default_factory=StubLatency)
+
+
+def hash_embedding(text: str, dimensions: int = 256) -> List[float]:
+    """
+    Embed text as a unit-length hashed bag of words
+
+    Texts sharing words get similar vectors, which is enough for the
+    stand-in vector store to return stable, relevant-looking results.
+    """
+    vector = np.zeros(dimensions)
+    for token in _TOKEN.findall(text.lower()):
+        digest = hashlib.md5(token.encode()).digest()
+        index = int.from_bytes(digest[:4], 'little') % dimensions
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = norm = 1.0
+    return (vector / norm).tolist()
+
+
+class StubOpenAI:
+    """
+    Local stand-in for the OpenAI client
+
+    Supports chat.completions.create and embeddings.create. SQL generation
+    requests (JSON response format) get SQL from SQL_RULES; other chat
+    requests get a fixed text answer. Prompt caching is simulated: a prompt
+    whose text before the question was seen before reports it as cached.
+    """
+
+    def __init__(self, latency: StubLatency):
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+        self.embeddings = SimpleNamespace(create=self._create_embeddings)
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+
+    def _create_completion(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        """Return a deterministic chat completion"""
+        time.sleep(self.latency.llm)
+
+        prompt = "\n".join(message["content"] for message in messages)
+        prefix, _, question = prompt.rpartition("QUESTION:")
+        if kwargs.get("response_format", {}).get("type") == "json_object":
+            sql_query = self.sql_for(question or prompt)
+            content = json.dumps({
+                "sql_query": sql_query,
+                "explanation": "Generated by the benchmark stand-in model",
+                "confidence": 0.9,
+                "tables_used": [],
+                "columns_used": []
+            })
+        else:
+            content = "Here is a summary of the results for your question."
+
+        with self._lock:
+            cached = prefix in self._seen_prefixes
+            self._seen_prefixes.add(prefix)
+        prompt_tokens = len(prompt) // 4
+        cached_tokens = len(prefix) // 4 if cached else 0
+
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens)
+            )
+        )
+
+    def _create_embeddings(self, model: str, input):
+        """Return hashed bag-of-words embeddings"""
+        time.sleep(self.latency.embedding)
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(data=[SimpleNamespace(embedding=hash_embedding(text)) for text in texts])
+
+    @staticmethod
+    def sql_for(question: str) -> str:
+        """Pick the SQL for a question from SQL_RULES"""
+        question = question.lower()
+        for keywords, sql_query in SQL_RULES:
+            if all(keyword in question for keyword in keywords):
+                return " ".join(sql_query.split())
+        return " ".join(FALLBACK_SQL.split())
+
+
+class StubCollection:
+    """In-memory stand-in for a ChromaDB collection, searched by brute force"""
+
+    def __init__(self, name: str, latency: StubLatency):
+        self.name = name
+        self.metadata = {'hnsw:space': 'l2'}
+        self.latency = latency
+        self._ids: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._embeddings = np.empty((0, 0))
+        self._lock = threading.Lock()
+
+    def add(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str], embeddings=None):
+        """Add documents, embedding them the same way StubOpenAI does"""
+        vectors = np.array(embeddings or [hash_embedding(document) for document in documents])
+        with self._lock:
+            self._ids.extend(ids)
+            self._metadatas.extend(metadatas)
+            self._embeddings = vectors if len(self._embeddings) == 0 else np.vstack([self._embeddings, vectors])
+
+    def count(self) -> int:
+        """Number of stored documents"""
+        return len(self._ids)
+
+    def query(self, query_embeddings=None, query_texts=None, n_results: int = 10, include=None):
+        """Return the nearest documents by squared L2 distance"""
+        time.sleep(self.latency.vector_query)
+        query = np.array(query_embeddings[0] if query_embeddings else hash_embedding(query_texts[0]))
+
+        with self._lock:
+            if len(self._ids) == 0:
+                return {'ids': [[]], 'metadatas': [[]], 'distances': [[]]}
+            distances = np.sum((self._embeddings - query) ** 2, axis=1)
+            order = np.argsort(distances, kind='stable')[:n_results]
+            return {
+                'ids': [[self._ids[i] for i in order]],
+                'metadatas': [[self._metadatas[i] for i in order]],
+                'distances': [[float(distances[i]) for i in order]]
+            }
+
+
+class StubChromaClient:
+    """In-memory stand-in for chromadb.PersistentClient"""
+
+    def __init__(self, latency: StubLatency):
+        self.latency = latency
+        self.collections: Dict[str, StubCollection] = {}
+
+    def get_collection(self, name: str) -> StubCollection:
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def create_collection(self, name: str, embedding_function=None, metadata=None) -> StubCollection:
+        self.collections[name] = StubCollection(name, self.latency)
+        return self.collections[name]
+
+
+class StubEvaluator:
+    """Stand-in for fi.evals.Evaluator that only waits"""
+
+    def __init__(self, latency: StubLatency):
+        self.latency = latency
+
+    def evaluate(self, **kwargs):
+        time.sleep(self.latency.evaluation)
+        return None
+
+
+class StageRecorder:
+    """
+    Times pipeline stages for the question currently being processed
+
+    The sample being filled is held in a context variable, so stages run via
+    asyncio.to_thread are attributed to the right question.
+    """
+
+    def __init__(self):
+        self.samples: List[Dict[str, Any]] = []
+        self._current = contextvars.ContextVar("benchmark_sample", default=None)
+        self._lock = threading.Lock()
+
+    def start(self, question: str) -> Dict[str, Any]:
+        """Begin a new sample for a question"""
+        sample = {'question': question, 'stages': {}}
+        self._current.set(sample)
+        return sample
+
+    def finish(self, sample: Dict[str, Any]):
+        """Store a completed sample"""
+        with self._lock:
+            self.samples.append(sample)
+
+    def _add(self, stage: str, elapsed: float):
+        sample = self._current.get()
+        if sample is not None:
+            sample['stages'][stage] = sample['stages'].get(stage, 0.0) + elapsed
+
+    def wrap(self, stage: str, func: Callable) -> Callable:
+        """Wrap a function so its run time is added to the current sample"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._add(stage, time.perf_counter() - start)
+        return timed
+
+    def wrap_async(self, stage: str, func: Callable) -> Callable:
+        """Wrap a coroutine function so its run time is added to the current sample"""
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._add(stage, time.perf_counter() - start)
+        return timed
+
+
+def seed_database(database_path: str, scale_factor: float, reseed: bool = False):
+    """Generate the synthetic database unless a seeded one already exists"""
+    if os.path.exists(database_path):
+        if not reseed:
+            return
+        os.remove(database_path)
+
+    generator = SyntheticDataGenerator(database_path, scale_factor=scale_factor)
+    generator.generate_all_data()
+    generator.add_specific_test_data()
+
+
+def build_agent(config: BenchmarkConfig, work_dir: str) -> Text2SQLAgentSQLite:
+    """Create the agent with the OpenAI and ChromaDB clients replaced by stand-ins"""
+    stub_openai = lambda *args, **kwargs: StubOpenAI(config.latency)
+    stub_chromadb = SimpleNamespace(PersistentClient=lambda *args, **kwargs: StubChromaClient(config.latency))
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(sql_generator, 'OpenAI', stub_openai))
+        stack.enter_context(mock.patch.object(response_generator, 'OpenAI', stub_openai))
+        stack.enter_context(mock.patch.object(vector_store, 'OpenAI', stub_openai))
+        stack.enter_context(mock.patch.object(vector_store, 'chromadb', stub_chromadb))
+        stack.enter_context(mock.patch.object(
+            vector_store, 'embedding_functions', SimpleNamespace(OpenAIEmbeddingFunction=lambda **kwargs: None)))
+
+        agent = Text2SQLAgentSQLite(AgentConfig(
+            openai_api_key="benchmark",
+            database_path=config.database_path,
+            vector_store_path=os.path.join(work_dir, "chroma_db"),
+            enable_cache=config.enable_cache,
+            log_level="WARNING"
+        ))
+
+    # Start from a cold embedding cache that does not touch the working directory
+    embedding_manager = agent.vector_store.embedding_manager
+    embedding_manager.embedding_cache.clear()
+    embedding_manager.cache_file = os.path.join(work_dir, "embedding_cache.pkl")
+
+    if not config.enable_cache:
+        agent.sql_generator.cache = None
+    return agent
+
+
+def instrument(agent: Text2SQLAgentSQLite, recorder: StageRecorder):
+    """Time each pipeline stage by wrapping the agent's components"""
+    agent.question_processor.process_question = recorder.wrap(
+        "processing", agent.question_processor.process_question)
+    agent._retrieve_context = recorder.wrap("retrieval", agent._retrieve_context)
+    agent.sqlite_client.get_schema_snapshot = recorder.wrap(
+        "schema", agent.sqlite_client.get_schema_snapshot)
+    agent.sql_generator.generate_sql = recorder.wrap("generation", agent.sql_generator.generate_sql)
+    agent._execute_sql = recorder.wrap("execution", agent._execute_sql)
+    agent.response_generator.generate_response = recorder.wrap(
+        "response", agent.response_generator.generate_response)
+    agent.response_generator.generate_response_async = recorder.wrap_async(
+        "response", agent.response_generator.generate_response_async)
+
+
+def replay(agent: Text2SQLAgentSQLite, questions: List[str], config: BenchmarkConfig,
+           recorder: Optional[StageRecorder]) -> float:
+    """
+    Run questions through the agent at the configured concurrency
+
+    Args:
+        agent: Instrumented agent
+        questions: Questions to process, in submission order
+        config: Benchmark configuration (mode and concurrency)
+        recorder: Recorder to store samples in, None to discard them (warmup)
+
+    Returns:
+        Wall-clock seconds taken
+    """
+    recorder = recorder or StageRecorder()
+
+    def finish(sample: Dict[str, Any], response, start: float):
+        sample['stages']['total'] = time.perf_counter() - start
+        sample['success'] = response.success
+        sample['row_count'] = response.row_count
+        sample['error'] = response.error_message
+        recorder.finish(sample)
+
+    def run_sync(question: str):
+        sample = recorder.start(question)
+        start = time.perf_counter()
+        finish(sample, agent.process_question(question), start)
+
+    async def run_async_all():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=max(8, config.concurrency * 4)))
+        semaphore = asyncio.Semaphore(config.concurrency)
+
+        async def run_one(question: str):
+            async with semaphore:
+                sample = recorder.start(question)
+                start = time.perf_counter()
+                finish(sample, await agent.process_question_async(question), start)
+
+        # Each task runs in its own copy of the context, so samples do not mix
+        await asyncio.gather(*(run_one(question) for question in questions))
+
+    wall_start = time.perf_counter()
+    if config.mode == "async":
+        asyncio.run(run_async_all())
+    else:
+        with ThreadPoolExecutor(max_workers=config.concurrency) as executor:
+            list(executor.map(lambda question: contextvars.copy_context().run(run_sync, question), questions))
+    return time.perf_counter() - wall_start
+
+
+def summarize(samples: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Latency percentiles in milliseconds for each stage"""
+    summary = {}
+    for stage in STAGES:
+        values = np.array([sample['stages'][stage] for sample in samples if stage in sample['stages']]) * 1000
+        if len(values) == 0:
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary[stage] = {
+            'count': int(len(values)),
+            'mean_ms': round(float(values.mean()), 3),
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(float(values.max()), 3)
+        }
+    return summary
+
+
+def run_benchmark(config: BenchmarkConfig) -> Dict[str, Any]:
+    """
+    Seed the database, replay the corpus and collect results
+
+    Args:
+        config: Benchmark configuration
+
+    Returns:
+        JSON-serializable benchmark report
+    """
+    seed_start = time.perf_counter()
+    seed_database(config.database_path, config.scale_factor, config.reseed)
+    seed_time = time.perf_counter() - seed_start
+
+    stub_evaluator = StubEvaluator(config.latency)
+    recorder = StageRecorder()
+
+    with tempfile.TemporaryDirectory(prefix="text2sql-benchmark-") as work_dir, contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(sql_generator, 'evaluator', stub_evaluator))
+        stack.enter_context(mock.patch.object(text2sql_agent_sqlite, 'evaluator', stub_evaluator))
+        # The agent and the SQL generator print evaluation inputs (including the
+        # full schema JSON); silence those modules only, so the rest of the
+        # process keeps its stdout
+        for module in (text2sql_agent_sqlite, sql_generator):
+            stack.enter_context(mock.patch.object(module, 'print', lambda *args, **kwargs: None, create=True))
+
+        agent = build_agent(config, work_dir)
+        try:
+            instrument(agent, recorder)
+            for _ in range(config.warmup):
+                replay(agent, config.questions, config, None)
+
+            wall_time = replay(agent, config.questions * config.repeat, config, recorder)
+            agent_stats = agent.get_stats()
+        finally:
+            # Write pending embeddings while the work directory still exists
+            agent.vector_store.embedding_manager.flush()
+            agent.response_generator.data_visualizer.close()
+            agent.context_retriever.executor.shutdown(wait=False)
+
+    samples = recorder.samples
+    successful = sum(1 for sample in samples if sample['success'])
+    errors = sorted({sample['error'] for sample in samples if sample['error']})
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': asdict(config),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count()
+        },
+        'summary': {
+            'requests': len(samples),
+            'successful': successful,
+            'failed': len(samples) - successful,
+            'errors': errors,
+            'seed_time_s': round(seed_time, 3),
+            'wall_time_s': round(wall_time, 3),
+            'throughput_qps': round(len(samples) / wall_time, 3) if wall_time > 0 else 0.0
+        },
+        'stages': summarize(samples),
+        'agent_stats': agent_stats
+    }
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any],
+                        max_regression: float) -> List[str]:
+    """
+    Find stages whose p95 latency grew by more than max_regression
+
+    Args:
+        results: Report from this run
+        baseline: Report from an earlier run
+        max_regression: Allowed relative increase, e.g. 0.2 for 20%
+
+    Returns:
+        Descriptions of the regressed stages
+    """
+    regressions = []
+    for stage, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if not previous or previous['p95_ms'] <= 0:
+            continue
+        change = current['p95_ms'] / previous['p95_ms'] - 1
+        if change > max_regression:
+            regressions.append(
+                f"{stage}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms (+{change:.0%})")
+    return regressions
+
+
+def load_questions(path: str) -> List[str]:
+    """Load questions from a JSON list or a text file with one question per line"""
+    with open(path) as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return [line.strip() for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the text-to-SQL agent with local model stand-ins")
+    parser.add_argument("--database", default="benchmark.db", help="SQLite database to seed and query")
+    parser.add_argument("--scale-factor", type=float, default=0.1, help="Synthetic data volume multiplier")
+    parser.add_argument("--reseed", action="store_true", help="Regenerate the database even if it exists")
+    parser.add_argument("--questions", help="JSON list or text file of questions (defaults to the README samples)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions processed at once")
+    parser.add_argument("--repeat", type=int, default=3, help="Times the corpus is replayed")
+    parser.add_argument("--warmup", type=int, default=0, help="Unrecorded passes over the corpus before measuring")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync",
+                        help="Use process_question on a thread pool or process_question_async on an event loop")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the query result and generated SQL caches")
+    parser.add_argument("--llm-latency", type=float, default=0.25, help="Seconds per chat completion")
+    parser.add_argument("--embedding-latency", type=float, default=0.03, help="Seconds per embedding request")
+    parser.add_argument("--vector-latency", type=float, default=0.01, help="Seconds per vector store query")
+    parser.add_argument("--eval-latency", type=float, default=0.0, help="Seconds per background evaluation")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare p95 latencies against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed relative p95 increase over the baseline before failing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    benchmark_config = BenchmarkConfig(
+        database_path=args.database,
+        scale_factor=args.scale_factor,
+        reseed=args.reseed,
+        questions=load_questions(args.questions) if args.questions else list(DEFAULT_QUESTIONS),
+        concurrency=args.concurrency,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        mode=args.mode,
+        enable_cache=not args.no_cache,
+        latency=StubLatency(
+            llm=args.llm_latency,
+            embedding=args.embedding_latency,
+            vector_query=args.vector_latency,
+            evaluation=args.eval_latency
+        )
+    )
+
+    results = run_benchmark(benchmark_config)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+    summary = results['summary']
+    print(f"{summary['successful']}/{summary['requests']} questions succeeded in {summary['wall_time_s']:.2f}s "
+          f"({summary['throughput_qps']:.2f} questions/s)")
+    print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in results['stages'].items():
+        print(f"{stage:<12}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.max_regression)
+        if regressions:
+            print("Regressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against baseline")
@@ -7,10 +7,11 @@ purposes, including products, pricing, elasticity, competitive data, and sales m
 
 import os
 import sqlite3
-import random
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from itertools import repeat
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 import pandas as pd
 import numpy as np
 from dataclasses import dataclass
@@ -32,28 +33,190 @@ class ProductData:
     base_price: float
 
 
+@dataclass
+class ProductColumns:
+    """Product attributes used by the fact table generators, one array element per product"""
+    upc_code: np.ndarray
+    category_level_2: np.ndarray
+    cost: np.ndarray
+    base_price: np.ndarray
+
+
+@dataclass
+class StoreColumns:
+    """Store attributes used by the fact table generators, one array element per store"""
+    store_id: np.ndarray
+    zone: np.ndarray
+
+
+# Database tables
+SCHEMA_SQL = """
+-- Products table
+CREATE TABLE IF NOT EXISTS products (
+    upc_code TEXT PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    brand TEXT,
+    category_level_1 TEXT,
+    category_level_2 TEXT,
+    category_level_3 TEXT,
+    package_size TEXT,
+    unit_of_measure TEXT,
+    cost REAL,
+    base_price REAL,
+    price_family TEXT,
+    created_date DATE DEFAULT CURRENT_DATE
+);
+
+-- Stores table
+CREATE TABLE IF NOT EXISTS stores (
+    store_id TEXT PRIMARY KEY,
+    store_name TEXT NOT NULL,
+    zone TEXT,
+    banner TEXT,
+    region TEXT,
+    store_type TEXT,
+    opened_date DATE
+);
+
+-- Pricing table
+CREATE TABLE IF NOT EXISTS pricing (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc_code TEXT,
+    store_id TEXT,
+    price_date DATE,
+    current_price REAL,
+    suggested_price REAL,
+    price_family TEXT,
+    pricing_strategy TEXT,
+    price_change_reason TEXT,
+    units_impact REAL,
+    revenue_impact REAL,
+    FOREIGN KEY (upc_code) REFERENCES products(upc_code),
+    FOREIGN KEY (store_id) REFERENCES stores(store_id)
+);
+
+-- Elasticity table
+CREATE TABLE IF NOT EXISTS elasticity (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc_code TEXT,
+    category_level_2 TEXT,
+    elasticity_value REAL,
+    elasticity_category TEXT,
+    confidence_level REAL,
+    last_updated DATE,
+    FOREIGN KEY (upc_code) REFERENCES products(upc_code)
+);
+
+-- Competitive pricing table
+CREATE TABLE IF NOT EXISTS competitive_pricing (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc_code TEXT,
+    competitor_name TEXT,
+    competitor_price REAL,
+    our_price REAL,
+    cpi_value REAL,
+    price_gap REAL,
+    price_gap_percent REAL,
+    observation_date DATE,
+    FOREIGN KEY (upc_code) REFERENCES products(upc_code)
+);
+
+-- Sales data table
+CREATE TABLE IF NOT EXISTS sales_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc_code TEXT,
+    store_id TEXT,
+    week_ending_date DATE,
+    units_sold INTEGER,
+    revenue REAL,
+    forecast_units INTEGER,
+    forecast_revenue REAL,
+    FOREIGN KEY (upc_code) REFERENCES products(upc_code),
+    FOREIGN KEY (store_id) REFERENCES stores(store_id)
+);
+
+-- Margin analysis table
+CREATE TABLE IF NOT EXISTS margin_analysis (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc_code TEXT,
+    store_id TEXT,
+    analysis_date DATE,
+    cost REAL,
+    selling_price REAL,
+    margin_amount REAL,
+    margin_percent REAL,
+    margin_category TEXT,
+    FOREIGN KEY (upc_code) REFERENCES products(upc_code),
+    FOREIGN KEY (store_id) REFERENCES stores(store_id)
+);
+
+-- Price changes log
+CREATE TABLE IF NOT EXISTS price_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    upc_code TEXT,
+    store_id TEXT,
+    change_date DATE,
+    old_price REAL,
+    new_price REAL,
+    change_amount REAL,
+    change_percent REAL,
+    change_type TEXT,
+    reason TEXT,
+    FOREIGN KEY (upc_code) REFERENCES products(upc_code),
+    FOREIGN KEY (store_id) REFERENCES stores(store_id)
+);
+"""
+
+# Indexes for better query performance, created after bulk loads
+INDEXES = [
+    ("idx_pricing_upc_date", "CREATE INDEX IF NOT EXISTS idx_pricing_upc_date ON pricing(upc_code, price_date)"),
+    ("idx_sales_upc_week", "CREATE INDEX IF NOT EXISTS idx_sales_upc_week ON sales_data(upc_code, week_ending_date)"),
+    ("idx_competitive_upc_date", "CREATE INDEX IF NOT EXISTS idx_competitive_upc_date ON competitive_pricing(upc_code, observation_date)"),
+    ("idx_products_category", "CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_level_1, category_level_2)"),
+    ("idx_elasticity_category", "CREATE INDEX IF NOT EXISTS idx_elasticity_category ON elasticity(category_level_2)"),
+]
+
+# Connection settings for bulk loading: the rollback journal stays in memory
+# and fsyncs are skipped, so a crash mid-load leaves a database to regenerate
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+)
+
+
 class SyntheticDataGenerator:
     """Generate synthetic retail data for the system"""
     
-    def __init__(self, database_path: str = "retail_analytics.db"):
+    def __init__(self, database_path: str = "retail_analytics.db", scale_factor: float = 1.0):
         """
         Initialize the synthetic data generator
         
         Args:
             database_path: Path to SQLite database file
+            scale_factor: Multiplier for the number of products and of products
+                sampled per period; row counts grow linearly with it
+                (1.0 generates about 1.6M rows)
         """
         self.database_path = database_path
+        self.scale_factor = scale_factor
         self.logger = logging.getLogger(__name__)
         
         # Data configuration
-        self.num_products = 1000
+        self.num_products = max(1, int(round(1000 * scale_factor)))
         self.num_stores = 50
         self.num_competitors = 5
         self.weeks_of_data = 52  # 1 year of data
         
-        # Random seed for reproducible data
-        random.seed(42)
-        np.random.seed(42)
+        # Products sampled per period for each fact table
+        self.pricing_products_per_week = max(1, int(round(800 * scale_factor)))
+        self.sales_products_per_week = max(1, int(round(600 * scale_factor)))
+        self.margin_products_per_week = max(1, int(round(400 * scale_factor)))
+        self.competitive_products = max(1, int(round(500 * scale_factor)))
+        
+        # Random generator seeded for reproducible data
+        self.rng = np.random.default_rng(42)
         
         # Initialize data templates
         self._initialize_data_templates()
@@ -117,666 +280,412 @@ class SyntheticDataGenerator:
         """Generate all synthetic data and populate the database"""
         self.logger.info("Starting synthetic data generation...")
         
-        # Create database and tables
-        self._create_database_schema()
+        # Create tables; indexes are built once the data is loaded
+        self._create_database_schema(create_indexes=False)
         
-        # Generate core data
-        products = self._generate_products()
-        stores = self._generate_stores()
+        with self._bulk_load() as conn:
+            # Generate core data
+            products = self._generate_products(conn)
+            stores = self._generate_stores(conn)
+            
+            # Generate transactional data
+            self._generate_pricing_data(conn, products, stores)
+            self._generate_elasticity_data(conn, products)
+            self._generate_competitive_data(conn, products)
+            self._generate_sales_data(conn, products, stores)
+            self._generate_margin_data(conn, products, stores)
         
-        # Generate transactional data
-        self._generate_pricing_data(products, stores)
-        self._generate_elasticity_data(products)
-        self._generate_competitive_data(products)
-        self._generate_sales_data(products, stores)
-        self._generate_margin_data(products, stores)
+        self._create_indexes()
         
         self.logger.info("Synthetic data generation completed successfully")
     
-    def _create_database_schema(self):
+    def _create_database_schema(self, create_indexes: bool = True):
         """Create database tables with proper schema"""
-        
-        schema_sql = """
-        -- Products table
-        CREATE TABLE IF NOT EXISTS products (
-            upc_code TEXT PRIMARY KEY,
-            product_name TEXT NOT NULL,
-            brand TEXT,
-            category_level_1 TEXT,
-            category_level_2 TEXT,
-            category_level_3 TEXT,
-            package_size TEXT,
-            unit_of_measure TEXT,
-            cost REAL,
-            base_price REAL,
-            price_family TEXT,
-            created_date DATE DEFAULT CURRENT_DATE
-        );
-        
-        -- Stores table
-        CREATE TABLE IF NOT EXISTS stores (
-            store_id TEXT PRIMARY KEY,
-            store_name TEXT NOT NULL,
-            zone TEXT,
-            banner TEXT,
-            region TEXT,
-            store_type TEXT,
-            opened_date DATE
-        );
-        
-        -- Pricing table
-        CREATE TABLE IF NOT EXISTS pricing (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            upc_code TEXT,
-            store_id TEXT,
-            price_date DATE,
-            current_price REAL,
-            suggested_price REAL,
-            price_family TEXT,
-            pricing_strategy TEXT,
-            price_change_reason TEXT,
-            units_impact REAL,
-            revenue_impact REAL,
-            FOREIGN KEY (upc_code) REFERENCES products(upc_code),
-            FOREIGN KEY (store_id) REFERENCES stores(store_id)
-        );
-        
-        -- Elasticity table
-        CREATE TABLE IF NOT EXISTS elasticity (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            upc_code TEXT,
-            category_level_2 TEXT,
-            elasticity_value REAL,
-            elasticity_category TEXT,
-            confidence_level REAL,
-            last_updated DATE,
-            FOREIGN KEY (upc_code) REFERENCES products(upc_code)
-        );
-        
-        -- Competitive pricing table
-        CREATE TABLE IF NOT EXISTS competitive_pricing (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            upc_code TEXT,
-            competitor_name TEXT,
-            competitor_price REAL,
-            our_price REAL,
-            cpi_value REAL,
-            price_gap REAL,
-            price_gap_percent REAL,
-            observation_date DATE,
-            FOREIGN KEY (upc_code) REFERENCES products(upc_code)
-        );
-        
-        -- Sales data table
-        CREATE TABLE IF NOT EXISTS sales_data (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            upc_code TEXT,
-            store_id TEXT,
-            week_ending_date DATE,
-            units_sold INTEGER,
-            revenue REAL,
-            forecast_units INTEGER,
-            forecast_revenue REAL,
-            FOREIGN KEY (upc_code) REFERENCES products(upc_code),
-            FOREIGN KEY (store_id) REFERENCES stores(store_id)
-        );
-        
-        -- Margin analysis table
-        CREATE TABLE IF NOT EXISTS margin_analysis (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            upc_code TEXT,
-            store_id TEXT,
-            analysis_date DATE,
-            cost REAL,
-            selling_price REAL,
-            margin_amount REAL,
-            margin_percent REAL,
-            margin_category TEXT,
-            FOREIGN KEY (upc_code) REFERENCES products(upc_code),
-            FOREIGN KEY (store_id) REFERENCES stores(store_id)
-        );
-        
-        -- Price changes log
-        CREATE TABLE IF NOT EXISTS price_changes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            upc_code TEXT,
-            store_id TEXT,
-            change_date DATE,
-            old_price REAL,
-            new_price REAL,
-            change_amount REAL,
-            change_percent REAL,
-            change_type TEXT,
-            reason TEXT,
-            FOREIGN KEY (upc_code) REFERENCES products(upc_code),
-            FOREIGN KEY (store_id) REFERENCES stores(store_id)
-        );
-        
-        -- Create indexes for better query performance
-        CREATE INDEX IF NOT EXISTS idx_pricing_upc_date ON pricing(upc_code, price_date);
-        CREATE INDEX IF NOT EXISTS idx_sales_upc_week ON sales_data(upc_code, week_ending_date);
-        CREATE INDEX IF NOT EXISTS idx_competitive_upc_date ON competitive_pricing(upc_code, observation_date);
-        CREATE INDEX IF NOT EXISTS idx_products_category ON products(category_level_1, category_level_2);
-        CREATE INDEX IF NOT EXISTS idx_elasticity_category ON elasticity(category_level_2);
-        """
-        
         try:
             with sqlite3.connect(self.database_path) as conn:
-                conn.executescript(schema_sql)
+                conn.executescript(SCHEMA_SQL)
                 conn.commit()
+            if create_indexes:
+                self._create_indexes()
             self.logger.info("Database schema created successfully")
         except Exception as e:
             self.logger.error(f"Error creating database schema: {str(e)}")
             raise
     
-    def _generate_products(self) -> List[ProductData]:
-        """Generate synthetic product data"""
-        products = []
-        
-        for i in range(self.num_products):
-            # Generate UPC code
-            upc_code = f"{random.randint(1000000000000, 9999999999999)}"
-            
-            # Select random category
-            level_1 = random.choice(list(self.categories.keys()))
-            level_2 = random.choice(list(self.categories[level_1].keys()))
-            level_3 = random.choice(self.categories[level_1][level_2])
-            
-            # Generate product name
-            brand = random.choice(self.brands)
-            product_name = f"{brand} {level_3}"
-            
-            # Add variety to product names
-            if random.random() < 0.3:
-                varieties = ["Original", "Light", "Organic", "Premium", "Family Size", "Low Fat"]
-                product_name += f" {random.choice(varieties)}"
-            
-            # Package size and unit
-            unit = random.choice(self.units_of_measure)
-            if unit in ["LB", "OZ"]:
-                size = f"{random.randint(1, 32)} {unit}"
-            elif unit in ["GAL", "QT", "PT"]:
-                size = f"{random.randint(1, 4)} {unit}"
-            else:
-                size = f"{random.randint(1, 24)} {unit}"
-            
-            # Cost and base price
-            cost = round(random.uniform(0.50, 25.00), 2)
-            markup = random.uniform(1.2, 2.5)  # 20% to 150% markup
-            base_price = round(cost * markup, 2)
-            
-            product = ProductData(
-                upc_code=upc_code,
-                product_name=product_name,
-                brand=brand,
-                category_level_1=level_1,
-                category_level_2=level_2,
-                category_level_3=level_3,
-                package_size=size,
-                unit_of_measure=unit,
-                cost=cost,
-                base_price=base_price
-            )
-            
-            products.append(product)
-        
-        # Insert products into database
-        self._insert_products(products)
-        self.logger.info(f"Generated {len(products)} products")
-        
-        return products
-    
-    def _insert_products(self, products: List[ProductData]):
-        """Insert products into database"""
+    def _create_indexes(self):
+        """Create indexes for better query performance and refresh planner statistics"""
         try:
             with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for product in products:
-                    price_family = random.choice(self.price_families)
-                    
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO products 
-                        (upc_code, product_name, brand, category_level_1, category_level_2, 
-                         category_level_3, package_size, unit_of_measure, cost, base_price, price_family)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        product.upc_code, product.product_name, product.brand,
-                        product.category_level_1, product.category_level_2, product.category_level_3,
-                        product.package_size, product.unit_of_measure, product.cost, 
-                        product.base_price, price_family
-                    ))
-                
+                for _, index_sql in INDEXES:
+                    conn.execute(index_sql)
+                conn.execute("ANALYZE")
                 conn.commit()
         except Exception as e:
-            self.logger.error(f"Error inserting products: {str(e)}")
+            self.logger.error(f"Error creating indexes: {str(e)}")
             raise
     
-    def _generate_stores(self) -> List[Dict[str, Any]]:
-        """Generate synthetic store data"""
-        stores = []
-        
-        for i in range(self.num_stores):
-            store_id = f"STORE_{i+1:03d}"
-            store_name = f"Store {i+1}"
-            zone = random.choice(self.store_zones)
-            banner = random.choice(["Banner 1", "Banner 2", "Banner 3"])
-            region = random.choice(["North", "South", "East", "West", "Central"])
-            store_type = random.choice(["Supermarket", "Hypermarket", "Convenience", "Express"])
-            
-            # Random opening date in the past 5 years
-            opened_date = datetime.now() - timedelta(days=random.randint(30, 1825))
+    @contextmanager
+    def _bulk_load(self):
+        """
+        Open a connection tuned for bulk loading, inside a single transaction
+        
+        The rollback journal is kept in memory and fsyncs are disabled for the
+        duration of the load, and existing indexes are dropped so rows are
+        appended without index maintenance (_create_indexes rebuilds them).
+        """
+        conn = sqlite3.connect(self.database_path, isolation_level=None)
+        try:
+            for pragma in BULK_LOAD_PRAGMAS:
+                conn.execute(pragma)
+            for index_name, _ in INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {index_name}")
             
-            store = {
-                'store_id': store_id,
-                'store_name': store_name,
-                'zone': zone,
-                'banner': banner,
-                'region': region,
-                'store_type': store_type,
-                'opened_date': opened_date.strftime('%Y-%m-%d')
-            }
+            conn.execute("BEGIN")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+    
+    def _bulk_insert(self, conn: sqlite3.Connection, table: str, columns: List[str],
+                     rows: Iterable[Tuple], replace: bool = False) -> int:
+        """
+        Insert rows with a single prepared statement
+        
+        Args:
+            conn: Connection with an open transaction
+            table: Target table
+            columns: Column names, in row order
+            rows: Iterable of row tuples
+            replace: Use INSERT OR REPLACE
             
-            stores.append(store)
+        Returns:
+            Number of rows inserted
+        """
+        verb = "INSERT OR REPLACE" if replace else "INSERT"
+        placeholders = ", ".join("?" * len(columns))
+        cursor = conn.executemany(
+            f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+        return cursor.rowcount
+    
+    def _generate_products(self, conn: sqlite3.Connection) -> ProductColumns:
+        """Generate synthetic product data"""
+        rng = self.rng
+        n = self.num_products
+        
+        # Category paths, picked level by level as before
+        level_1_names = list(self.categories.keys())
+        level_1 = [level_1_names[i] for i in rng.integers(0, len(level_1_names), n)]
+        level_2, level_3 = [], []
+        for l1 in level_1:
+            l2_names = list(self.categories[l1].keys())
+            l2 = l2_names[rng.integers(len(l2_names))]
+            level_2.append(l2)
+            level_3.append(self.categories[l1][l2][rng.integers(len(self.categories[l1][l2]))])
+        
+        # Product names with an optional variety
+        brands = np.array(self.brands, dtype=object)[rng.integers(0, len(self.brands), n)]
+        varieties = np.array(["Original", "Light", "Organic", "Premium", "Family Size", "Low Fat"], dtype=object)
+        has_variety = rng.random(n) < 0.3
+        variety = varieties[rng.integers(0, len(varieties), n)]
+        product_names = [
+            f"{brand} {l3} {v}" if flag else f"{brand} {l3}"
+            for brand, l3, v, flag in zip(brands, level_3, variety, has_variety)
+        ]
         
-        # Insert stores into database
-        self._insert_stores(stores)
-        self.logger.info(f"Generated {len(stores)} stores")
+        # Package size and unit
+        units = np.array(self.units_of_measure, dtype=object)[rng.integers(0, len(self.units_of_measure), n)]
+        max_size = np.where(np.isin(units, ["LB", "OZ"]), 32, np.where(np.isin(units, ["GAL", "QT", "PT"]), 4, 24))
+        sizes = rng.integers(1, max_size + 1)
+        package_sizes = [f"{size} {unit}" for size, unit in zip(sizes.tolist(), units)]
+        
+        # Cost and base price (20% to 150% markup)
+        cost = np.round(rng.uniform(0.50, 25.00, n), 2)
+        base_price = np.round(cost * rng.uniform(1.2, 2.5, n), 2)
+        
+        # 13-digit UPC codes, drawn without duplicates
+        upc_codes = np.array([str(code) for code in self._unique_integers(1000000000000, 10000000000000, n)], dtype=object)
+        price_family = np.array(self.price_families, dtype=object)[rng.integers(0, len(self.price_families), n)]
+        
+        products = ProductColumns(
+            upc_code=upc_codes,
+            category_level_2=np.array(level_2, dtype=object),
+            cost=cost,
+            base_price=base_price
+        )
+        
+        self._bulk_insert(
+            conn, "products",
+            ["upc_code", "product_name", "brand", "category_level_1", "category_level_2",
+             "category_level_3", "package_size", "unit_of_measure", "cost", "base_price", "price_family"],
+            zip(upc_codes, product_names, brands, level_1, level_2, level_3, package_sizes,
+                units, cost.tolist(), base_price.tolist(), price_family),
+            replace=True
+        )
+        self.logger.info(f"Generated {n} products")
         
-        return stores
+        return products
     
-    def _insert_stores(self, stores: List[Dict[str, Any]]):
-        """Insert stores into database"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for store in stores:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO stores 
-                        (store_id, store_name, zone, banner, region, store_type, opened_date)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        store['store_id'], store['store_name'], store['zone'],
-                        store['banner'], store['region'], store['store_type'], store['opened_date']
-                    ))
-                
-                conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error inserting stores: {str(e)}")
-            raise
+    def _unique_integers(self, low: int, high: int, n: int) -> List[int]:
+        """Draw n distinct integers from [low, high)"""
+        values = np.unique(self.rng.integers(low, high, n))
+        while len(values) < n:
+            values = np.unique(np.concatenate([values, self.rng.integers(low, high, n - len(values))]))
+        return self.rng.permutation(values).tolist()
+    
+    def _generate_stores(self, conn: sqlite3.Connection) -> StoreColumns:
+        """Generate synthetic store data"""
+        rng = self.rng
+        n = self.num_stores
+        
+        store_ids = np.array([f"STORE_{i+1:03d}" for i in range(n)], dtype=object)
+        zones = np.array(self.store_zones, dtype=object)[rng.integers(0, len(self.store_zones), n)]
+        banners = np.array(["Banner 1", "Banner 2", "Banner 3"], dtype=object)[rng.integers(0, 3, n)]
+        regions = np.array(["North", "South", "East", "West", "Central"], dtype=object)[rng.integers(0, 5, n)]
+        store_types = np.array(["Supermarket", "Hypermarket", "Convenience", "Express"], dtype=object)[rng.integers(0, 4, n)]
+        
+        # Random opening date in the past 5 years
+        now = datetime.now()
+        opened_dates = [(now - timedelta(days=days)).strftime('%Y-%m-%d') for days in rng.integers(30, 1826, n).tolist()]
+        
+        self._bulk_insert(
+            conn, "stores",
+            ["store_id", "store_name", "zone", "banner", "region", "store_type", "opened_date"],
+            zip(store_ids, [f"Store {i+1}" for i in range(n)], zones, banners, regions, store_types, opened_dates),
+            replace=True
+        )
+        self.logger.info(f"Generated {n} stores")
+        
+        return StoreColumns(store_id=store_ids, zone=zones)
+    
+    def _sample_product_stores(self, num_products: int, num_stores: int,
+                               products_per_period: int, stores_per_product: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sample products for one period and distinct stores for each sampled product
+        
+        Returns:
+            (product_index, store_index) arrays with one entry per generated row
+        """
+        n_products = min(num_products, products_per_period)
+        k = min(num_stores, stores_per_product)
+        product_index = self.rng.choice(num_products, n_products, replace=False)
+        
+        # The k smallest of per-store random keys give k distinct stores per product
+        keys = self.rng.random((n_products, num_stores))
+        store_index = np.argpartition(keys, k - 1, axis=1)[:, :k] if k < num_stores else np.argsort(keys, axis=1)
+        return np.repeat(product_index, k), store_index.ravel()
     
-    def _generate_pricing_data(self, products: List[ProductData], stores: List[Dict[str, Any]]):
+    def _generate_pricing_data(self, conn: sqlite3.Connection, products: ProductColumns, stores: StoreColumns):
         """Generate pricing data for products across stores and time"""
-        pricing_data = []
+        rng = self.rng
+        total = 0
+        
+        # Zone-based pricing
+        zone_multipliers = {
+            "Banner 1": 1.0,
+            "Banner 2": 1.05,
+            "Orange": 0.95,
+            "Blue": 1.02,
+            "Green": 0.98,
+            "Red": 1.03,
+            "Metro": 1.10,
+            "Suburban": 1.00,
+            "Rural": 0.92,
+            "Premium": 1.15
+        }
+        store_multiplier = np.array([zone_multipliers.get(zone, 1.0) for zone in stores.zone])
+        strategies = np.array(["Competitive", "Premium", "Value", "Promotional", "EDLP", "Hi-Lo"], dtype=object)
+        reasons = np.array(["Competitive Response", "Cost Change", "Demand Optimization",
+                            "Promotional", "Seasonal", "Inventory Management"], dtype=object)
+        price_families = np.array(self.price_families, dtype=object)
         
-        # Generate pricing for last 52 weeks
+        # Generate pricing for the configured number of weeks, one batch per week
         end_date = datetime.now()
         
         for week in range(self.weeks_of_data):
-            week_date = end_date - timedelta(weeks=week)
-            
-            # Sample products for this week (not all products in all stores)
-            sampled_products = random.sample(products, min(len(products), 800))
-            
-            for product in sampled_products:
-                # Sample stores for this product
-                sampled_stores = random.sample(stores, min(len(stores), 30))
-                
-                for store in sampled_stores:
-                    # Price variation based on store zone and time
-                    base_price = product.base_price
-                    
-                    # Zone-based pricing
-                    zone_multiplier = {
-                        "Banner 1": 1.0,
-                        "Banner 2": 1.05,
-                        "Orange": 0.95,
-                        "Blue": 1.02,
-                        "Green": 0.98,
-                        "Red": 1.03,
-                        "Metro": 1.10,
-                        "Suburban": 1.00,
-                        "Rural": 0.92,
-                        "Premium": 1.15
-                    }.get(store['zone'], 1.0)
-                    
-                    current_price = round(base_price * zone_multiplier * random.uniform(0.9, 1.1), 2)
-                    
-                    # Suggested price (optimization recommendation)
-                    suggested_price = round(current_price * random.uniform(0.95, 1.08), 2)
-                    
-                    # Pricing strategy
-                    strategies = ["Competitive", "Premium", "Value", "Promotional", "EDLP", "Hi-Lo"]
-                    pricing_strategy = random.choice(strategies)
-                    
-                    # Price change reason
-                    reasons = ["Competitive Response", "Cost Change", "Demand Optimization", 
-                              "Promotional", "Seasonal", "Inventory Management"]
-                    price_change_reason = random.choice(reasons)
-                    
-                    # Impact estimates
-                    units_impact = round(random.uniform(-50, 100), 1)
-                    revenue_impact = round(units_impact * current_price * random.uniform(0.8, 1.2), 2)
-                    
-                    pricing_record = {
-                        'upc_code': product.upc_code,
-                        'store_id': store['store_id'],
-                        'price_date': week_date.strftime('%Y-%m-%d'),
-                        'current_price': current_price,
-                        'suggested_price': suggested_price,
-                        'price_family': random.choice(self.price_families),
-                        'pricing_strategy': pricing_strategy,
-                        'price_change_reason': price_change_reason,
-                        'units_impact': units_impact,
-                        'revenue_impact': revenue_impact
-                    }
-                    
-                    pricing_data.append(pricing_record)
-        
-        # Insert pricing data
-        self._insert_pricing_data(pricing_data)
-        self.logger.info(f"Generated {len(pricing_data)} pricing records")
-    
-    def _insert_pricing_data(self, pricing_data: List[Dict[str, Any]]):
-        """Insert pricing data into database"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for record in pricing_data:
-                    cursor.execute("""
-                        INSERT INTO pricing 
-                        (upc_code, store_id, price_date, current_price, suggested_price, 
-                         price_family, pricing_strategy, price_change_reason, units_impact, revenue_impact)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record['upc_code'], record['store_id'], record['price_date'],
-                        record['current_price'], record['suggested_price'], record['price_family'],
-                        record['pricing_strategy'], record['price_change_reason'],
-                        record['units_impact'], record['revenue_impact']
-                    ))
-                
-                conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error inserting pricing data: {str(e)}")
-            raise
-    
-    def _generate_elasticity_data(self, products: List[ProductData]):
-        """Generate price elasticity data for products"""
-        elasticity_data = []
-        
-        for product in products:
-            # Elasticity varies by category
-            category_elasticity = {
-                "BREAD & WRAPS": random.uniform(0.8, 1.5),
-                "DAIRY": random.uniform(0.6, 1.2),
-                "FROZEN FOOD": random.uniform(1.0, 1.8),
-                "BEVERAGES": random.uniform(1.2, 2.0),
-                "SNACKS": random.uniform(1.5, 2.5),
-                "FRESH FRUITS": random.uniform(0.9, 1.6),
-                "FRESH VEGETABLES": random.uniform(0.7, 1.3),
-                "FRESH MEAT": random.uniform(0.5, 1.0),
-                "SEAFOOD": random.uniform(0.8, 1.4),
-                "FRESH BAKED": random.uniform(1.1, 1.9)
-            }
+            week_date = (end_date - timedelta(weeks=week)).strftime('%Y-%m-%d')
+            p, s = self._sample_product_stores(len(products.upc_code), len(stores.store_id),
+                                               self.pricing_products_per_week, 30)
+            n = len(p)
             
-            elasticity_value = category_elasticity.get(
-                product.category_level_2, 
-                random.uniform(0.8, 1.8)
-            )
+            current_price = np.round(products.base_price[p] * store_multiplier[s] * rng.uniform(0.9, 1.1, n), 2)
             
-            # Categorize elasticity
-            if elasticity_value < 1.0:
-                elasticity_category = "Inelastic"
-            elif elasticity_value < 1.5:
-                elasticity_category = "Moderately Elastic"
-            else:
-                elasticity_category = "Highly Elastic"
+            # Suggested price (optimization recommendation)
+            suggested_price = np.round(current_price * rng.uniform(0.95, 1.08, n), 2)
             
-            confidence_level = random.uniform(0.7, 0.95)
-            
-            elasticity_record = {
-                'upc_code': product.upc_code,
-                'category_level_2': product.category_level_2,
-                'elasticity_value': round(elasticity_value, 3),
-                'elasticity_category': elasticity_category,
-                'confidence_level': round(confidence_level, 3),
-                'last_updated': datetime.now().strftime('%Y-%m-%d')
-            }
+            # Impact estimates
+            units_impact = np.round(rng.uniform(-50, 100, n), 1)
+            revenue_impact = np.round(units_impact * current_price * rng.uniform(0.8, 1.2, n), 2)
             
-            elasticity_data.append(elasticity_record)
+            total += self._bulk_insert(
+                conn, "pricing",
+                ["upc_code", "store_id", "price_date", "current_price", "suggested_price",
+                 "price_family", "pricing_strategy", "price_change_reason", "units_impact", "revenue_impact"],
+                zip(products.upc_code[p], stores.store_id[s], repeat(week_date, n),
+                    current_price.tolist(), suggested_price.tolist(),
+                    price_families[rng.integers(0, len(price_families), n)],
+                    strategies[rng.integers(0, len(strategies), n)],
+                    reasons[rng.integers(0, len(reasons), n)],
+                    units_impact.tolist(), revenue_impact.tolist())
+            )
         
-        # Insert elasticity data
-        self._insert_elasticity_data(elasticity_data)
-        self.logger.info(f"Generated {len(elasticity_data)} elasticity records")
+        self.logger.info(f"Generated {total} pricing records")
     
-    def _insert_elasticity_data(self, elasticity_data: List[Dict[str, Any]]):
-        """Insert elasticity data into database"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for record in elasticity_data:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO elasticity 
-                        (upc_code, category_level_2, elasticity_value, elasticity_category, 
-                         confidence_level, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        record['upc_code'], record['category_level_2'], record['elasticity_value'],
-                        record['elasticity_category'], record['confidence_level'], record['last_updated']
-                    ))
-                
-                conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error inserting elasticity data: {str(e)}")
-            raise
+    def _generate_elasticity_data(self, conn: sqlite3.Connection, products: ProductColumns):
+        """Generate price elasticity data for products"""
+        rng = self.rng
+        n = len(products.upc_code)
+        
+        # Elasticity ranges vary by category
+        category_ranges = {
+            "BREAD & WRAPS": (0.8, 1.5),
+            "DAIRY": (0.6, 1.2),
+            "FROZEN FOOD": (1.0, 1.8),
+            "BEVERAGES": (1.2, 2.0),
+            "SNACKS": (1.5, 2.5),
+            "FRESH FRUITS": (0.9, 1.6),
+            "FRESH VEGETABLES": (0.7, 1.3),
+            "FRESH MEAT": (0.5, 1.0),
+            "SEAFOOD": (0.8, 1.4),
+            "FRESH BAKED": (1.1, 1.9)
+        }
+        ranges = np.array([category_ranges.get(category, (0.8, 1.8)) for category in products.category_level_2])
+        elasticity_value = np.round(rng.uniform(ranges[:, 0], ranges[:, 1]), 3)
+        
+        # Categorize elasticity
+        elasticity_category = np.select(
+            [elasticity_value < 1.0, elasticity_value < 1.5],
+            ["Inelastic", "Moderately Elastic"],
+            "Highly Elastic"
+        ).astype(object)
+        
+        confidence_level = np.round(rng.uniform(0.7, 0.95, n), 3)
+        
+        total = self._bulk_insert(
+            conn, "elasticity",
+            ["upc_code", "category_level_2", "elasticity_value", "elasticity_category",
+             "confidence_level", "last_updated"],
+            zip(products.upc_code, products.category_level_2, elasticity_value.tolist(),
+                elasticity_category, confidence_level.tolist(),
+                repeat(datetime.now().strftime('%Y-%m-%d'), n)),
+            replace=True
+        )
+        self.logger.info(f"Generated {total} elasticity records")
     
-    def _generate_competitive_data(self, products: List[ProductData]):
+    def _generate_competitive_data(self, conn: sqlite3.Connection, products: ProductColumns):
         """Generate competitive pricing data"""
-        competitive_data = []
-        
-        # Sample products for competitive analysis
-        sampled_products = random.sample(products, min(len(products), 500))
-        
-        for product in sampled_products:
-            our_price = product.base_price
-            
-            for competitor in self.competitors:
-                # Competitor pricing varies
-                competitor_price = round(our_price * random.uniform(0.85, 1.20), 2)
-                
-                # Calculate CPI (Competitive Price Index)
-                cpi_value = round(competitor_price / our_price, 3)
-                
-                # Price gap
-                price_gap = round(competitor_price - our_price, 2)
-                price_gap_percent = round((price_gap / our_price) * 100, 1)
-                
-                observation_date = datetime.now() - timedelta(days=random.randint(0, 30))
-                
-                competitive_record = {
-                    'upc_code': product.upc_code,
-                    'competitor_name': competitor,
-                    'competitor_price': competitor_price,
-                    'our_price': our_price,
-                    'cpi_value': cpi_value,
-                    'price_gap': price_gap,
-                    'price_gap_percent': price_gap_percent,
-                    'observation_date': observation_date.strftime('%Y-%m-%d')
-                }
-                
-                competitive_data.append(competitive_record)
-        
-        # Insert competitive data
-        self._insert_competitive_data(competitive_data)
-        self.logger.info(f"Generated {len(competitive_data)} competitive pricing records")
-    
-    def _insert_competitive_data(self, competitive_data: List[Dict[str, Any]]):
-        """Insert competitive data into database"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for record in competitive_data:
-                    cursor.execute("""
-                        INSERT INTO competitive_pricing 
-                        (upc_code, competitor_name, competitor_price, our_price, cpi_value, 
-                         price_gap, price_gap_percent, observation_date)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record['upc_code'], record['competitor_name'], record['competitor_price'],
-                        record['our_price'], record['cpi_value'], record['price_gap'],
-                        record['price_gap_percent'], record['observation_date']
-                    ))
-                
-                conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error inserting competitive data: {str(e)}")
-            raise
+        rng = self.rng
+        num_competitors = len(self.competitors)
+        
+        # Sample products for competitive analysis, one row per competitor
+        sampled = rng.choice(len(products.upc_code), min(len(products.upc_code), self.competitive_products), replace=False)
+        p = np.repeat(sampled, num_competitors)
+        competitors = np.tile(np.array(self.competitors, dtype=object), len(sampled))
+        n = len(p)
+        
+        our_price = products.base_price[p]
+        
+        # Competitor pricing varies
+        competitor_price = np.round(our_price * rng.uniform(0.85, 1.20, n), 2)
+        
+        # Calculate CPI (Competitive Price Index) and price gap
+        cpi_value = np.round(competitor_price / our_price, 3)
+        price_gap = np.round(competitor_price - our_price, 2)
+        price_gap_percent = np.round((price_gap / our_price) * 100, 1)
+        
+        now = datetime.now()
+        dates = np.array([(now - timedelta(days=days)).strftime('%Y-%m-%d') for days in range(31)], dtype=object)
+        
+        total = self._bulk_insert(
+            conn, "competitive_pricing",
+            ["upc_code", "competitor_name", "competitor_price", "our_price", "cpi_value",
+             "price_gap", "price_gap_percent", "observation_date"],
+            zip(products.upc_code[p], competitors, competitor_price.tolist(), our_price.tolist(),
+                cpi_value.tolist(), price_gap.tolist(), price_gap_percent.tolist(),
+                dates[rng.integers(0, len(dates), n)])
+        )
+        self.logger.info(f"Generated {total} competitive pricing records")
     
-    def _generate_sales_data(self, products: List[ProductData], stores: List[Dict[str, Any]]):
+    def _generate_sales_data(self, conn: sqlite3.Connection, products: ProductColumns, stores: StoreColumns):
         """Generate sales data"""
-        sales_data = []
+        rng = self.rng
+        total = 0
         
-        # Generate sales for last 26 weeks (6 months)
+        # Generate sales for last 26 weeks (6 months), one batch per week
         end_date = datetime.now()
         
         for week in range(26):
             week_ending = end_date - timedelta(weeks=week)
+            p, s = self._sample_product_stores(len(products.upc_code), len(stores.store_id),
+                                               self.sales_products_per_week, 20)
+            n = len(p)
             
-            # Sample products and stores
-            sampled_products = random.sample(products, min(len(products), 600))
+            # Seasonal adjustment
+            month = week_ending.month
+            seasonal_multiplier = 1.0
+            if month in [11, 12]:  # Holiday season
+                seasonal_multiplier = 1.3
+            elif month in [6, 7, 8]:  # Summer
+                seasonal_multiplier = 1.1
             
-            for product in sampled_products:
-                sampled_stores = random.sample(stores, min(len(stores), 20))
-                
-                for store in sampled_stores:
-                    # Sales vary by category and seasonality
-                    base_units = random.randint(10, 500)
-                    
-                    # Seasonal adjustment
-                    month = week_ending.month
-                    seasonal_multiplier = 1.0
-                    if month in [11, 12]:  # Holiday season
-                        seasonal_multiplier = 1.3
-                    elif month in [6, 7, 8]:  # Summer
-                        seasonal_multiplier = 1.1
-                    
-                    units_sold = int(base_units * seasonal_multiplier * random.uniform(0.7, 1.4))
-                    revenue = round(units_sold * product.base_price, 2)
-                    
-                    # Forecast (slightly different from actual)
-                    forecast_units = int(units_sold * random.uniform(0.9, 1.1))
-                    forecast_revenue = round(forecast_units * product.base_price, 2)
-                    
-                    sales_record = {
-                        'upc_code': product.upc_code,
-                        'store_id': store['store_id'],
-                        'week_ending_date': week_ending.strftime('%Y-%m-%d'),
-                        'units_sold': units_sold,
-                        'revenue': revenue,
-                        'forecast_units': forecast_units,
-                        'forecast_revenue': forecast_revenue
-                    }
-                    
-                    sales_data.append(sales_record)
-        
-        # Insert sales data
-        self._insert_sales_data(sales_data)
-        self.logger.info(f"Generated {len(sales_data)} sales records")
-    
-    def _insert_sales_data(self, sales_data: List[Dict[str, Any]]):
-        """Insert sales data into database"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for record in sales_data:
-                    cursor.execute("""
-                        INSERT INTO sales_data 
-                        (upc_code, store_id, week_ending_date, units_sold, revenue, 
-                         forecast_units, forecast_revenue)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record['upc_code'], record['store_id'], record['week_ending_date'],
-                        record['units_sold'], record['revenue'], record['forecast_units'],
-                        record['forecast_revenue']
-                    ))
-                
-                conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error inserting sales data: {str(e)}")
-            raise
+            base_units = rng.integers(10, 501, n)
+            units_sold = (base_units * seasonal_multiplier * rng.uniform(0.7, 1.4, n)).astype(np.int64)
+            revenue = np.round(units_sold * products.base_price[p], 2)
+            
+            # Forecast (slightly different from actual)
+            forecast_units = (units_sold * rng.uniform(0.9, 1.1, n)).astype(np.int64)
+            forecast_revenue = np.round(forecast_units * products.base_price[p], 2)
+            
+            total += self._bulk_insert(
+                conn, "sales_data",
+                ["upc_code", "store_id", "week_ending_date", "units_sold", "revenue",
+                 "forecast_units", "forecast_revenue"],
+                zip(products.upc_code[p], stores.store_id[s], repeat(week_ending.strftime('%Y-%m-%d'), n),
+                    units_sold.tolist(), revenue.tolist(), forecast_units.tolist(), forecast_revenue.tolist())
+            )
+        
+        self.logger.info(f"Generated {total} sales records")
     
-    def _generate_margin_data(self, products: List[ProductData], stores: List[Dict[str, Any]]):
+    def _generate_margin_data(self, conn: sqlite3.Connection, products: ProductColumns, stores: StoreColumns):
         """Generate margin analysis data"""
-        margin_data = []
+        rng = self.rng
+        total = 0
         
         # Generate margin data for recent dates
         for days_ago in range(0, 90, 7):  # Weekly for last 3 months
-            analysis_date = datetime.now() - timedelta(days=days_ago)
+            analysis_date = (datetime.now() - timedelta(days=days_ago)).strftime('%Y-%m-%d')
+            p, s = self._sample_product_stores(len(products.upc_code), len(stores.store_id),
+                                               self.margin_products_per_week, 15)
+            n = len(p)
             
-            sampled_products = random.sample(products, min(len(products), 400))
+            cost = products.cost[p]
+            selling_price = np.round(products.base_price[p] * rng.uniform(0.95, 1.1, n), 2)
             
-            for product in sampled_products:
-                sampled_stores = random.sample(stores, min(len(stores), 15))
-                
-                for store in sampled_stores:
-                    cost = product.cost
-                    selling_price = round(product.base_price * random.uniform(0.95, 1.1), 2)
-                    
-                    margin_amount = round(selling_price - cost, 2)
-                    margin_percent = round((margin_amount / selling_price) * 100, 1) if selling_price > 0 else 0
-                    
-                    # Categorize margin
-                    if margin_percent < 10:
-                        margin_category = "Low"
-                    elif margin_percent < 25:
-                        margin_category = "Medium"
-                    else:
-                        margin_category = "High"
-                    
-                    margin_record = {
-                        'upc_code': product.upc_code,
-                        'store_id': store['store_id'],
-                        'analysis_date': analysis_date.strftime('%Y-%m-%d'),
-                        'cost': cost,
-                        'selling_price': selling_price,
-                        'margin_amount': margin_amount,
-                        'margin_percent': margin_percent,
-                        'margin_category': margin_category
-                    }
-                    
-                    margin_data.append(margin_record)
-        
-        # Insert margin data
-        self._insert_margin_data(margin_data)
-        self.logger.info(f"Generated {len(margin_data)} margin analysis records")
-    
-    def _insert_margin_data(self, margin_data: List[Dict[str, Any]]):
-        """Insert margin data into database"""
-        try:
-            with sqlite3.connect(self.database_path) as conn:
-                cursor = conn.cursor()
-                
-                for record in margin_data:
-                    cursor.execute("""
-                        INSERT INTO margin_analysis 
-                        (upc_code, store_id, analysis_date, cost, selling_price, 
-                         margin_amount, margin_percent, margin_category)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        record['upc_code'], record['store_id'], record['analysis_date'],
-                        record['cost'], record['selling_price'], record['margin_amount'],
-                        record['margin_percent'], record['margin_category']
-                    ))
-                
-                conn.commit()
-        except Exception as e:
-            self.logger.error(f"Error inserting margin data: {str(e)}")
-            raise
+            margin_amount = np.round(selling_price - cost, 2)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                margin_percent = np.where(selling_price > 0, np.round((margin_amount / selling_price) * 100, 1), 0.0)
+            
+            # Categorize margin
+            margin_category = np.select(
+                [margin_percent < 10, margin_percent < 25],
+                ["Low", "Medium"],
+                "High"
+            ).astype(object)
+            
+            total += self._bulk_insert(
+                conn, "margin_analysis",
+                ["upc_code", "store_id", "analysis_date", "cost", "selling_price",
+                 "margin_amount", "margin_percent", "margin_category"],
+                zip(products.upc_code[p], stores.store_id[s], repeat(analysis_date, n),
+                    cost.tolist(), selling_price.tolist(), margin_amount.tolist(),
+                    margin_percent.tolist(), margin_category)
+            )
+        
+        self.logger.info(f"Generated {total} margin analysis records")
     
     def add_specific_test_data(self):
         """Add specific test data for the sample questions"""
@@ -859,16 +768,17 @@ class SyntheticDataGenerator:
 
 
 # Main execution function
-def generate_synthetic_data(database_path: str = "retail_analytics.db"):
+def generate_synthetic_data(database_path: str = "retail_analytics.db", scale_factor: float = 1.0):
     """
     Generate all synthetic retail data
     
     Args:
         database_path: Path to SQLite database file
+        scale_factor: Multiplier for the generated data volume
     """
     logging.basicConfig(level=logging.INFO)
     
-    generator = SyntheticDataGenerator(database_path)
+    generator = SyntheticDataGenerator(database_path, scale_factor=scale_factor)
     
     print("Generating synthetic retail data...")
     print("=" * 50)
@@ -894,5 +804,12 @@ def generate_synthetic_data(database_path: str = "retail_analytics.db"):
 
 
 if __name__ == "__main__":
-    generate_synthetic_data()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate synthetic retail data")
+    parser.add_argument("--database", default="retail_analytics.db", help="Path to SQLite database file")
+    parser.add_argument("--scale-factor", type=float, default=1.0, help="Multiplier for the generated data volume")
+    args = parser.parse_args()
+    
+    generate_synthetic_data(args.database, scale_factor=args.scale_factor)
 
@@ -0,0 +1,99 @@
+"""
+Background Evaluations for Text-to-SQL Agent
+
+This module runs evaluator.evaluate calls on a small thread pool so that
+evaluation round trips stay off the user-visible request path. The number
+of pending evaluations is bounded; when the evaluation service falls behind,
+new evaluations are dropped and counted instead of queueing without limit.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict
+
+from opentelemetry import context as otel_context
+
+logger = logging.getLogger(__name__)
+
+# Evaluations are network-bound; a few threads keep up with request traffic
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="evaluations")
+
+# Queued plus running evaluations allowed before new ones are dropped
+MAX_PENDING_EVALUATIONS = int(os.getenv("MAX_PENDING_EVALUATIONS", 256))
+
+_lock = threading.Lock()
+_pending = 0
+_dropped = 0
+
+
+def submit_evaluation(evaluator, eval_config: Dict[str, Any], custom_eval_name: str) -> Future:
+    """
+    Run one evaluation in the background
+
+    The evaluation runs under the caller's trace context, so trace_eval
+    still attaches it to the span that submitted it.
+
+    Args:
+        evaluator: Evaluator instance to use
+        eval_config: Keyword arguments for evaluator.evaluate (eval_templates, inputs, model_name)
+        custom_eval_name: Name the evaluation is reported under
+
+    Returns:
+        Future resolving to the evaluation result, or None if it failed or was dropped
+    """
+    global _pending, _dropped
+    with _lock:
+        if _pending >= MAX_PENDING_EVALUATIONS:
+            _dropped += 1
+            dropped = _dropped
+        else:
+            _pending += 1
+            dropped = 0
+
+    if dropped:
+        # Log the first drop and then every 100th so a backlog does not flood the log
+        if dropped == 1 or dropped % 100 == 0:
+            logger.warning(f"Evaluation queue is full ({MAX_PENDING_EVALUATIONS} pending), "
+                           f"dropped {custom_eval_name} ({dropped} dropped so far)")
+        future = Future()
+        future.set_result(None)
+        return future
+
+    parent_context = otel_context.get_current()
+
+    def run():
+        global _pending
+        token = otel_context.attach(parent_context)
+        try:
+            return evaluator.evaluate(
+                **eval_config,
+                custom_eval_name=custom_eval_name,
+                trace_eval=True
+            )
+        except Exception as e:
+            logger.warning(f"Evaluation {custom_eval_name} failed: {str(e)}")
+            return None
+        finally:
+            otel_context.detach(token)
+            with _lock:
+                _pending -= 1
+
+    try:
+        return _executor.submit(run)
+    except RuntimeError:
+        # The executor is shutting down at interpreter exit
+        with _lock:
+            _pending -= 1
+        raise
+
+
+def get_evaluation_stats() -> Dict[str, int]:
+    """Return the number of pending and dropped background evaluations"""
+    with _lock:
+        return {
+            'pending': _pending,
+            'dropped': _dropped,
+            'max_pending': MAX_PENDING_EVALUATIONS,
+        }
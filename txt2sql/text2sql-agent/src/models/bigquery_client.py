@@ -10,15 +10,24 @@ import json
 import logging
 import time
 from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
 import pandas as pd
 import numpy as np
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound, BadRequest, Forbidden
 from google.oauth2 import service_account
 import hashlib
+import io
 import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+try:
+    import pyarrow as pa
+except ImportError:  # Cached frames fall back to pickle without Arrow
+    pa = None
 
 
 @dataclass
@@ -51,157 +60,334 @@ class QueryMetrics:
 
 
 class QueryCache:
-    """Caches query results to improve performance"""
+    """
+    Caches query results in a single SQLite database to improve performance
     
-    def __init__(self, cache_dir: str = "./query_cache", ttl_hours: int = 24):
+    Result frames are stored as Parquet (pickle when pyarrow is unavailable or
+    a frame cannot be converted) alongside their metadata in one table, so
+    every put, get and eviction is a single indexed transaction. The database
+    runs in WAL mode and may be shared by several worker processes. Entries
+    expire after ttl_hours and the least recently used ones are evicted once
+    the stored frames exceed max_bytes.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            query_hash TEXT PRIMARY KEY,
+            created REAL NOT NULL,
+            last_access REAL NOT NULL,
+            size_bytes INTEGER NOT NULL,
+            format TEXT NOT NULL,
+            frame BLOB,
+            result TEXT NOT NULL,
+            table_versions TEXT
+        );
+        CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access);
+        CREATE INDEX IF NOT EXISTS entries_created ON entries(created);
+        CREATE TABLE IF NOT EXISTS totals (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            entries INTEGER NOT NULL,
+            size_bytes INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+        CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+            UPDATE totals SET entries = entries + 1, size_bytes = size_bytes + NEW.size_bytes;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+            UPDATE totals SET entries = entries - 1, size_bytes = size_bytes - OLD.size_bytes;
+        END;
+    """
+    
+    # Reads refresh an entry's LRU position at most this often (seconds)
+    ACCESS_RESOLUTION = 1.0
+    
+    def __init__(self, cache_dir: str = "./query_cache", ttl_hours: int = 24,
+                 max_bytes: int = 1024 * 1024 * 1024):
         self.cache_dir = cache_dir
         self.ttl_hours = ttl_hours
+        self.max_bytes = max_bytes
         self.logger = logging.getLogger(__name__)
         
         # Create cache directory
         os.makedirs(cache_dir, exist_ok=True)
+        self.db_path = os.path.join(cache_dir, "query_cache.db")
         
-        # Load cache index
-        self.cache_index_file = os.path.join(cache_dir, "cache_index.json")
-        self.cache_index = self._load_cache_index()
-    
-    def _load_cache_index(self) -> Dict[str, Dict]:
-        """Load cache index from disk"""
-        try:
-            if os.path.exists(self.cache_index_file):
-                with open(self.cache_index_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            self.logger.warning(f"Could not load cache index: {str(e)}")
+        # One connection per thread; processes coordinate through SQLite locking
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.stats_lock = threading.Lock()
         
-        return {}
+        conn = self._get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
     
-    def _save_cache_index(self):
-        """Save cache index to disk"""
-        try:
-            with open(self.cache_index_file, 'w') as f:
-                json.dump(self.cache_index, f, default=str)
-        except Exception as e:
-            self.logger.warning(f"Could not save cache index: {str(e)}")
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the cache database"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
     
     def _get_query_hash(self, sql_query: str) -> str:
         """Generate hash for SQL query"""
         return hashlib.md5(sql_query.encode()).hexdigest()
     
-    def _is_cache_valid(self, cache_entry: Dict) -> bool:
-        """Check if cache entry is still valid"""
-        try:
-            cached_time = datetime.fromisoformat(cache_entry['timestamp'])
-            expiry_time = cached_time + timedelta(hours=self.ttl_hours)
-            return datetime.now() < expiry_time
-        except:
-            return False
-    
-    def get(self, sql_query: str) -> Optional[QueryResult]:
-        """Get cached result for query"""
+    def _serialize_frame(self, df: Optional[pd.DataFrame]) -> Tuple[str, Optional[bytes]]:
+        """Serialize a result frame, preferring Parquet"""
+        if df is None:
+            return 'none', None
+        if pa is not None:
+            try:
+                buffer = io.BytesIO()
+                df.to_parquet(buffer, engine='pyarrow')
+                return 'parquet', buffer.getvalue()
+            except Exception as e:
+                self.logger.debug(f"Falling back to pickle for cached frame: {str(e)}")
+        return 'pickle', pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def _deserialize_frame(self, frame_format: str, blob: Optional[bytes]) -> Optional[pd.DataFrame]:
+        """Deserialize a result frame written by _serialize_frame"""
+        if frame_format == 'parquet':
+            return pd.read_parquet(io.BytesIO(blob), engine='pyarrow')
+        if frame_format == 'pickle':
+            return pickle.loads(blob)
+        return None
+    
+    def get(self, sql_query: str, table_versions: Optional[Dict[str, str]] = None) -> Optional[QueryResult]:
+        """Get cached result for query if it was computed from the current table versions"""
         query_hash = self._get_query_hash(sql_query)
-        
-        if query_hash not in self.cache_index:
-            return None
-        
-        cache_entry = self.cache_index[query_hash]
-        
-        if not self._is_cache_valid(cache_entry):
-            # Remove expired entry
-            self._remove_cache_entry(query_hash)
-            return None
+        conn = self._get_connection()
+        now = time.time()
         
         try:
+            row = conn.execute(
+                "SELECT created, last_access, format, frame, result, table_versions "
+                "FROM entries WHERE query_hash = ?",
+                (query_hash,)
+            ).fetchone()
+            
+            if row is None:
+                self._count(hit=False)
+                return None
+            
+            created, last_access, frame_format, blob, result_json, versions_json = row
+            
+            if now - created >= self.ttl_hours * 3600:
+                # Remove expired entry
+                self._remove_cache_entry(query_hash)
+                self._count(hit=False)
+                return None
+            
+            if (json.loads(versions_json) if versions_json else None) != table_versions:
+                # A referenced table was modified after the result was cached
+                self.logger.info(f"Cache entry invalidated by table change: {query_hash}")
+                self._remove_cache_entry(query_hash)
+                self._count(hit=False)
+                return None
+            
             # Load cached result
-            cache_file = os.path.join(self.cache_dir, f"{query_hash}.pkl")
-            with open(cache_file, 'rb') as f:
-                cached_result = pickle.load(f)
+            result_fields = json.loads(result_json)
+            cached_result = QueryResult(data=self._deserialize_frame(frame_format, blob), **result_fields)
             
             # Mark as cache hit
             cached_result.cache_hit = True
             
+            if now - last_access >= self.ACCESS_RESOLUTION:
+                conn.execute("UPDATE entries SET last_access = ? WHERE query_hash = ?", (now, query_hash))
+            
+            self._count(hit=True)
             self.logger.info(f"Cache hit for query hash: {query_hash}")
             return cached_result
             
         except Exception as e:
             self.logger.warning(f"Could not load cached result: {str(e)}")
             self._remove_cache_entry(query_hash)
+            self._count(hit=False)
             return None
     
-    def put(self, sql_query: str, result: QueryResult):
-        """Cache query result"""
+    def put(self, sql_query: str, result: QueryResult, table_versions: Optional[Dict[str, str]] = None):
+        """Cache query result, tagged with the table versions it was computed from"""
         query_hash = self._get_query_hash(sql_query)
         
         try:
-            # Save result to file
-            cache_file = os.path.join(self.cache_dir, f"{query_hash}.pkl")
-            with open(cache_file, 'wb') as f:
-                pickle.dump(result, f)
-            
-            # Update cache index
-            self.cache_index[query_hash] = {
-                'timestamp': datetime.now().isoformat(),
-                'row_count': result.row_count,
-                'bytes_processed': result.bytes_processed,
-                'execution_time': result.execution_time
-            }
-            
-            self._save_cache_index()
+            # Serialize outside the write transaction
+            frame_format, blob = self._serialize_frame(result.data)
+            size_bytes = len(blob) if blob else 0
+            if size_bytes > self.max_bytes:
+                return
+            
+            # Everything but the frame is stored as JSON
+            result_fields = {field.name: getattr(result, field.name)
+                             for field in fields(QueryResult) if field.name != 'data'}
+            result_json = json.dumps(result_fields, default=str)
+            versions_json = json.dumps(table_versions) if table_versions is not None else None
+            now = time.time()
+            
+            conn = self._get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Replace through DELETE + INSERT so the totals triggers fire
+                conn.execute("DELETE FROM entries WHERE query_hash = ?", (query_hash,))
+                conn.execute(
+                    "INSERT INTO entries (query_hash, created, last_access, size_bytes, format, frame, result, table_versions) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (query_hash, now, now, size_bytes, frame_format, blob, result_json, versions_json)
+                )
+                self._evict(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
             
             self.logger.info(f"Cached result for query hash: {query_hash}")
             
         except Exception as e:
             self.logger.warning(f"Could not cache result: {str(e)}")
     
+    def _evict(self, conn: sqlite3.Connection):
+        """Evict least recently used entries until within max_bytes. Caller holds a write transaction."""
+        total = conn.execute("SELECT size_bytes FROM totals").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        
+        evicted = []
+        for query_hash, size_bytes in conn.execute(
+                "SELECT query_hash, size_bytes FROM entries ORDER BY last_access"):
+            evicted.append((query_hash,))
+            excess -= size_bytes
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE query_hash = ?", evicted)
+    
     def _remove_cache_entry(self, query_hash: str):
         """Remove cache entry"""
         try:
-            # Remove from index
-            if query_hash in self.cache_index:
-                del self.cache_index[query_hash]
-                self._save_cache_index()
-            
-            # Remove cache file
-            cache_file = os.path.join(self.cache_dir, f"{query_hash}.pkl")
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
-                
+            self._get_connection().execute("DELETE FROM entries WHERE query_hash = ?", (query_hash,))
         except Exception as e:
             self.logger.warning(f"Could not remove cache entry: {str(e)}")
     
+    def _count(self, hit: bool):
+        """Update this process's hit/miss counters"""
+        with self.stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
     def clear_expired(self):
         """Clear expired cache entries"""
-        expired_hashes = []
-        
-        for query_hash, cache_entry in self.cache_index.items():
-            if not self._is_cache_valid(cache_entry):
-                expired_hashes.append(query_hash)
-        
-        for query_hash in expired_hashes:
-            self._remove_cache_entry(query_hash)
-        
-        self.logger.info(f"Cleared {len(expired_hashes)} expired cache entries")
+        cutoff = time.time() - self.ttl_hours * 3600
+        cursor = self._get_connection().execute("DELETE FROM entries WHERE created < ?", (cutoff,))
+        self.logger.info(f"Cleared {cursor.rowcount} expired cache entries")
+    
+    def clear(self):
+        """Clear all cache entries"""
+        self._get_connection().execute("DELETE FROM entries")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        total_entries = len(self.cache_index)
-        total_size = 0
+        total_entries, total_size = self._get_connection().execute(
+            "SELECT entries, size_bytes FROM totals"
+        ).fetchone()
         
-        try:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.pkl'):
-                    filepath = os.path.join(self.cache_dir, filename)
-                    total_size += os.path.getsize(filepath)
-        except:
-            pass
+        with self.stats_lock:
+            lookups = self.hits + self.misses
+            hit_rate = self.hits / lookups if lookups else 0
         
         return {
             'total_entries': total_entries,
             'total_size_mb': total_size / (1024 * 1024),
-            'ttl_hours': self.ttl_hours
+            'max_size_mb': self.max_bytes / (1024 * 1024),
+            'ttl_hours': self.ttl_hours,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': hit_rate
         }
 
 
+class TableVersionTracker:
+    """
+    Tracks the last modification time of tables referenced by queries
+    
+    Referenced tables come from a dry run of each query (free, and memoized
+    per query) and their versions from the table metadata's modified time,
+    re-fetched at most once per refresh interval. Cached results tagged with
+    these versions are invalidated as soon as a table is modified.
+    """
+    
+    def __init__(self, client, refresh_seconds: float = 10.0, max_queries: int = 1024):
+        """
+        Initialize the tracker
+        
+        Args:
+            client: BigQuery client
+            refresh_seconds: How long a table's modified time is reused before re-fetching it
+            max_queries: Maximum number of queries whose referenced tables are memoized
+        """
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self.max_queries = max_queries
+        self.referenced_tables: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self.modified_times: Dict[str, Tuple[str, float]] = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    def get_versions(self, sql_query: str) -> Optional[Dict[str, str]]:
+        """
+        Return the last modification time of every table a query reads
+        
+        Args:
+            sql_query: SQL query
+            
+        Returns:
+            Mapping of table ID to ISO modification time, or None if the
+            referenced tables could not be determined
+        """
+        try:
+            tables = self._get_referenced_tables(sql_query)
+            return {str(table_ref): self._get_modified_time(table_ref) for table_ref in tables}
+        except Exception as e:
+            self.logger.warning(f"Could not determine table versions: {str(e)}")
+            return None
+    
+    def _get_referenced_tables(self, sql_query: str) -> List[Any]:
+        """Return the tables a query references, using a memoized dry run"""
+        query_hash = hashlib.md5(sql_query.encode()).hexdigest()
+        with self.lock:
+            if query_hash in self.referenced_tables:
+                self.referenced_tables.move_to_end(query_hash)
+                return self.referenced_tables[query_hash]
+        
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        query_job = self.client.query(sql_query, job_config=job_config)
+        tables = sorted(getattr(query_job, 'referenced_tables', None) or [], key=str)
+        
+        with self.lock:
+            self.referenced_tables[query_hash] = tables
+            while len(self.referenced_tables) > self.max_queries:
+                self.referenced_tables.popitem(last=False)
+        return tables
+    
+    def _get_modified_time(self, table_ref) -> str:
+        """Return a table's modified time, refreshed at most every refresh_seconds"""
+        table_id = str(table_ref)
+        now = time.time()
+        with self.lock:
+            entry = self.modified_times.get(table_id)
+            if entry is not None and now - entry[1] < self.refresh_seconds:
+                return entry[0]
+        
+        table = self.client.get_table(table_ref)
+        modified = table.modified.isoformat() if table.modified else ''
+        with self.lock:
+            self.modified_times[table_id] = (modified, now)
+        return modified
+
+
 class BigQueryClient:
     """BigQuery client with advanced features"""
     
@@ -229,8 +415,9 @@ class BigQueryClient:
         # Initialize BigQuery client
         self.client = self._initialize_client(credentials_path)
         
-        # Initialize cache
+        # Initialize cache; entries are invalidated when their tables are modified
         self.cache = QueryCache() if enable_cache else None
+        self.table_versions = TableVersionTracker(self.client) if enable_cache else None
         
         # Query metrics tracking
         self.metrics: List[QueryMetrics] = []
@@ -299,9 +486,11 @@ class BigQueryClient:
         start_time = time.time()
         query_hash = hashlib.md5(sql_query.encode()).hexdigest()
         
-        # Check cache first
+        # Check cache first, against the current versions of the referenced tables
+        table_versions = None
         if use_cache and self.cache:
-            cached_result = self.cache.get(sql_query)
+            table_versions = self.table_versions.get_versions(sql_query)
+            cached_result = self.cache.get(sql_query, table_versions)
             if cached_result:
                 return cached_result
         
@@ -350,7 +539,7 @@ class BigQueryClient:
             
             # Cache successful results
             if use_cache and self.cache and result.success:
-                self.cache.put(sql_query, result)
+                self.cache.put(sql_query, result, table_versions)
             
             # Track metrics
             self._track_metrics(result, sql_query)
@@ -7,6 +7,7 @@ entity extraction, intent classification, and question preprocessing.
 
 import re
 import logging
+import operator
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -14,6 +15,22 @@ import json
 from openai import OpenAI
 
 
+# Uppercase letters outside escape sequences, lowered when compiling entity patterns
+_LITERAL_UPPERCASE = re.compile(r'\\.|[A-Z]')
+
+# Question normalization, compiled once
+_WHITESPACE = re.compile(r'\s+')
+_QUOTES = re.compile(r'[""''`]')
+_ABBREVIATION_EXPANSIONS = {
+    'UPC': 'UPC code',
+    'CPI': 'competitive price index',
+    'CP': 'competitor price',
+    'PLG': 'price lookup group',
+    'KVI': 'key value item'
+}
+_ABBREVIATIONS = re.compile(r'\b(?:UPC|CPI|CP|PLG|KVI)\b', re.IGNORECASE)
+
+
 @dataclass
 class ExtractedEntity:
     """Represents an extracted entity from the question"""
@@ -97,60 +114,91 @@ class EntityExtractor:
                 r'since\s+[\'"]?(\d{4}-\d{2}-\d{2})[\'"]?'
             ]
         }
+        self._compile_patterns()
     
-    def extract_entities(self, question: str) -> List[ExtractedEntity]:
-        """Extract entities from the question"""
-        entities = []
+    def _compile_patterns(self):
+        """
+        Compile entity_patterns into two combined regexes
+        
+        The start finder is a zero-width alternation of every pattern, so a
+        single scan yields each position where some entity starts. The
+        position matcher wraps each pattern in an optional lookahead group, so
+        one match at a position reports every pattern matching there.
+        
+        Both match against the lowercased question without IGNORECASE, which
+        lets the regex engine reject most alternatives on their first character.
+        """
+        self._pattern_types = []
+        self._pattern_groups = []
+        alternatives = []
+        lookaheads = []
         
         for entity_type, patterns in self.entity_patterns.items():
             for pattern in patterns:
-                matches = re.finditer(pattern, question, re.IGNORECASE)
-                for match in matches:
-                    # Extract the actual value (use group 1 if it exists, otherwise group 0)
-                    value = match.group(1) if match.groups() else match.group(0)
-                    
-                    entity = ExtractedEntity(
-                        entity_type=entity_type,
-                        value=value.strip('\'"'),
-                        confidence=0.9,  # High confidence for regex matches
-                        start_pos=match.start(),
-                        end_pos=match.end()
-                    )
-                    entities.append(entity)
-        
-        # Remove duplicates and overlapping entities
-        entities = self._remove_overlapping_entities(entities)
-        
-        return entities
+                index = len(self._pattern_types)
+                pattern = _LITERAL_UPPERCASE.sub(lambda m: m.group() if len(m.group()) > 1 else m.group().lower(), pattern)
+                alternatives.append(pattern)
+                lookaheads.append(f"(?:(?=(?P<p{index}>{pattern})))?")
+                self._pattern_types.append(entity_type)
+        
+        self._start_finder = re.compile("(?=" + "|".join(f"(?:{p})" for p in alternatives) + ")")
+        self._position_matcher = re.compile("".join(lookaheads))
+        
+        # Group numbers of each pattern's whole match and of its first group (0 if it has none)
+        for index, pattern in enumerate(alternatives):
+            group = self._position_matcher.groupindex[f"p{index}"]
+            self._pattern_groups.append((group, group + 1 if re.compile(pattern).groups else 0))
+        self._pattern_spans = operator.itemgetter(*(group for group, _ in self._pattern_groups))
     
-    def _remove_overlapping_entities(self, entities: List[ExtractedEntity]) -> List[ExtractedEntity]:
-        """Remove overlapping entities, keeping the most specific ones"""
-        if not entities:
-            return entities
+    def extract_entities(self, question: str) -> List[ExtractedEntity]:
+        """
+        Extract entities from the question in a single left-to-right scan
         
-        # Sort by start position
-        entities.sort(key=lambda x: x.start_pos)
+        At each position where an entity starts, the longest match wins (the
+        first pattern on ties). A longer match starting inside it replaces it,
+        and scanning resumes after the kept entity, so no overlaps are produced.
+        """
+        lowered = question.lower()
+        if len(lowered) != len(question):
+            # A few characters lowercase to several; keep positions aligned with the question
+            lowered = "".join(ch.lower() if len(ch.lower()) == 1 else ch for ch in question)
         
-        filtered_entities = []
-        for entity in entities:
-            # Check if this entity overlaps with any already added entity
-            overlaps = False
-            for existing in filtered_entities:
-                if (entity.start_pos < existing.end_pos and 
-                    entity.end_pos > existing.start_pos):
-                    # Keep the more specific entity (longer or higher confidence)
-                    if (entity.end_pos - entity.start_pos > existing.end_pos - existing.start_pos or
-                        entity.confidence > existing.confidence):
-                        filtered_entities.remove(existing)
-                        break
-                    else:
-                        overlaps = True
-                        break
+        entities = []
+        starts = [match.start() for match in self._start_finder.finditer(lowered)]
+        i = 0
+        
+        while i < len(starts):
+            best = self._longest_match_at(lowered, starts[i])
+            i += 1
             
-            if not overlaps:
-                filtered_entities.append(entity)
+            # Prefer a longer entity that starts inside the current one
+            while i < len(starts) and starts[i] < best[2]:
+                candidate = self._longest_match_at(lowered, starts[i])
+                if candidate[2] - candidate[1] > best[2] - best[1]:
+                    best = candidate
+                i += 1
+            
+            entity_type, start, end, (value_start, value_end) = best
+            entities.append(ExtractedEntity(
+                entity_type=entity_type,
+                value=question[value_start:value_end].strip('\'"'),
+                confidence=0.9,  # High confidence for regex matches
+                start_pos=start,
+                end_pos=end
+            ))
         
-        return filtered_entities
+        return entities
+    
+    def _longest_match_at(self, lowered: str, pos: int) -> Tuple[str, int, int, Tuple[int, int]]:
+        """Return (entity_type, start, end, value span) of the longest pattern match at pos"""
+        regs = self._position_matcher.match(lowered, pos).regs
+        ends = [end for _, end in self._pattern_spans(regs)]
+        best_end = max(ends)
+        best_index = ends.index(best_end)
+        
+        # The value is the pattern's first group if it has one, otherwise the whole match
+        group, value_group = self._pattern_groups[best_index]
+        return self._pattern_types[best_index], pos, best_end, regs[value_group or group]
 
 
 class IntentClassifier:
@@ -351,25 +399,28 @@ class QuestionProcessor:
                 parameters={}
             )
     
+    def process_questions(self, questions: List[str]) -> List[ProcessedQuestion]:
+        """
+        Process a batch of questions, e.g. logged questions for offline evaluation
+        
+        Args:
+            questions: Natural language questions
+            
+        Returns:
+            ProcessedQuestion objects in the same order
+        """
+        return [self.process_question(question) for question in questions]
+    
     def _clean_question(self, question: str) -> str:
         """Clean and normalize the question"""
         # Remove extra whitespace
-        cleaned = re.sub(r'\s+', ' ', question.strip())
+        cleaned = _WHITESPACE.sub(' ', question.strip())
         
         # Normalize quotes
-        cleaned = re.sub(r'[""''`]', '"', cleaned)
+        cleaned = _QUOTES.sub('"', cleaned)
         
         # Normalize common abbreviations
-        replacements = {
-            r'\bUPC\b': 'UPC code',
-            r'\bCPI\b': 'competitive price index',
-            r'\bCP\b': 'competitor price',
-            r'\bPLG\b': 'price lookup group',
-            r'\bKVI\b': 'key value item'
-        }
-        
-        for pattern, replacement in replacements.items():
-            cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
+        cleaned = _ABBREVIATIONS.sub(lambda m: _ABBREVIATION_EXPANSIONS[m.group().upper()], cleaned)
         
         return cleaned
     
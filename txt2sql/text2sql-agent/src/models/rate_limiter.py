@@ -0,0 +1,167 @@
+"""
+Rate Limiter for Text-to-SQL Agent
+
+This module implements a per-client GCRA (generic cell rate algorithm)
+limiter. Each client only needs one stored value, its theoretical arrival
+time, so a check is O(1). State lives in memory or in a local SQLite
+database shared by all worker processes.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import logging
+from typing import AbstractSet, Dict, Optional, Tuple
+
+
+def client_id(api_key: Optional[str], remote_addr: Optional[str], api_keys: AbstractSet[str]) -> str:
+    """
+    Choose the rate limit bucket for a request
+    
+    Only configured API keys get their own bucket; any other key is ignored,
+    otherwise a client could send a new made-up key with every request to
+    always get a fresh bucket.
+    
+    Args:
+        api_key: Value of the request's X-API-Key header, if any
+        remote_addr: Address of the client
+        api_keys: API keys that are allowed to have their own bucket
+    
+    Returns:
+        Bucket identifier, "key:<hash>" for a configured key, otherwise "ip:<address>"
+    """
+    if api_key and api_key in api_keys:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:32]
+    return f"ip:{remote_addr}"
+
+
+class RateLimiter:
+    """
+    GCRA rate limiter with one bucket per client
+    
+    A client may make `rate_per_minute` requests per minute on average and
+    up to `burst` requests at once. A rejected check does not use up quota.
+    """
+    
+    # Remove fully replenished buckets after this many checks
+    PRUNE_INTERVAL = 1000
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS buckets (
+            client_id TEXT PRIMARY KEY,
+            tat REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+    
+    def __init__(self, rate_per_minute: int = 60, burst: int = 10, db_path: Optional[str] = None):
+        """
+        Initialize the rate limiter
+        
+        Args:
+            rate_per_minute: Sustained requests allowed per client per minute
+            burst: Requests a client may make back to back
+            db_path: SQLite database shared across processes, None to keep state in memory
+        """
+        self.emission_interval = 60.0 / rate_per_minute
+        self.limit = max(1, burst) * self.emission_interval
+        self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._checks = 0
+        self._initialized = False
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the rate limit database, creating it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            # Bucket state is disposable, so do not wait for fsync
+            conn.execute("PRAGMA synchronous=OFF")
+            with self._lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(self.SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+    
+    def acquire(self, client_id: str) -> Tuple[bool, float]:
+        """
+        Try to admit one request from a client
+        
+        Args:
+            client_id: Identifier of the bucket, e.g. an API key hash or IP address
+        
+        Returns:
+            Tuple of (allowed, seconds to wait before retrying when not allowed)
+        """
+        now = time.time()
+        if self.db_path:
+            try:
+                allowed, tat = self._acquire_sqlite(client_id, now)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Rate limit database unavailable, using in-process buckets: {str(e)}")
+                allowed, tat = self._acquire_memory(client_id, now)
+        else:
+            allowed, tat = self._acquire_memory(client_id, now)
+        
+        if allowed:
+            return True, 0.0
+        return False, max(0.0, tat + self.emission_interval - self.limit - now)
+    
+    def _acquire_memory(self, client_id: str, now: float) -> Tuple[bool, float]:
+        """Check and update a bucket held in this process"""
+        with self._lock:
+            tat = max(self._tats.get(client_id, now), now)
+            if tat + self.emission_interval - now > self.limit:
+                return False, tat
+            self._tats[client_id] = tat + self.emission_interval
+            
+            self._checks += 1
+            if self._checks % self.PRUNE_INTERVAL == 0:
+                self._tats = {key: value for key, value in self._tats.items() if value > now}
+        return True, tat
+    
+    def _acquire_sqlite(self, client_id: str, now: float) -> Tuple[bool, float]:
+        """Check and update a bucket in the shared database with one atomic upsert"""
+        conn = self._get_connection()
+        cursor = conn.execute(
+            """
+            INSERT INTO buckets (client_id, tat) VALUES (:client_id, :now + :interval)
+            ON CONFLICT (client_id) DO UPDATE SET tat = max(tat, :now) + :interval
+            WHERE max(tat, :now) + :interval - :now <= :limit
+            """,
+            {'client_id': client_id, 'now': now, 'interval': self.emission_interval, 'limit': self.limit}
+        )
+        
+        with self._lock:
+            self._checks += 1
+            prune = self._checks % self.PRUNE_INTERVAL == 0
+        if prune:
+            conn.execute("DELETE FROM buckets WHERE tat < ?", (now,))
+        
+        if cursor.rowcount > 0:
+            return True, now
+        
+        # Rejected: read the stored arrival time to compute the retry delay
+        row = conn.execute("SELECT tat FROM buckets WHERE client_id = ?", (client_id,)).fetchone()
+        return False, max(row[0], now) if row else now
+    
+    def reset(self, client_id: Optional[str] = None):
+        """Clear one client's bucket, or all buckets"""
+        with self._lock:
+            if client_id is None:
+                self._tats.clear()
+            else:
+                self._tats.pop(client_id, None)
+        
+        if self.db_path:
+            conn = self._get_connection()
+            if client_id is None:
+                conn.execute("DELETE FROM buckets")
+            else:
+                conn.execute("DELETE FROM buckets WHERE client_id = ?", (client_id,))
@@ -7,7 +7,15 @@ handles data visualization and formatting.
 
 import os
 import json
+import html
+import asyncio
+import hashlib
 import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass
 import pandas as pd
@@ -67,34 +75,54 @@ class DataFormatter:
                 df_display = df
                 truncated_note = ""
             
-            # Format numeric columns
-            df_formatted = df_display.copy()
-            for col in df_formatted.columns:
-                if df_formatted[col].dtype in ['float64', 'float32']:
-                    # Round to 2 decimal places for currency/percentages
-                    if 'price' in col.lower() or 'cost' in col.lower() or 'revenue' in col.lower():
-                        df_formatted[col] = df_formatted[col].apply(lambda x: f"${x:.2f}" if pd.notna(x) else "N/A")
-                    elif 'percent' in col.lower() or 'margin' in col.lower() or 'elasticity' in col.lower():
-                        df_formatted[col] = df_formatted[col].apply(lambda x: f"{x:.2f}" if pd.notna(x) else "N/A")
-                    else:
-                        df_formatted[col] = df_formatted[col].apply(lambda x: f"{x:.2f}" if pd.notna(x) else "N/A")
-                elif df_formatted[col].dtype in ['int64', 'int32']:
-                    df_formatted[col] = df_formatted[col].apply(lambda x: f"{x:,}" if pd.notna(x) else "N/A")
-            
-            # Convert to HTML
-            html_table = df_formatted.to_html(
-                classes='table table-striped table-hover',
-                table_id='results-table',
-                escape=False,
-                index=False
-            )
+            # Format whole columns at once instead of copying the frame and formatting cell by cell
+            headers = [str(col) for col in df_display.columns]
+            columns = [self._format_column(df_display.iloc[:, i], name) for i, name in enumerate(headers)]
             
-            return truncated_note + html_table
+            return truncated_note + self._write_html_table(headers, columns)
             
         except Exception as e:
             self.logger.error(f"Error formatting DataFrame: {str(e)}")
             return f"<p>Error formatting data: {str(e)}</p>"
     
+    def _format_column(self, series: pd.Series, name: str) -> List[str]:
+        """Format one column as display strings"""
+        name_lower = name.lower()
+        
+        if series.dtype in ['float64', 'float32']:
+            # Round to 2 decimal places; currency columns get a dollar sign
+            values = series.to_numpy(dtype=np.float64)
+            if 'price' in name_lower or 'cost' in name_lower or 'revenue' in name_lower:
+                formatted = np.char.mod("$%.2f", values).astype(object)
+            else:
+                formatted = np.char.mod("%.2f", values).astype(object)
+            formatted[np.isnan(values)] = "N/A"
+            return formatted.tolist()
+        elif series.dtype in ['int64', 'int32']:
+            return list(map("{:,}".format, series.tolist()))
+        
+        # Other columns keep pandas' string conversion; missing values read N/A like numeric ones
+        formatted = series.astype(str).where(series.notna(), "N/A")
+        return [html.escape(value) for value in formatted.tolist()]
+    
+    def _write_html_table(self, headers: List[str], columns: List[List[str]]) -> str:
+        """Write formatted columns directly as an HTML table"""
+        lines = [
+            '<table border="1" class="dataframe table table-striped table-hover" id="results-table">',
+            '  <thead>',
+            '    <tr style="text-align: right;">'
+        ]
+        lines.extend(f"      <th>{html.escape(header)}</th>" for header in headers)
+        lines.extend(['    </tr>', '  </thead>', '  <tbody>'])
+        
+        for row in zip(*columns):
+            lines.append('    <tr>')
+            lines.extend(f"      <td>{value}</td>" for value in row)
+            lines.append('    </tr>')
+        
+        lines.extend(['  </tbody>', '</table>'])
+        return "\n".join(lines)
+    
     def create_summary_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Create summary statistics from DataFrame"""
         if df is None or df.empty:
@@ -128,16 +156,48 @@ class DataFormatter:
 
 
 class DataVisualizer:
-    """Creates visualizations from query results"""
+    """
+    Creates visualizations from query results
     
-    def __init__(self):
+    Charts are rendered in a process pool so matplotlib work does not hold the
+    request thread, and rendered images are cached by (SQL hash, chart type).
+    """
+    
+    def __init__(self, chart_workers: int = 2, render_timeout: float = 30.0,
+                 cache_size: int = 128):
+        """
+        Initialize the visualizer
+        
+        Args:
+            chart_workers: Number of chart rendering processes, 0 to render in the calling thread
+            render_timeout: Seconds to wait for a chart before giving up on it
+            cache_size: Maximum number of rendered charts to keep
+        """
         self.logger = logging.getLogger(__name__)
         # Set style for better-looking plots
         plt.style.use('seaborn-v0_8')
         sns.set_palette("husl")
+        
+        self.chart_workers = chart_workers
+        self.render_timeout = render_timeout
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        # pyplot keeps global state, so in-thread rendering is serialized
+        self.render_lock = threading.Lock()
+        
+        # Rendered charts: (sql hash, chart type) -> (data fingerprint, base64 image)
+        self.cache: "OrderedDict[Tuple[str, str], Tuple[int, str]]" = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        if chart_workers > 0:
+            # Start the workers now, before the application begins serving requests
+            self._get_pool()
     
     def create_visualization(self, df: pd.DataFrame, intent: str, 
-                           question: str) -> Optional[str]:
+                           question: str, sql_query: Optional[str] = None) -> Optional[str]:
         """
         Create appropriate visualization based on data and intent
         
@@ -145,6 +205,7 @@ class DataVisualizer:
             df: DataFrame with query results
             intent: Query intent (e.g., 'price_analysis', 'sales_analysis')
             question: Original question for context
+            sql_query: SQL that produced the data, used as the chart cache key
             
         Returns:
             Base64 encoded image string or None
@@ -156,23 +217,122 @@ class DataVisualizer:
             # Determine visualization type based on intent and data
             viz_type = self._determine_viz_type(df, intent, question)
             
-            if viz_type == 'bar_chart':
-                return self._create_bar_chart(df)
-            elif viz_type == 'line_chart':
-                return self._create_line_chart(df)
-            elif viz_type == 'scatter_plot':
-                return self._create_scatter_plot(df)
-            elif viz_type == 'histogram':
-                return self._create_histogram(df)
-            elif viz_type == 'pie_chart':
-                return self._create_pie_chart(df)
-            else:
-                return self._create_default_chart(df)
+            cache_key = (hashlib.md5(sql_query.encode()).hexdigest(), viz_type) if sql_query else None
+            fingerprint = self._fingerprint(df) if cache_key else None
+            if fingerprint is not None:
+                image = self._cache_get(cache_key, fingerprint)
+                if image is not None:
+                    return image
+            
+            image = self._render_in_pool(viz_type, df)
+            
+            if fingerprint is not None and image is not None:
+                self._cache_set(cache_key, fingerprint, image)
+            return image
                 
         except Exception as e:
             self.logger.error(f"Error creating visualization: {str(e)}")
             return None
     
+    def render_chart(self, viz_type: str, df: pd.DataFrame) -> str:
+        """Render a chart of the given type in this process"""
+        if viz_type == 'bar_chart':
+            return self._create_bar_chart(df)
+        elif viz_type == 'line_chart':
+            return self._create_line_chart(df)
+        elif viz_type == 'scatter_plot':
+            return self._create_scatter_plot(df)
+        elif viz_type == 'histogram':
+            return self._create_histogram(df)
+        elif viz_type == 'pie_chart':
+            return self._create_pie_chart(df)
+        else:
+            return self._create_default_chart(df)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get chart cache statistics"""
+        with self.cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'entries': len(self.cache),
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': self.cache_hits / lookups if lookups > 0 else 0,
+                'chart_workers': self.chart_workers
+            }
+    
+    def close(self):
+        """Shut down the chart rendering processes"""
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+    
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Get the chart rendering pool, starting it if needed"""
+        with self.pool_lock:
+            if self.pool is None and self.chart_workers > 0:
+                try:
+                    # Forking would copy the parent's threads and locks (tracing, pools)
+                    # into the workers, so start them from a clean process instead. Those
+                    # re-import the main module, which is why main.py only starts app.py
+                    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self.pool = ProcessPoolExecutor(max_workers=self.chart_workers,
+                                                    mp_context=multiprocessing.get_context(start_method),
+                                                    initializer=_init_chart_worker)
+                    # Submitting a task starts the worker processes
+                    self.pool.submit(_ping_chart_worker)
+                except Exception as e:
+                    self.logger.warning(f"Chart rendering pool unavailable, rendering in-thread: {str(e)}")
+                    self.chart_workers = 0
+            return self.pool
+    
+    def _render_in_pool(self, viz_type: str, df: pd.DataFrame) -> Optional[str]:
+        """Render a chart in the process pool, falling back to this thread"""
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                return pool.submit(_render_chart, viz_type, df).result(timeout=self.render_timeout)
+            except FutureTimeoutError:
+                self.logger.warning(f"Rendering {viz_type} timed out after {self.render_timeout}s")
+                return None
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for the next chart
+                self.logger.warning("Chart rendering pool broke, restarting it")
+                with self.pool_lock:
+                    if self.pool is pool:
+                        self.pool = None
+        
+        with self.render_lock:
+            return self.render_chart(viz_type, df)
+    
+    def _fingerprint(self, df: pd.DataFrame) -> Optional[int]:
+        """Hash the data so a cached chart is only reused for the same result"""
+        try:
+            return int(pd.util.hash_pandas_object(df, index=False).sum())
+        except TypeError:
+            # Unhashable cell values, e.g. lists; skip caching
+            return None
+    
+    def _cache_get(self, key: Tuple[str, str], fingerprint: int) -> Optional[str]:
+        """Get a cached chart rendered from the same data"""
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self.cache.move_to_end(key)
+                self.cache_hits += 1
+                return entry[1]
+            self.cache_misses += 1
+        return None
+    
+    def _cache_set(self, key: Tuple[str, str], fingerprint: int, image: str):
+        """Cache a rendered chart, evicting the least recently used"""
+        with self.cache_lock:
+            self.cache.pop(key, None)
+            self.cache[key] = (fingerprint, image)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+    
     def _determine_viz_type(self, df: pd.DataFrame, intent: str, question: str) -> str:
         """Determine the best visualization type"""
         question_lower = question.lower()
@@ -249,9 +409,10 @@ class DataVisualizer:
         if date_cols and numeric_cols:
             date_col = date_cols[0]
             
-            # Convert date column to datetime if it's not already
+            # Convert date column to datetime if it's not already, without
+            # modifying the caller's frame
             if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
-                df[date_col] = pd.to_datetime(df[date_col])
+                df = df.assign(**{date_col: pd.to_datetime(df[date_col])})
             
             # Sort by date
             df_sorted = df.sort_values(date_col)
@@ -353,19 +514,40 @@ class DataVisualizer:
         return image_base64
 
 
+# Visualizer used inside chart rendering worker processes
+_worker_visualizer = None
+
+
+def _init_chart_worker():
+    """Set up matplotlib once per chart rendering process"""
+    global _worker_visualizer
+    _worker_visualizer = DataVisualizer(chart_workers=0)
+
+
+def _ping_chart_worker() -> bool:
+    """No-op task used to start the worker processes"""
+    return True
+
+
+def _render_chart(viz_type: str, df: pd.DataFrame) -> str:
+    """Render a chart in a worker process"""
+    return _worker_visualizer.render_chart(viz_type, df)
+
+
 class ResponseGenerator:
     """Main response generation class using GPT-4o"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, chart_workers: int = 2):
         """
         Initialize Response Generator
         
         Args:
             api_key: OpenAI API key (uses environment variable if not provided)
+            chart_workers: Number of chart rendering processes, 0 to render in the request thread
         """
         self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
         self.data_formatter = DataFormatter()
-        self.data_visualizer = DataVisualizer()
+        self.data_visualizer = DataVisualizer(chart_workers=chart_workers)
         self.logger = logging.getLogger(__name__)
     
     def generate_response(self, context: ResponseContext) -> GeneratedResponse:
@@ -392,38 +574,78 @@ class ResponseGenerator:
             
             # Create visualization
             visualization = self.data_visualizer.create_visualization(
-                query_result.data, context.intent, context.original_question
+                query_result.data, context.intent, context.original_question,
+                sql_query=context.sql_query
             )
             
             # Generate natural language response
             text_response = self._generate_text_response(context, summary_stats)
             
-            # Extract key insights
-            key_insights = self._extract_key_insights(context, summary_stats)
-            
-            # Generate summary
-            summary = self._generate_summary(context, summary_stats)
-            
-            return GeneratedResponse(
-                text_response=text_response,
-                summary=summary,
-                key_insights=key_insights,
-                data_table=data_table,
-                visualization=visualization,
-                confidence_score=0.9,  # High confidence for successful queries
-                response_type=context.intent,
-                metadata={
-                    'row_count': query_result.row_count,
-                    'execution_time': query_result.execution_time,
-                    'cache_hit': query_result.cache_hit,
-                    'summary_stats': summary_stats
-                }
+            return self._assemble_response(context, summary_stats, text_response, data_table, visualization)
+            
+        except Exception as e:
+            self.logger.error(f"Error generating response: {str(e)}")
+            return self._generate_error_response(context, str(e))
+    
+    async def generate_response_async(self, context: ResponseContext) -> GeneratedResponse:
+        """
+        Asynchronous version of generate_response
+        
+        The text response, data table and visualization only depend on the
+        query results, so they are produced concurrently in worker threads.
+        """
+        try:
+            query_result = context.query_result
+            
+            if not query_result.success:
+                return self._generate_error_response(context)
+            
+            # The text response prompt needs the summary statistics
+            summary_stats = self.data_formatter.create_summary_stats(query_result.data)
+            
+            text_response, data_table, visualization = await asyncio.gather(
+                asyncio.to_thread(self._generate_text_response, context, summary_stats),
+                asyncio.to_thread(self.data_formatter.format_dataframe, query_result.data),
+                asyncio.to_thread(
+                    self.data_visualizer.create_visualization,
+                    query_result.data, context.intent, context.original_question, context.sql_query
+                )
             )
             
+            return self._assemble_response(context, summary_stats, text_response, data_table, visualization)
+            
         except Exception as e:
             self.logger.error(f"Error generating response: {str(e)}")
             return self._generate_error_response(context, str(e))
     
+    def _assemble_response(self, context: ResponseContext, summary_stats: Dict[str, Any],
+                           text_response: str, data_table: str,
+                           visualization: Optional[str]) -> GeneratedResponse:
+        """Combine the generated parts with insights and a summary"""
+        query_result = context.query_result
+        
+        # Extract key insights
+        key_insights = self._extract_key_insights(context, summary_stats)
+        
+        # Generate summary
+        summary = self._generate_summary(context, summary_stats)
+        
+        return GeneratedResponse(
+            text_response=text_response,
+            summary=summary,
+            key_insights=key_insights,
+            data_table=data_table,
+            visualization=visualization,
+            confidence_score=0.9,  # High confidence for successful queries
+            response_type=context.intent,
+            metadata={
+                'row_count': query_result.row_count,
+                'execution_time': query_result.execution_time,
+                'cache_hit': query_result.cache_hit,
+                'summary_stats': summary_stats
+            }
+        )
+    
     def _generate_text_response(self, context: ResponseContext, 
                               summary_stats: Dict[str, Any]) -> str:
         """Generate natural language text response using GPT-4o"""
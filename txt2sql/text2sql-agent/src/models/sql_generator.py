@@ -8,9 +8,13 @@ using OpenAI's GPT-4o model with sophisticated prompt engineering.
 import os
 import re
 import json
+import time
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from openai import OpenAI
 import sqlparse
 from sqlparse import sql, tokens
@@ -28,6 +32,8 @@ from opentelemetry import trace
 from fi_instrumentation.fi_types import SpanAttributes, FiSpanKindValues
 
 from fi.evals import Evaluator
+from .background_evaluations import submit_evaluation
+from .sqlite_client import format_table_schema, schema_json_default
 evaluator = Evaluator(fi_api_key=os.getenv("FI_API_KEY"), fi_secret_key=os.getenv("FI_SECRET_KEY"))
 
 tracer = FITracer(trace.get_tracer(__name__))
@@ -54,6 +60,89 @@ class GeneratedSQL:
     validation_errors: List[str]
 
 
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookups: collapse whitespace and drop trailing punctuation"""
+    return " ".join(question.split()).rstrip("?!. ")
+
+
+class GenerationCache:
+    """
+    In-memory LRU cache of validated GeneratedSQL results
+    
+    Entries are keyed on the normalized question and a fingerprint of the
+    schema context the SQL was generated against, so a schema change misses.
+    """
+    
+    def __init__(self, max_size: int = 1000, ttl_seconds: int = 24 * 3600):
+        self.cache: "OrderedDict[str, Tuple[GeneratedSQL, float]]" = OrderedDict()
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        
+        # Cache counters
+        self.hits = 0
+        self.misses = 0
+    
+    def _generate_key(self, question: str, schema_fingerprint: str) -> str:
+        """Generate cache key from the normalized question and schema fingerprint"""
+        key_source = normalize_question(question) + "\x00" + schema_fingerprint
+        return hashlib.sha256(key_source.encode()).hexdigest()
+    
+    def get(self, question: str, schema_fingerprint: str) -> Optional[GeneratedSQL]:
+        """Get a cached result if available and not expired"""
+        key = self._generate_key(question, schema_fingerprint)
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                result, timestamp = entry
+                if time.time() - timestamp < self.ttl_seconds:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    return replace(
+                        result,
+                        tables_used=list(result.tables_used),
+                        columns_used=list(result.columns_used),
+                        validation_errors=list(result.validation_errors)
+                    )
+                del self.cache[key]
+            
+            self.misses += 1
+        return None
+    
+    def set(self, question: str, schema_fingerprint: str, result: GeneratedSQL):
+        """Cache a result; only SQL that passed validation is stored"""
+        if not result.sql_query or result.validation_errors:
+            return
+        key = self._generate_key(question, schema_fingerprint)
+        with self.lock:
+            self.cache.pop(key, None)
+            self.cache[key] = (replace(result), time.time())
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+    
+    def invalidate(self, question: str, schema_fingerprint: str):
+        """Drop a cached result, e.g. after its SQL failed to execute"""
+        key = self._generate_key(question, schema_fingerprint)
+        with self.lock:
+            self.cache.pop(key, None)
+    
+    def clear(self):
+        """Clear all cached results"""
+        with self.lock:
+            self.cache.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0
+            }
+
+
 class SQLValidator:
     """Validates generated SQL queries for safety and correctness"""
     
@@ -210,16 +299,24 @@ Common tables: competitor_prices, cpi_analysis, products
 Key columns: cp_unit_price, cpi_value, competitor_name, price_gap
 """
 
+    def get_query_type_context(self, query_type: str = "general") -> str:
+        """Get the extra prompt context for a query type, empty for general queries"""
+        if query_type == "pricing_analysis":
+            return self.PRICING_ANALYSIS_PROMPT
+        elif query_type == "elasticity_analysis":
+            return self.ELASTICITY_ANALYSIS_PROMPT
+        elif query_type == "competitive_analysis":
+            return self.COMPETITIVE_ANALYSIS_PROMPT
+        
+        return ""
+    
     def get_system_prompt(self, query_type: str = "general") -> str:
         """Get system prompt based on query type"""
         base = self.BASE_SYSTEM_PROMPT
+        query_type_context = self.get_query_type_context(query_type)
         
-        if query_type == "pricing_analysis":
-            return base + "\n" + self.PRICING_ANALYSIS_PROMPT
-        elif query_type == "elasticity_analysis":
-            return base + "\n" + self.ELASTICITY_ANALYSIS_PROMPT
-        elif query_type == "competitive_analysis":
-            return base + "\n" + self.COMPETITIVE_ANALYSIS_PROMPT
+        if query_type_context:
+            return base + "\n" + query_type_context
         
         return base
 
@@ -227,18 +324,25 @@ Key columns: cp_unit_price, cpi_value, competitor_name, price_gap
 class SQLGenerator:
     """Main SQL generation class using OpenAI GPT-4o"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache_enabled: bool = True):
         """
         Initialize SQL Generator
         
         Args:
             api_key: OpenAI API key (uses environment variable if not provided)
+            cache_enabled: Reuse validated SQL for repeated questions against the same schema
         """
         self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
         self.validator = SQLValidator()
         self.prompt_template = PromptTemplate()
+        self.cache = GenerationCache() if cache_enabled else None
         self.logger = logging.getLogger(__name__)
         
+        # Prompt tokens sent and served from the provider's prompt cache
+        self.prompt_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.stats_lock = threading.Lock()
+        
         # Query type classification patterns
         self.query_patterns = {
             'pricing_analysis': [
@@ -298,12 +402,25 @@ class SQLGenerator:
                 GeneratedSQL object with query and metadata
             """
             try:
+                # The schema context is the stable prompt prefix and identifies the schema
+                context_prefix = self._build_context_prefix(context)
+                schema_fingerprint = self._fingerprint(context_prefix)
+                
+                # Reuse validated SQL for a repeated question against the same schema
+                if self.cache:
+                    cached_sql = self.cache.get(question, schema_fingerprint)
+                    span.set_attribute("cache_hit", cached_sql is not None)
+                    if cached_sql is not None:
+                        span.set_attribute("output.value", cached_sql.sql_query)
+                        return cached_sql
+                
                 # Classify query type
                 query_type = self.classify_query_type(question)
                 
-                # Build context-aware prompt
-                system_prompt = self.prompt_template.get_system_prompt(query_type)
-                user_prompt = self._build_user_prompt(question, context)
+                # Build context-aware prompt; the system prompt and schema block
+                # come first and do not vary, so provider-side prompt caching hits
+                system_prompt = self.prompt_template.get_system_prompt()
+                user_prompt = self._build_user_prompt(question, context, query_type, context_prefix)
                 
                 # Generate SQL using GPT-4o
                 response = self.client.chat.completions.create(
@@ -317,6 +434,8 @@ class SQLGenerator:
                     response_format={"type": "json_object"}
                 )
                 
+                self._record_prompt_usage(response)
+                
                 # Parse response
                 result = json.loads(response.choices[0].message.content)
                 
@@ -337,6 +456,8 @@ class SQLGenerator:
                 if not is_valid:
                     self.logger.warning(f"Generated SQL failed validation: {validation_errors}")
                     generated_sql.confidence_score *= 0.5  # Reduce confidence for invalid queries
+                elif self.cache:
+                    self.cache.set(question, schema_fingerprint, generated_sql)
                 
                 span.set_attribute("output.value", generated_sql.sql_query)
                 span.set_attribute("tables_used.value", generated_sql.tables_used)
@@ -355,11 +476,7 @@ class SQLGenerator:
                     },
                     "model_name" : "turing_large"
                 }
-                eval_result1 = evaluator.evaluate(
-                    **config_text_to_sql, 
-                    custom_eval_name="text_to_sql", 
-                    trace_eval=True
-                )
+                submit_evaluation(evaluator, config_text_to_sql, "text_to_sql")
 
                 print("#########################")
                 print("evaluate_function_calling")
@@ -374,11 +491,7 @@ class SQLGenerator:
                     },
                     "model_name" : "turing_large"
                 }
-                eval_result2 = evaluator.evaluate(
-                    **config_evaluate_function_calling, 
-                    custom_eval_name="evaluate_function_calling", 
-                    trace_eval=True
-                )
+                submit_evaluation(evaluator, config_evaluate_function_calling, "evaluate_function_calling")
 
                 print("#########################")
                 print("sql_syntactic_correctness")
@@ -391,31 +504,23 @@ class SQLGenerator:
                     },
                     "model_name" : "turing_large"
                 }   
-                eval_result3 = evaluator.evaluate(
-                    **config_sql_syntactic_correctness, 
-                    custom_eval_name="sql_syntactic_correctness", 
-                    trace_eval=True
-                )
+                submit_evaluation(evaluator, config_sql_syntactic_correctness, "sql_syntactic_correctness")
 
                 print("#########################")
                 print("schema_adherence")
-                print(json.dumps(context.table_schemas))
+                print(json.dumps(context.table_schemas, default=schema_json_default))
                 print(json.dumps(generated_sql.sql_query))
                 print("#########################")
                 config_schema_adherence = {
                     "eval_templates" : "schema_adherence",
                     "inputs" : {
-                        "schema_details": json.dumps(context.table_schemas),
+                        "schema_details": json.dumps(context.table_schemas, default=schema_json_default),
                         "sql_query": json.dumps(generated_sql.sql_query),
                     },
                     "model_name" : "turing_large"
                 }
                 
-                eval_result4 = evaluator.evaluate(
-                    **config_schema_adherence,
-                    custom_eval_name="schema_adherence", 
-                    trace_eval=True
-                )
+                submit_evaluation(evaluator, config_schema_adherence, "schema_adherence")
 
                 return generated_sql
             
@@ -433,38 +538,25 @@ class SQLGenerator:
                     validation_errors=[str(e)]
                 )
     
-    def _build_user_prompt(self, question: str, context: QueryContext) -> str:
-        """Build user prompt with question and context"""
+    def _build_context_prefix(self, context: QueryContext) -> str:
+        """
+        Build the part of the user prompt that only depends on the schema context
+        
+        Schemas, database notes, the table list and business rules come first and
+        in a fixed order, so the prompt prefix is identical across questions.
+        """
         prompt_parts = [
-            f"QUESTION: {question}",
-            "",
             "AVAILABLE TABLES AND SCHEMAS (USE EXACT COLUMN NAMES):"
         ]
         
-        # Add table schemas with detailed information
-        for table_name, schema in context.table_schemas.items():
-            prompt_parts.append(f"\nTable: {table_name}")
-            prompt_parts.append(f"Description: {schema.get('description', 'No description available')}")
-            
-            if isinstance(schema, dict) and 'columns' in schema:
-                prompt_parts.append("Columns:")
-                for col in schema['columns']:
-                    col_info = f"  - {col['name']} ({col['type']})"
-                    if col.get('description'):
-                        col_info += f": {col['description']}"
-                    # Add constraint information if available
-                    if col.get('primary_key'):
-                        col_info += " [PRIMARY KEY]"
-                    if col.get('nullable') is False:
-                        col_info += " [NOT NULL]"
-                    prompt_parts.append(col_info)
-            
-            # Add sample data if available to show actual data patterns
-            if isinstance(schema, dict) and schema.get('sample_data'):
-                prompt_parts.append("Sample data (showing actual values):")
-                for i, row in enumerate(schema['sample_data'][:2]):  # Show 2 sample rows
-                    row_str = ", ".join([f"{k}='{v}'" for k, v in row.items() if v is not None])
-                    prompt_parts.append(f"  Sample {i+1}: {row_str}")
+        # Add table schemas with detailed information, using the text
+        # precomputed by the schema catalog when available
+        schema_prompt = context.metadata.get('schema_prompt')
+        if schema_prompt:
+            prompt_parts.append(schema_prompt)
+        else:
+            for table_name, schema in context.table_schemas.items():
+                prompt_parts.append(format_table_schema(table_name, schema))
         
         # Add database type context
         if context.metadata.get('database_type') == 'sqlite':
@@ -484,6 +576,20 @@ class SQLGenerator:
             for rule in context.business_rules:
                 prompt_parts.append(f"  - {rule}")
         
+        return "\n".join(prompt_parts)
+    
+    def _build_user_prompt(self, question: str, context: QueryContext, query_type: str = "general",
+                           context_prefix: Optional[str] = None) -> str:
+        """Build user prompt with the schema context first and the question last"""
+        prompt_parts = [
+            context_prefix if context_prefix is not None else self._build_context_prefix(context)
+        ]
+        
+        # Add query type specific guidance
+        query_type_context = self.prompt_template.get_query_type_context(query_type)
+        if query_type_context:
+            prompt_parts.append(query_type_context.rstrip())
+        
         # Add similar queries as examples
         if context.similar_queries:
             prompt_parts.append("\nSIMILAR QUERY EXAMPLES:")
@@ -499,8 +605,40 @@ class SQLGenerator:
         prompt_parts.append("- Use appropriate JOIN conditions")
         prompt_parts.append("- Include reasonable LIMIT clauses")
         
+        prompt_parts.append(f"\nQUESTION: {question}")
+        
         return "\n".join(prompt_parts)
     
+    def _fingerprint(self, context_prefix: str) -> str:
+        """Fingerprint the schema context a query is generated against"""
+        return hashlib.sha256(context_prefix.encode()).hexdigest()
+    
+    def _record_prompt_usage(self, response):
+        """Accumulate prompt tokens and those served from the provider's prompt cache"""
+        usage = getattr(response, 'usage', None)
+        details = getattr(usage, 'prompt_tokens_details', None)
+        with self.stats_lock:
+            self.prompt_tokens += getattr(usage, 'prompt_tokens', 0) or 0
+            self.cached_prompt_tokens += getattr(details, 'cached_tokens', 0) or 0
+    
+    def invalidate_cached_sql(self, question: str, context: QueryContext):
+        """Drop the cached SQL for a question, e.g. after it failed to execute"""
+        if self.cache:
+            self.cache.invalidate(question, self._fingerprint(self._build_context_prefix(context)))
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache and provider prompt cache statistics"""
+        with self.stats_lock:
+            prompt_tokens = self.prompt_tokens
+            cached_prompt_tokens = self.cached_prompt_tokens
+        
+        return {
+            'response_cache': self.cache.get_stats() if self.cache else {'enabled': False},
+            'prompt_tokens': prompt_tokens,
+            'cached_prompt_tokens': cached_prompt_tokens,
+            'prompt_cache_hit_rate': cached_prompt_tokens / prompt_tokens if prompt_tokens > 0 else 0
+        }
+    
     def refine_sql(self, original_sql: str, feedback: str, context: QueryContext) -> GeneratedSQL:
         with tracer.start_as_current_span("refine_sql") as span:
             span.set_attribute("refine_sql", "refine_sql")
@@ -555,6 +693,8 @@ class SQLGenerator:
                     response_format={"type": "json_object"}
                 )
                 
+                self._record_prompt_usage(response)
+                
                 result = json.loads(response.choices[0].message.content)
                 
                 # Validate refined SQL
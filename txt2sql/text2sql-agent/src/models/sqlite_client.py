@@ -6,16 +6,28 @@ providing local database operations for the text-to-SQL system.
 """
 
 import os
+import re
+import math
 import sqlite3
 import logging
 import time
 import json
 import hashlib
-from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass, asdict
+import hmac
+import secrets
+import zlib
+import base64
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Any, Union, Iterator, Mapping
+from types import MappingProxyType
+from dataclasses import dataclass, asdict, field, replace
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import threading
+import queue
+from contextlib import contextmanager
+from pathlib import Path
 from fi_instrumentation import register, FITracer
 from fi_instrumentation.fi_types import ProjectType
 from traceai_openai import OpenAIInstrumentor
@@ -27,6 +39,11 @@ from fi_instrumentation.fi_types import (
 )
 from opentelemetry import trace
 
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow record batches are optional
+    pa = None
+
 evaluator = Evaluator(fi_api_key=os.getenv("FI_API_KEY"), fi_secret_key=os.getenv("FI_SECRET_KEY"))
 
 tracer = FITracer(trace.get_tracer(__name__))
@@ -52,68 +69,1291 @@ class TableSchema:
     sample_data: Optional[List[Dict[str, Any]]] = None
 
 
+@dataclass(frozen=True)
+class SchemaSnapshot:
+    """
+    Schema catalog captured at one PRAGMA schema_version
+    
+    Snapshots are shared by every caller and read-only all the way down:
+    sequences are tuples and mappings are MappingProxyType views.
+    """
+    schema_version: int
+    tables: Tuple[str, ...]
+    schema_dicts: Mapping[str, Mapping[str, Any]]  # Per table, in the dict format used by the SQL generator
+    prompt_text: str
+
+
+def schema_json_default(value: Any) -> Any:
+    """json.dumps default that writes read-only mappings (e.g. from a SchemaSnapshot) as objects"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+# Tokens of a SQL statement, in match order: comments, string literals,
+# quoted identifiers, numbers, words, then any other single character
+SQL_TOKEN_PATTERN = re.compile(
+    r"(?P<comment>--[^\n]*|/\*.*?(?:\*/|$))"
+    r"|(?P<string>'(?:[^']|'')*')"
+    r"|(?P<quoted>\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])"
+    r"|(?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_$]*)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>.)",
+    re.DOTALL
+)
+
+
+def canonicalize_sql(query: str) -> str:
+    """
+    Canonicalize a SQL statement for use as a cache key
+    
+    Comments and trailing semicolons are dropped, whitespace is normalized,
+    unquoted keywords and identifiers are lowercased (SQLite treats them
+    case-insensitively) and numeric literals are lowercased. String literals
+    and quoted identifiers are kept verbatim because their case matters.
+    
+    Args:
+        query: SQL query string
+        
+    Returns:
+        Canonical form of the query
+    """
+    tokens = []
+    for match in SQL_TOKEN_PATTERN.finditer(query):
+        kind = match.lastgroup
+        if kind in ('comment', 'space'):
+            continue
+        value = match.group()
+        if kind in ('word', 'number'):
+            value = value.lower()
+        tokens.append(value)
+    
+    while tokens and tokens[-1] == ';':
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def format_table_schema(table_name: str, schema: Dict[str, Any]) -> str:
+    """
+    Format one table schema for the SQL generation prompt
+    
+    Used both for the cached schema catalog text and by SQLGenerator, so
+    the prompt layout is defined in one place.
+    
+    Args:
+        table_name: Name of the table
+        schema: Schema dictionary with columns and optional sample_data
+        
+    Returns:
+        Prompt text for the table
+    """
+    prompt_parts = [
+        f"\nTable: {table_name}",
+        f"Description: {schema.get('description', 'No description available')}"
+    ]
+    
+    if 'columns' in schema:
+        prompt_parts.append("Columns:")
+        for col in schema['columns']:
+            col_info = f"  - {col['name']} ({col['type']})"
+            if col.get('description'):
+                col_info += f": {col['description']}"
+            if col.get('primary_key'):
+                col_info += " [PRIMARY KEY]"
+            if col.get('nullable') is False:
+                col_info += " [NOT NULL]"
+            prompt_parts.append(col_info)
+    
+    if schema.get('sample_data'):
+        prompt_parts.append("Sample data (showing actual values):")
+        for i, row in enumerate(schema['sample_data'][:2]):
+            row_str = ", ".join([f"{k}='{v}'" for k, v in row.items() if v is not None])
+            prompt_parts.append(f"  Sample {i+1}: {row_str}")
+    
+    return "\n".join(prompt_parts)
+
+
+def freeze_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copy a DataFrame into read-only column arrays
+    
+    In-place writes to the result (or to shallow copies of it) raise
+    ValueError instead of changing the data, so the frame can be shared.
+    Extension-typed columns are shared as they are.
+    
+    Args:
+        df: DataFrame to freeze
+        
+    Returns:
+        DataFrame with the same columns, index and values
+    """
+    arrays = {}
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if isinstance(column.dtype, np.dtype):
+            values = column.to_numpy(copy=True)
+            values.setflags(write=False)
+        else:
+            values = column.array
+        arrays[position] = values
+    frozen = pd.DataFrame(arrays, index=df.index, copy=False)
+    frozen.columns = df.columns
+    return frozen
+
+
 class QueryCache:
-    """Simple in-memory cache for query results"""
+    """
+    In-memory LRU cache for query results, bounded by entry count and DataFrame memory
     
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
-        self.cache: Dict[str, Tuple[QueryResult, float]] = {}
+    Entries can be tagged with the data versions of the tables a query read;
+    a lookup with different versions treats the entry as stale. Cached frames
+    are frozen, so hits share their data without copying it.
+    """
+    
+    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600,
+                 max_bytes: int = 256 * 1024 * 1024):
+        self.cache: "OrderedDict[str, Tuple[QueryResult, float, int, Optional[Dict[str, int]]]]" = OrderedDict()
         self.max_size = max_size
+        self.max_bytes = max_bytes
         self.ttl_seconds = ttl_seconds
+        self.size_bytes = 0
         self.lock = threading.Lock()
+        
+        # Cache counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
     
-    def _generate_key(self, query: str) -> str:
-        """Generate cache key from query"""
-        return hashlib.md5(query.lower().strip().encode()).hexdigest()
+    def _generate_key(self, query: str, params: Optional[Tuple] = None) -> str:
+        """Generate cache key from the canonical query and its parameters"""
+        key_source = canonicalize_sql(query)
+        if params:
+            key_source += "\x00" + json.dumps(params, default=str)
+        return hashlib.md5(key_source.encode()).hexdigest()
     
-    def get(self, query: str) -> Optional[QueryResult]:
-        """Get cached result if available and not expired"""
+    def get(self, query: str, params: Optional[Tuple] = None,
+            table_versions: Optional[Dict[str, int]] = None) -> Optional[QueryResult]:
+        """Get cached result if available, not expired and computed from the current table versions"""
+        key = self._generate_key(query, params)
         with self.lock:
-            key = self._generate_key(query)
-            if key in self.cache:
-                result, timestamp = self.cache[key]
-                if time.time() - timestamp < self.ttl_seconds:
-                    # Create a copy with cache_hit = True
-                    cached_result = QueryResult(
+            entry = self.cache.get(key)
+            if entry is not None:
+                result, timestamp, _, versions = entry
+                if versions != table_versions:
+                    # A referenced table changed since the result was cached
+                    self._remove(key)
+                    self.invalidations += 1
+                elif time.time() - timestamp < self.ttl_seconds:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
+                    
+                    # Share the frozen cached data instead of copying it; the
+                    # shallow copy keeps callers from replacing cached columns
+                    return QueryResult(
                         success=result.success,
-                        data=result.data.copy() if result.data is not None else None,
+                        data=result.data.copy(deep=False) if result.data is not None else None,
                         row_count=result.row_count,
                         execution_time=result.execution_time,
                         error_message=result.error_message,
                         cache_hit=True,
-                        metadata=result.metadata.copy()
+                        metadata=dict(result.metadata)
                     )
-                    return cached_result
                 else:
                     # Remove expired entry
-                    del self.cache[key]
+                    self._remove(key)
+                    self.expirations += 1
+            
+            self.misses += 1
         return None
     
-    def set(self, query: str, result: QueryResult):
-        """Cache query result"""
+    def set(self, query: str, result: QueryResult, params: Optional[Tuple] = None,
+            table_versions: Optional[Dict[str, int]] = None):
+        """Cache query result, tagged with the table versions it was computed from"""
+        key = self._generate_key(query, params)
+        size = int(result.data.memory_usage(index=True, deep=True).sum()) if result.data is not None else 0
+        
+        if size > self.max_bytes:
+            # Results larger than the whole budget are not cached
+            with self.lock:
+                if key in self.cache:
+                    self._remove(key)
+            return
+        
+        # Freeze a copy so the caller's own result stays writable
+        if result.data is not None:
+            result = replace(result, data=freeze_frame(result.data), metadata=dict(result.metadata))
+        
         with self.lock:
-            key = self._generate_key(query)
+            if key in self.cache:
+                self._remove(key)
             
-            # Remove oldest entries if cache is full
-            if len(self.cache) >= self.max_size:
-                oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k][1])
-                del self.cache[oldest_key]
+            self.cache[key] = (result, time.time(), size, table_versions)
+            self.size_bytes += size
             
-            self.cache[key] = (result, time.time())
+            # Evict least recently used entries until within both limits
+            while len(self.cache) > self.max_size or self.size_bytes > self.max_bytes:
+                oldest_key = next(iter(self.cache))
+                self._remove(oldest_key)
+                self.evictions += 1
+    
+    def _remove(self, key: str):
+        """Remove an entry and release its size. Caller holds the lock."""
+        _, _, size, _ = self.cache.pop(key)
+        self.size_bytes -= size
     
     def clear(self):
         """Clear all cached results"""
         with self.lock:
             self.cache.clear()
+            self.size_bytes = 0
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         with self.lock:
+            lookups = self.hits + self.misses
             return {
                 'size': len(self.cache),
                 'max_size': self.max_size,
-                'ttl_seconds': self.ttl_seconds
+                'size_bytes': self.size_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0
+            }
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the acquire timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable SQLite connections"""
+    
+    def __init__(self,
+                 database_path: str,
+                 pool_size: int = 5,
+                 read_only: bool = False,
+                 statement_cache_size: int = 256,
+                 busy_timeout_ms: int = 30000,
+                 acquire_timeout: float = 30.0):
+        """
+        Initialize connection pool
+        
+        Args:
+            database_path: Path to SQLite database file
+            pool_size: Maximum number of open connections
+            read_only: Open connections with a read-only URI (mode=ro)
+            statement_cache_size: Number of prepared statements cached per connection
+            busy_timeout_ms: How long a connection waits on a locked database
+            acquire_timeout: Seconds to wait for a free connection when all are in use
+        """
+        self.database_path = database_path
+        self.pool_size = pool_size
+        self.read_only = read_only
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self.lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection with per-connection settings applied once"""
+        if self.read_only:
+            uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   cached_statements=self.statement_cache_size)
+        else:
+            conn = sqlite3.connect(self.database_path, check_same_thread=False,
+                                   cached_statements=self.statement_cache_size)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool, returning it when done"""
+        conn = None
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self.lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise PoolTimeoutError(
+                        f"No database connection became free within {self.acquire_timeout}s "
+                        f"(all {self.pool_size} pooled connections are in use)"
+                    ) from None
+        
+        try:
+            yield conn
+        except GeneratorExit:
+            # The borrower was closed or garbage collected mid-iteration (an
+            # abandoned stream); close the connection rather than handing one
+            # with an unfinished statement to the next borrower
+            self._discard(conn)
+            raise
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+            raise
+        else:
+            self._idle.put(conn)
+    
+    def _discard(self, conn: sqlite3.Connection):
+        """Close a borrowed connection instead of returning it to the pool"""
+        if self.database_path == ":memory:":
+            # Closing the only in-memory connection would drop the database
+            self._idle.put(conn)
+            return
+        try:
+            conn.close()
+        finally:
+            with self.lock:
+                self._created -= 1
+    
+    def close_all(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.lock:
+                self._created -= 1
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table, column or index name for use in SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode_cursor_value(value: Any) -> Any:
+    """Make a key value of a page cursor JSON-serializable (BLOBs become base64)"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'blob': base64.b64encode(bytes(value)).decode()}
+    return value
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    """Inverse of _encode_cursor_value"""
+    if isinstance(value, dict):
+        return base64.b64decode(value['blob'])
+    return value
+
+
+def referenced_names(query: str) -> List[str]:
+    """
+    Extract candidate table names from a SQL statement
+
+    Returns every unquoted word and quoted identifier, lowercased; callers
+    intersect the result with the set of known tables.
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        Lowercased identifiers in order of appearance
+    """
+    names = []
+    for match in SQL_TOKEN_PATTERN.finditer(query):
+        kind = match.lastgroup
+        if kind == 'word':
+            names.append(match.group().lower())
+        elif kind == 'quoted':
+            names.append(match.group()[1:-1].replace('""', '"').lower())
+    return names
+
+
+class TableVersionTracker:
+    """
+    Per-table data versions used to invalidate cached query results
+
+    Every table has a counter that is bumped whenever its contents change.
+    Writes made through the client are committed by commit_write, which bumps
+    only the tables they reference. Changes made by other processes are
+    detected through PRAGMA data_version on a dedicated connection; SQLite
+    does not say which tables such a change touched, so it bumps every table
+    and results are never served stale. Views resolve to their base tables.
+    """
+
+    def __init__(self, pool: ConnectionPool, database_path: str):
+        """
+        Initialize the tracker
+
+        Args:
+            pool: Pool used for catalog queries
+            database_path: Path to SQLite database file (":memory:" tracks in-process writes only)
+        """
+        self.pool = pool
+        self.versions: Dict[str, int] = {}
+        self.dependencies: Dict[str, frozenset] = {}
+        self.definitions: Dict[str, str] = {}
+        self.schema_version: Optional[int] = None
+        self.data_version: Optional[int] = None
+        self.lock = threading.Lock()
+
+        # data_version only reports changes made by *other* connections,
+        # so it must be read from a connection that never writes
+        self.monitor: Optional[sqlite3.Connection] = None
+        if database_path != ":memory:":
+            uri = f"{Path(database_path).resolve().as_uri()}?mode=ro"
+            self.monitor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def tables_for(self, query: str) -> frozenset:
+        """Return the base tables a query reads or writes"""
+        with self.lock:
+            self._refresh()
+            return self._resolve(referenced_names(query))
+
+    def get_versions(self, query: str) -> Dict[str, int]:
+        """
+        Return the current data version of every table a query references
+
+        Args:
+            query: SQL query string
+
+        Returns:
+            Mapping of table name to version counter
+        """
+        with self.lock:
+            self._refresh()
+            tables = self._resolve(referenced_names(query))
+            return {table: self.versions.get(table, 0) for table in sorted(tables)}
+
+    def commit_write(self, conn: sqlite3.Connection, query: str):
+        """
+        Commit a write made through the client and bump only the tables it references
+
+        The monitor sees the commit as a data_version change like any other,
+        so the change is absorbed instead of bumping every table. That is only
+        safe if nothing else commits in the meantime: outside changes are
+        picked up first, while conn's open transaction still holds the write
+        lock, and conn's own data_version, which moves only for commits by
+        other connections, confirms that nothing committed right after ours.
+        Otherwise the next refresh bumps every table.
+
+        Args:
+            conn: Connection with the uncommitted write
+            query: Statement that was executed
+        """
+        with self.lock:
+            if self.monitor is not None and conn.in_transaction:
+                self._refresh(conn)
+                before = conn.execute("PRAGMA data_version").fetchone()[0]
+                conn.commit()
+                data_version = self.monitor.execute("PRAGMA data_version").fetchone()[0]
+                if conn.execute("PRAGMA data_version").fetchone()[0] == before:
+                    self.data_version = data_version
+            else:
+                conn.commit()
+            # Schema changes are picked up by the next refresh
+            for table in self._resolve(referenced_names(query)):
+                self.versions[table] = self.versions.get(table, 0) + 1
+
+    def invalidate_all(self):
+        """Bump every table, e.g. after a script of unknown statements"""
+        with self.lock:
+            self.schema_version = None
+            for table in self.versions:
+                self.versions[table] += 1
+
+    def close(self):
+        """Close the monitoring connection"""
+        if self.monitor is not None:
+            self.monitor.close()
+            self.monitor = None
+
+    def _resolve(self, names: List[str]) -> frozenset:
+        """Map referenced names to base tables. Caller holds the lock."""
+        tables = set()
+        for name in names:
+            tables.update(self.dependencies.get(name, ()))
+        return frozenset(tables)
+
+    def _refresh(self, conn: Optional[sqlite3.Connection] = None):
+        """Pick up schema and data changes made outside the client. Caller holds the lock."""
+        if conn is None:
+            with self.pool.connection() as conn:
+                return self._refresh(conn)
+
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        if schema_version != self.schema_version:
+            self._load_catalog(conn)
+            self.schema_version = schema_version
+
+        if self.monitor is None:
+            return
+        data_version = self.monitor.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return
+        if self.data_version is not None:
+            for table in self.versions:
+                self.versions[table] += 1
+        self.data_version = data_version
+
+    def _load_catalog(self, conn: sqlite3.Connection):
+        """Load tables and views and resolve views to base tables. Caller holds the lock."""
+        rows = conn.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        tables = {name.lower(): sql or "" for kind, name, sql in rows if kind == 'table'}
+        views = {name.lower(): sql or "" for kind, name, sql in rows if kind == 'view'}
+
+        # New, altered, dropped or recreated tables may hold different rows
+        for table in set(tables) | set(self.definitions):
+            if tables.get(table) != self.definitions.get(table):
+                self.versions[table] = self.versions.get(table, 0) + 1
+        self.definitions = tables
+
+        dependencies = {table: frozenset([table]) for table in tables}
+
+        def resolve(view: str, seen: frozenset) -> frozenset:
+            base = set()
+            for name in referenced_names(views[view]):
+                if name in tables:
+                    base.add(name)
+                elif name in views and name not in seen:
+                    base.update(resolve(name, seen | {name}))
+            return frozenset(base)
+
+        for view in views:
+            dependencies[view] = resolve(view, frozenset([view]))
+        self.dependencies = dependencies
+
+
+@dataclass
+class PlanStep:
+    """One row of EXPLAIN QUERY PLAN output"""
+    id: int
+    parent: int
+    detail: str
+    operation: str  # SCAN, SEARCH or the leading words of other plan rows
+    table: Optional[str] = None  # Base table, None for subqueries and CTEs
+    alias: Optional[str] = None
+    index: Optional[str] = None
+    automatic_index: bool = False
+    constraints: List[str] = field(default_factory=list)
+    estimated_rows: float = 1.0
+
+
+@dataclass
+class QueryPlan:
+    """Parsed query plan with a rough cost estimate"""
+    steps: List[PlanStep]
+    full_scans: List[str]  # Base tables read without an index
+    automatic_indexes: List[str]  # Base tables SQLite builds a transient index on
+    temp_btrees: int
+    estimated_cost: float  # Approximate number of rows visited
+
+
+@dataclass
+class IndexRecommendation:
+    """Index suggested by the observed query workload"""
+    table: str
+    columns: List[str]  # Key columns first, then columns that make it covering
+    key_columns: List[str]
+    occurrences: int
+    index_name: str
+    create_sql: str
+    created: bool = False
+
+
+# Words that end a table reference in FROM/JOIN, so never an alias
+SQL_CLAUSE_WORDS = frozenset([
+    'as', 'on', 'using', 'where', 'join', 'inner', 'left', 'right', 'full', 'outer', 'cross',
+    'natural', 'group', 'order', 'having', 'limit', 'offset', 'union', 'except', 'intersect',
+    'window', 'select', 'from', 'set', 'values', 'indexed', 'not', 'and', 'or'
+])
+
+PLAN_DETAIL_PATTERN = re.compile(
+    r"^(?P<op>SCAN|SEARCH)\s+(?:TABLE\s+)?(?P<name>\S+)(?:\s+AS\s+(?P<alias>\S+))?"
+    r"(?:\s+USING\s+(?P<using>AUTOMATIC\s+(?:PARTIAL\s+)?(?:COVERING\s+)?INDEX"
+    r"|(?:COVERING\s+)?INDEX\s+(?P<index>\S+)|INTEGER\s+PRIMARY\s+KEY|PRIMARY\s+KEY))?"
+    r"(?:\s+\((?P<constraints>[^)]*)\))?"
+)
+
+
+def sql_tokens(query: str) -> List[Tuple[str, str]]:
+    """
+    Split a SQL statement into significant tokens
+
+    Comments and whitespace are dropped, words are lowercased and quoted
+    identifiers are unquoted and returned as words.
+
+    Args:
+        query: SQL query string
+
+    Returns:
+        (kind, value) pairs in order of appearance
+    """
+    tokens = []
+    for match in SQL_TOKEN_PATTERN.finditer(query):
+        kind = match.lastgroup
+        if kind in ('comment', 'space'):
+            continue
+        value = match.group()
+        if kind == 'word':
+            value = value.lower()
+        elif kind == 'quoted':
+            kind, value = 'word', value[1:-1].replace('""', '"').lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+def table_aliases(tokens: List[Tuple[str, str]], tables) -> Dict[str, str]:
+    """
+    Map the table names and aliases used in a statement to base tables
+
+    Args:
+        tokens: Output of sql_tokens
+        tables: Lowercased names of the known tables
+
+    Returns:
+        Mapping of name or alias to table
+    """
+    aliases = {}
+    for i, (kind, value) in enumerate(tokens):
+        if kind != 'word' or value not in tables:
+            continue
+        aliases[value] = value
+        following = tokens[i + 1:i + 3]
+        if len(following) == 2 and following[0][1] == 'as' and following[1][0] == 'word':
+            aliases[following[1][1]] = value
+        elif following and following[0][0] == 'word' and following[0][1] not in SQL_CLAUSE_WORDS:
+            aliases[following[0][1]] = value
+    return aliases
+
+
+def column_usage(tokens: List[Tuple[str, str]], aliases: Dict[str, str],
+                 table_columns: Dict[str, frozenset]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Classify how a statement uses the columns of each table it references
+
+    A lightweight token scan, not a parser: columns compared with = or IN in
+    WHERE/ON/HAVING are equality columns, columns compared with <, >, BETWEEN
+    or LIKE are range columns, columns in GROUP BY/ORDER BY are ordering
+    columns and everything else is merely referenced. Unqualified columns are
+    attributed to every referenced table that has them.
+
+    Args:
+        tokens: Output of sql_tokens
+        aliases: Output of table_aliases
+        table_columns: Lowercased column names of every known table
+
+    Returns:
+        {table: {'equality': [...], 'range': [...], 'order': [...], 'referenced': [...]}}
+    """
+    referenced_tables = set(aliases.values())
+
+    usage = {table: {'equality': [], 'range': [], 'order': [], 'referenced': []} for table in referenced_tables}
+    clause = None
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        if kind == 'word' and value in ('where', 'on', 'having'):
+            clause = 'filter'
+        elif kind == 'word' and value in ('group', 'order'):
+            clause = 'order'
+        elif kind == 'word' and value in ('select', 'from', 'join', 'limit'):
+            clause = value
+        elif kind == 'word' and value not in SQL_CLAUSE_WORDS:
+            # Qualified alias.column or bare column reference
+            end = i
+            if i + 2 < len(tokens) and tokens[i + 1][1] == '.' and tokens[i + 2][0] == 'word':
+                end = i + 2
+                owner = aliases.get(value)
+                tables = [owner] if owner else []
+                column = tokens[end][1]
+            else:
+                tables = [table for table in referenced_tables if value in table_columns[table]]
+                column = value
+            next_token = tokens[end + 1][1] if end + 1 < len(tokens) else None
+            previous_token = tokens[i - 1][1] if i > 0 else None
+
+            if next_token == '(' or clause == 'from':
+                tables = []
+            elif clause == 'filter' and (next_token in ('=', 'in', 'is') or previous_token == '='):
+                role = 'equality'
+            elif clause == 'filter' and (next_token in ('<', '>', 'between', 'like', 'glob')
+                                         or previous_token in ('<', '>')):
+                role = 'range'
+            elif clause == 'order':
+                role = 'order'
+            else:
+                role = 'referenced'
+
+            for table in tables:
+                if column in table_columns[table] and column not in usage[table][role]:
+                    usage[table][role].append(column)
+            i = end
+        i += 1
+    return usage
+
+
+# Aggregate functions that must read every input row before returning one
+SQL_AGGREGATE_FUNCTIONS = frozenset(['count', 'sum', 'avg', 'min', 'max', 'total', 'group_concat', 'string_agg'])
+
+
+def row_limit(tokens: List[Tuple[str, str]]) -> Tuple[Optional[int], bool]:
+    """
+    Find the top-level row limit of a statement and whether it must see all rows first
+
+    Only the outermost SELECT is inspected (parenthesized subqueries are
+    skipped). A statement is blocking when it aggregates, groups, uses
+    DISTINCT or window functions, since a LIMIT then does not shorten the scan.
+
+    Args:
+        tokens: Output of sql_tokens
+
+    Returns:
+        Tuple of (rows needed including OFFSET, or None without a literal LIMIT; blocking)
+    """
+    depth = 0
+    limit, blocking = None, False
+    top = []
+    for i, (kind, value) in enumerate(tokens):
+        if value == '(':
+            depth += 1
+        elif value == ')':
+            depth -= 1
+        elif depth == 0:
+            top.append((kind, value, tokens[i + 1][1] if i + 1 < len(tokens) else None))
+
+    for i, (kind, value, next_value) in enumerate(top):
+        if kind != 'word':
+            continue
+        if (value in SQL_AGGREGATE_FUNCTIONS and next_value == '(') or value in ('group', 'distinct', 'over'):
+            blocking = True
+        elif value == 'limit':
+            numbers = []
+            for kind_after, value_after, _ in top[i + 1:i + 4]:
+                if kind_after == 'number':
+                    numbers.append(value_after)
+                elif value_after not in (',', 'offset'):
+                    break
+            if numbers and all(number.isdigit() for number in numbers):
+                # LIMIT n, LIMIT n OFFSET m and LIMIT m, n all need n + m rows
+                limit = sum(int(number) for number in numbers)
+    return limit, blocking
+
+
+# Top-level words after which a SELECT no longer returns one row per table row, in table order
+NON_PLAIN_SELECT_WORDS = frozenset([
+    'join', 'union', 'except', 'intersect', 'group', 'distinct', 'order', 'limit', 'over',
+    'window', 'having', 'values'
+])
+
+
+def plain_projection(tokens: List[Tuple[str, str]]) -> Optional[Tuple[str, bool, List[str], List[str]]]:
+    """
+    Describe a SELECT that returns at most one row per row of a single table
+
+    Only the outermost SELECT is inspected. Statements that join, group,
+    aggregate, use DISTINCT, window functions, compound operators, ORDER BY
+    or LIMIT, or read from a subquery yield None.
+
+    Args:
+        tokens: Output of sql_tokens
+
+    Returns:
+        Tuple of (lowercased table name, whether * selects all of its columns,
+        columns selected as themselves, output names of the other items), or None
+    """
+    depth = 0
+    top = []
+    for kind, value in tokens:
+        if value == '(':
+            if depth == 0:
+                # Keep a marker so "f(x)" and "(subquery)" never look like bare columns
+                top.append(('other', '('))
+            depth += 1
+        elif value == ')':
+            depth -= 1
+        elif depth == 0:
+            top.append((kind, value))
+    while top and top[-1][1] == ';':
+        top.pop()
+
+    if not top or top[0] != ('word', 'select') or ('word', 'from') not in top:
+        return None
+    for i, (kind, value) in enumerate(top):
+        if kind != 'word':
+            continue
+        if value in NON_PLAIN_SELECT_WORDS:
+            return None
+        if value in SQL_AGGREGATE_FUNCTIONS and i + 1 < len(top) and top[i + 1][1] == '(':
+            return None
+
+    from_index = top.index(('word', 'from'))
+    source = top[from_index + 1:]
+    if ('word', 'where') in source:
+        source = source[:source.index(('word', 'where'))]
+    if not source or source[0][0] != 'word':
+        return None
+    alias = [value for _, value in source[1:]]
+    if not (alias == [] or (len(alias) == 1 and source[1][0] == 'word')
+            or (len(alias) == 2 and alias[0] == 'as' and source[2][0] == 'word')):
+        return None
+
+    items = [[]]
+    for kind, value in top[1:from_index]:
+        if value == ',':
+            items.append([])
+        elif not (value == 'all' and not items[0]):
+            items[-1].append((kind, value))
+
+    star, bare, other_names = False, [], []
+    for item in items:
+        values = [value for _, value in item]
+        if values == ['*'] or (len(values) == 3 and values[1:] == ['.', '*']):
+            star = True
+        elif len(values) == 1 and item[0][0] == 'word':
+            bare.append(values[0])
+        elif len(values) == 3 and values[1] == '.' and item[0][0] == 'word' and item[2][0] == 'word':
+            bare.append(values[2])
+        elif len(values) >= 2 and item[-1][0] == 'word':
+            other_names.append(values[-1])
+    return source[0][1], star, bare, other_names
+
+
+class QueryPlanAdvisor:
+    """
+    Query plan analysis, cost estimation and workload-driven index advice
+
+    Every analyzed SELECT is run through EXPLAIN QUERY PLAN. Base tables that
+    are scanned without an index, or that SQLite builds an automatic index on,
+    yield a candidate index from the columns the query filters on; candidates
+    are counted across the workload and recommended once seen often enough.
+    Recommended indexes include the other columns the queries read when that
+    keeps them narrow, so they cover the query. The same plan feeds a nested
+    loop cost estimate (rows visited) from table sizes and sqlite_stat1,
+    capped by the rows a LIMIT lets the outer loop produce.
+    """
+
+    def __init__(self, read_pool: ConnectionPool, write_pool: ConnectionPool,
+                 min_occurrences: int = 3, max_index_columns: int = 4,
+                 auto_create: bool = False):
+        """
+        Initialize the advisor
+
+        Args:
+            read_pool: Pool used for EXPLAIN and catalog queries
+            write_pool: Pool used to create indexes
+            min_occurrences: Queries that must want an index before it is recommended
+            max_index_columns: Widest index that will be recommended
+            auto_create: Create recommended indexes as soon as they qualify
+        """
+        self.read_pool = read_pool
+        self.write_pool = write_pool
+        self.min_occurrences = min_occurrences
+        self.max_index_columns = max_index_columns
+        self.auto_create = auto_create
+        self.logger = logging.getLogger(__name__)
+
+        # Set by the client so that creating an index keeps cached results
+        self.table_versions: Optional[TableVersionTracker] = None
+
+        # Catalog, reloaded when PRAGMA schema_version changes
+        self.schema_version: Optional[int] = None
+        self.table_columns: Dict[str, frozenset] = {}
+        self.column_names: Dict[str, Dict[str, str]] = {}  # Lowercased to declared name
+        self.row_counts: Dict[str, int] = {}
+        self.indexes: Dict[str, Tuple[str, List[str], bool]] = {}  # name -> (table, columns, unique)
+        self.index_stats: Dict[str, List[int]] = {}
+        self.connection_schemas: Dict[int, int] = {}  # id(connection) -> schema version it planned with
+
+        # Observed workload: (table, key columns) -> occurrences and covered columns
+        self.candidates: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+        self.scan_counts: Dict[str, int] = {}
+        self.created_indexes: List[str] = []
+        self.analyzed_queries = 0
+        self.lock = threading.Lock()
+
+    def explain(self, conn: sqlite3.Connection, query: str, params: Optional[Tuple] = None) -> List[Tuple]:
+        """
+        Run EXPLAIN QUERY PLAN for a query, reloading the catalog if the schema changed
+
+        Args:
+            conn: Connection to explain on
+            query: SQL SELECT query
+            params: Optional query parameters
+
+        Returns:
+            Raw EXPLAIN QUERY PLAN rows, to pass to analyze()
+        """
+        schema_version = self._refresh(conn)
+        with self.lock:
+            stale = self.connection_schemas.get(id(conn)) != schema_version
+            self.connection_schemas[id(conn)] = schema_version
+        if stale:
+            # EXPLAIN never checks the schema cookie, so a pooled connection could
+            # plan against a schema from before an index was added: reading
+            # sqlite_master reloads it
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        # Tagging the statement with the schema version keeps the statement
+        # cache from returning an older plan
+        return conn.execute(f"EXPLAIN QUERY PLAN /* schema {schema_version} */ {query}",
+                            params or ()).fetchall()
+
+    def analyze(self, query: str, params: Optional[Tuple] = None, record: bool = True,
+                plan_rows: Optional[List[Tuple]] = None, limit: Optional[int] = None) -> QueryPlan:
+        """
+        Explain a query, estimate its cost and record its scan pattern
+
+        Args:
+            query: SQL SELECT query
+            params: Optional query parameters
+            record: Add the query to the observed workload
+            plan_rows: Rows already returned by explain(), to avoid planning twice
+            limit: Rows the caller will fetch at most, if it caps the result
+
+        Returns:
+            QueryPlan for the query
+        """
+        if plan_rows is None:
+            with self.read_pool.connection() as conn:
+                plan_rows = self.explain(conn, query, params)
+
+        tokens = sql_tokens(query)
+        query_limit, blocking = row_limit(tokens)
+        limits = [value for value in (query_limit, limit) if value is not None]
+        with self.lock:
+            aliases = table_aliases(tokens, self.table_columns)
+            usage = column_usage(tokens, aliases, self.table_columns)
+            steps = [self._parse_step(row, aliases) for row in plan_rows]
+            plan = self._estimate(steps, None if blocking or not limits else min(limits))
+
+            if record:
+                self.analyzed_queries += 1
+                ready = self._record(plan, usage)
+            else:
+                ready = []
+
+        for recommendation in ready:
+            self.create_index(recommendation)
+        return plan
+
+    def recommend(self, min_occurrences: Optional[int] = None) -> List[IndexRecommendation]:
+        """
+        Return indexes the observed workload would benefit from, most wanted first
+
+        Args:
+            min_occurrences: Override the configured threshold
+
+        Returns:
+            Index recommendations not already satisfied by an existing index
+        """
+        threshold = self.min_occurrences if min_occurrences is None else min_occurrences
+        with self.lock:
+            recommendations = [
+                self._recommendation(table, key_columns, candidate)
+                for (table, key_columns), candidate in self.candidates.items()
+                if candidate['occurrences'] >= threshold and not self._is_indexed(table, key_columns)
+            ]
+        return sorted(recommendations, key=lambda r: r.occurrences, reverse=True)
+
+    def create_index(self, recommendation: IndexRecommendation) -> bool:
+        """
+        Create a recommended index and refresh its planner statistics
+
+        Args:
+            recommendation: Recommendation returned by recommend()
+
+        Returns:
+            True if the index was created
+        """
+        try:
+            with self.write_pool.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(recommendation.create_sql)
+                conn.execute(f"ANALYZE {quote_identifier(recommendation.index_name)}")
+                if self.table_versions:
+                    # An index changes no rows, so no table is bumped
+                    self.table_versions.commit_write(conn, "")
+                else:
+                    conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not create index {recommendation.index_name}: {str(e)}")
+            return False
+
+        recommendation.created = True
+        with self.lock:
+            self.created_indexes.append(recommendation.index_name)
+            self.indexes[recommendation.index_name] = (
+                recommendation.table, [column.lower() for column in recommendation.columns], False)
+            self.schema_version = None
+        self.logger.info(f"Created index {recommendation.index_name} on "
+                         f"{recommendation.table}({', '.join(recommendation.columns)})")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get workload statistics"""
+        recommendations = self.recommend()
+        with self.lock:
+            return {
+                'analyzed_queries': self.analyzed_queries,
+                'full_scans': dict(self.scan_counts),
+                'candidate_indexes': len(self.candidates),
+                'created_indexes': list(self.created_indexes),
+                'recommendations': [recommendation.create_sql for recommendation in recommendations]
             }
 
+    def _refresh(self, conn: sqlite3.Connection) -> int:
+        """
+        Reload the catalog if the schema changed and return the schema version
+
+        The catalog is read without holding the lock, so other queries keep
+        being analyzed while it loads. Caller must not hold the lock.
+        """
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        with self.lock:
+            if schema_version == self.schema_version:
+                return schema_version
+
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        )]
+        table_columns, column_names, indexes = {}, {}, {}
+        for table in tables:
+            names = [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")]
+            key = table.lower()
+            column_names[key] = {name.lower(): name for name in names}
+            table_columns[key] = frozenset(column_names[key])
+            for _, index_name, unique, *_ in conn.execute(f"PRAGMA index_list({quote_identifier(table)})"):
+                columns = [row[2].lower() for row in conn.execute(
+                    f"PRAGMA index_info({quote_identifier(index_name)})") if row[2] is not None]
+                indexes[index_name] = (key, columns, bool(unique))
+
+        # sqlite_stat1 holds "rows avg-rows-per-key-prefix..." once ANALYZE has run
+        index_stats, row_counts = {}, {}
+        try:
+            for table, index_name, stat in conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1"):
+                numbers = [int(part) for part in stat.split() if part.isdigit()]
+                if numbers:
+                    row_counts[table.lower()] = numbers[0]
+                    if index_name:
+                        index_stats[index_name] = numbers
+        except sqlite3.Error:
+            pass
+        for table in tables:
+            if table.lower() not in row_counts:
+                row_counts[table.lower()] = self._row_estimate(conn, table)
+
+        with self.lock:
+            self.table_columns = table_columns
+            self.column_names = column_names
+            self.indexes = indexes
+            self.index_stats = index_stats
+            self.row_counts = row_counts
+            self.schema_version = schema_version
+        return schema_version
+
+    def _row_estimate(self, conn: sqlite3.Connection, table: str) -> int:
+        """Estimate a table's row count without scanning it"""
+        quoted = quote_identifier(table)
+        try:
+            # One b-tree seek; overestimates after deletes, which is the safe side
+            return conn.execute(f"SELECT max(rowid) FROM {quoted}").fetchone()[0] or 0
+        except sqlite3.Error:
+            # WITHOUT ROWID tables have no rowid to seek
+            return conn.execute(f"SELECT count(*) FROM {quoted}").fetchone()[0]
+
+    def _parse_step(self, row: Tuple, aliases: Dict[str, str]) -> PlanStep:
+        """Turn one EXPLAIN QUERY PLAN row into a PlanStep. Caller holds the lock."""
+        step_id, parent, _, detail = row
+        match = PLAN_DETAIL_PATTERN.match(detail)
+        if not match:
+            return PlanStep(id=step_id, parent=parent, detail=detail,
+                            operation=" ".join(detail.split()[:2]))
+
+        name = match.group('name').lower()
+        alias = (match.group('alias') or match.group('name')).lower()
+        table = aliases.get(name, name if name in self.table_columns else None)
+        constraints = [
+            part.strip() for part in (match.group('constraints') or "").split(" AND ") if part.strip()
+        ]
+        return PlanStep(
+            id=step_id,
+            parent=parent,
+            detail=detail,
+            operation=match.group('op'),
+            table=table,
+            alias=alias,
+            index=match.group('index'),
+            automatic_index=(match.group('using') or "").startswith('AUTOMATIC'),
+            constraints=constraints
+        )
+
+    def _step_rows(self, step: PlanStep, subquery_rows: Dict[str, float]) -> float:
+        """Estimate rows produced per loop iteration of a SCAN/SEARCH step. Caller holds the lock."""
+        if step.table is None:
+            if step.detail.startswith('SCAN CONSTANT ROW'):
+                return 1.0
+            return subquery_rows.get(step.alias, 1000.0)
+
+        rows = float(max(self.row_counts.get(step.table, 1), 1))
+        if step.operation == 'SCAN':
+            return rows
+
+        equality = [c for c in step.constraints if c.endswith('=?') and not c.endswith(('<=?', '>=?'))]
+        ranges = len(step.constraints) - len(equality)
+        if 'PRIMARY KEY' in step.detail and equality:
+            estimate = 1.0
+        elif step.index and equality:
+            stats = self.index_stats.get(step.index)
+            _, columns, unique = self.indexes.get(step.index, (None, [], False))
+            if stats and len(stats) > len(equality):
+                estimate = float(stats[len(equality)])
+            elif unique and len(equality) >= len(columns):
+                estimate = 1.0
+            else:
+                # SQLite's own assumption for an equality lookup without statistics
+                estimate = min(rows, 10.0)
+        elif step.automatic_index and equality:
+            estimate = min(rows, 10.0)
+        else:
+            estimate = rows
+        return max(estimate * 0.25 ** ranges, 1.0)
+
+    def _estimate(self, steps: List[PlanStep], limit: Optional[int] = None) -> QueryPlan:
+        """
+        Estimate rows visited by the nested loops of a plan. Caller holds the lock.
+
+        With a limit and no sort, the outer loops stop once limit rows are
+        produced, so their cost is scaled down accordingly. Work done before
+        the loops start (automatic indexes, materialized subqueries) is not.
+        """
+        children: Dict[int, List[PlanStep]] = {}
+        for step in steps:
+            children.setdefault(step.parent, []).append(step)
+        subquery_rows: Dict[str, float] = {}
+        upfront = [0.0]
+
+        def group_cost(parent: int) -> Tuple[float, float]:
+            """Return (rows visited, rows produced) for the loops under parent"""
+            cost, loops = 0.0, 1.0
+            for step in children.get(parent, []):
+                if step.operation in ('SCAN', 'SEARCH'):
+                    step.estimated_rows = self._step_rows(step, subquery_rows)
+                    if step.automatic_index:
+                        # The transient index is built once per statement
+                        cost += self.row_counts.get(step.table, 0)
+                        if parent == 0:
+                            upfront[0] += self.row_counts.get(step.table, 0)
+                    loops *= step.estimated_rows
+                    cost += loops
+                elif step.detail.startswith('USE TEMP B-TREE'):
+                    cost += loops * max(math.log2(loops), 1.0)
+                else:
+                    sub_cost, sub_rows = group_cost(step.id)
+                    words = step.detail.split()
+                    if words[0] in ('MATERIALIZE', 'CO-ROUTINE') and len(words) > 1:
+                        subquery_rows[words[1].lower()] = sub_rows
+                    if words[0] == 'CORRELATED':
+                        sub_cost *= loops
+                    elif words[0] == 'MATERIALIZE' and parent == 0:
+                        upfront[0] += sub_cost
+                    cost += sub_cost
+            return cost, loops
+
+        cost, rows = group_cost(0)
+        temp_btrees = sum(1 for s in steps if s.detail.startswith('USE TEMP B-TREE'))
+        if limit is not None and not temp_btrees and rows > limit:
+            cost = upfront[0] + (cost - upfront[0]) * max(limit, 1) / rows
+        return QueryPlan(
+            steps=steps,
+            full_scans=[s.table for s in steps if s.operation == 'SCAN' and s.table and not s.index],
+            automatic_indexes=[s.table for s in steps if s.automatic_index and s.table],
+            temp_btrees=temp_btrees,
+            estimated_cost=cost
+        )
+
+    def _record(self, plan: QueryPlan, usage: Dict[str, Dict[str, List[str]]]) -> List[IndexRecommendation]:
+        """Count the indexes a query wants; return those that just qualified for auto-creation. Caller holds the lock."""
+        ready = []
+        for step in plan.steps:
+            if step.table is None or step.table not in usage:
+                continue
+            if step.automatic_index:
+                key_columns = [re.split(r'[=<>]', c)[0].lower() for c in step.constraints]
+            elif step.operation == 'SCAN' and not step.index:
+                self.scan_counts[step.table] = self.scan_counts.get(step.table, 0) + 1
+                columns = usage[step.table]
+                key_columns = list(columns['equality'])
+                key_columns += [c for c in columns['range'] if c not in key_columns][:1]
+            else:
+                continue
+
+            key_columns = tuple(key_columns[:self.max_index_columns])
+            if not key_columns:
+                continue
+
+            candidate = self.candidates.setdefault(
+                (step.table, key_columns), {'occurrences': 0, 'covered': {}})
+            candidate['occurrences'] += 1
+            for role in ('equality', 'range', 'order', 'referenced'):
+                for column in usage[step.table][role]:
+                    if column not in key_columns:
+                        candidate['covered'][column] = candidate['covered'].get(column, 0) + 1
+
+            if (self.auto_create and candidate['occurrences'] == self.min_occurrences
+                    and not self._is_indexed(step.table, key_columns)):
+                ready.append(self._recommendation(step.table, key_columns, candidate))
+        return ready
+
+    def _recommendation(self, table: str, key_columns: Tuple[str, ...],
+                        candidate: Dict[str, Any]) -> IndexRecommendation:
+        """Build a recommendation, covering when that keeps the index narrow. Caller holds the lock."""
+        covered = sorted(candidate['covered'], key=lambda c: candidate['covered'][c], reverse=True)
+        columns = list(key_columns)
+        if len(columns) + len(covered) <= self.max_index_columns:
+            columns += covered
+
+        names = self.column_names.get(table, {})
+        declared = [names.get(column, column) for column in columns]
+        digest = hashlib.md5(f"{table}:{','.join(columns)}".encode()).hexdigest()[:8]
+        index_name = f"idx_auto_{re.sub(r'[^a-z0-9_]', '_', table)}_{digest}"
+        create_sql = (f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} ON "
+                      f"{quote_identifier(table)} ({', '.join(quote_identifier(c) for c in declared)})")
+        return IndexRecommendation(
+            table=table,
+            columns=declared,
+            key_columns=[names.get(column, column) for column in key_columns],
+            occurrences=candidate['occurrences'],
+            index_name=index_name,
+            create_sql=create_sql
+        )
+
+    def _is_indexed(self, table: str, key_columns: Tuple[str, ...]) -> bool:
+        """Whether an existing index leads with the key columns. Caller holds the lock."""
+        wanted = set(key_columns)
+        return any(
+            index_table == table and set(columns[:len(key_columns)]) == wanted
+            for index_table, columns, _ in self.indexes.values()
+        )
+
 
 class SQLiteClient:
     """SQLite client for local database operations"""
@@ -122,7 +1362,13 @@ class SQLiteClient:
                  database_path: str = "retail_analytics.db",
                  enable_cache: bool = True,
                  max_results: int = 1000,
-                 cache_ttl: int = 3600):
+                 cache_ttl: int = 3600,
+                 pool_size: int = 5,
+                 statement_cache_size: int = 256,
+                 enable_plan_analysis: bool = True,
+                 auto_create_indexes: bool = False,
+                 max_query_cost: Optional[float] = 1e9,
+                 page_token_secret: Optional[str] = None):
         """
         Initialize SQLite client
         
@@ -131,23 +1377,68 @@ class SQLiteClient:
             enable_cache: Whether to enable query result caching
             max_results: Maximum number of rows to return
             cache_ttl: Cache time-to-live in seconds
+            pool_size: Maximum number of pooled connections per pool (read-only and read-write)
+            statement_cache_size: Number of prepared statements cached per connection
+            enable_plan_analysis: Explain SELECT queries to estimate cost and advise indexes
+            auto_create_indexes: Create recommended indexes once the workload qualifies them
+            max_query_cost: Reject SELECT queries estimated to visit more rows (None disables)
+            page_token_secret: Key for signing page tokens (defaults to PAGE_TOKEN_SECRET, else a random key)
         """
         self.database_path = database_path
         self.max_results = max_results
         self.logger = logging.getLogger(__name__)
         
+        # Connection pools: SELECT traffic uses read-only connections,
+        # everything else goes through the read-write pool
+        self.write_pool = ConnectionPool(database_path, pool_size=pool_size,
+                                         statement_cache_size=statement_cache_size)
+        if database_path == ":memory:":
+            # Every in-memory connection is a separate database, so share one
+            self.write_pool.pool_size = 1
+            self.read_pool = self.write_pool
+        else:
+            self.read_pool = ConnectionPool(database_path, pool_size=pool_size, read_only=True,
+                                            statement_cache_size=statement_cache_size)
+        
         # Initialize cache
         self.cache = QueryCache(ttl_seconds=cache_ttl) if enable_cache else None
+        self.table_versions: Optional[TableVersionTracker] = None
+        
+        # Schema catalog, reloaded when PRAGMA schema_version changes
+        self.schema_snapshot: Optional[SchemaSnapshot] = None
+        self.schema_lock = threading.Lock()
+        
+        # Key used to sign page tokens; every worker serving the same clients needs the same one
+        page_token_secret = page_token_secret or os.getenv("PAGE_TOKEN_SECRET")
+        if page_token_secret:
+            self.page_token_secret = page_token_secret.encode()
+        else:
+            self.page_token_secret = secrets.token_bytes(32)
+            self.logger.warning("PAGE_TOKEN_SECRET is not set; page tokens are only valid in this process")
         
         # Performance metrics
         self.query_count = 0
         self.total_execution_time = 0.0
         self.cache_hits = 0
         self.error_count = 0
+        self.rejected_queries = 0
         
         # Initialize database
         self._initialize_database()
         
+        # Query plans feed the cost limit and the index advisor
+        self.max_query_cost = max_query_cost
+        self.plan_advisor: Optional[QueryPlanAdvisor] = None
+        if enable_plan_analysis:
+            self.plan_advisor = QueryPlanAdvisor(self.read_pool, self.write_pool,
+                                                 auto_create=auto_create_indexes)
+        
+        # Cached results are invalidated when the tables they read change
+        if self.cache:
+            self.table_versions = TableVersionTracker(self.read_pool, database_path)
+            if self.plan_advisor:
+                self.plan_advisor.table_versions = self.table_versions
+        
         self.logger.info(f"SQLite client initialized with database: {database_path}")
     
     def _initialize_database(self):
@@ -158,9 +1449,11 @@ class SQLiteClient:
             if db_dir and not os.path.exists(db_dir):
                 os.makedirs(db_dir)
             
-            # Test connection
-            with sqlite3.connect(self.database_path) as conn:
+            # Test connection and switch to WAL so readers do not block writers
+            with self.write_pool.connection() as conn:
                 conn.execute("SELECT 1")
+                if self.database_path != ":memory:":
+                    conn.execute("PRAGMA journal_mode=WAL")
             
             self.logger.info("Database connection established successfully")
             
@@ -187,9 +1480,12 @@ class SQLiteClient:
             self.query_count += 1
             
             try:
-                # Check cache first
-                if self.cache:
-                    cached_result = self.cache.get(query)
+                # Check cache first, against the versions of the tables the query reads
+                is_select = self._is_select(query)
+                table_versions = None
+                if self.cache and is_select:
+                    table_versions = self.table_versions.get_versions(query)
+                    cached_result = self.cache.get(query, params, table_versions)
                     if cached_result:
                         self.cache_hits += 1
                         self.logger.debug(f"Cache hit for query: {query[:100]}...")
@@ -197,37 +1493,43 @@ class SQLiteClient:
                         return cached_result
                 
                 # Validate query
-                is_valid, error_msg = self.validate_query(query)
+                is_valid, error_msg, plan_rows = self._validate(query, params)
                 if not is_valid:
                     return self._create_error_result(f"Invalid query: {error_msg}", start_time)
                 
-                # Execute query
-                with sqlite3.connect(self.database_path) as conn:
-                    conn.row_factory = sqlite3.Row  # Enable column access by name
-                    
-                    # Set timeout and other pragmas
-                    conn.execute("PRAGMA busy_timeout = 30000")  # 30 second timeout
-                    
-                    cursor = conn.execute(query, params or ())
+                # Reject queries whose plan is too expensive before running them,
+                # reusing the plan validation already produced
+                plan = (self.explain_query(query, params, plan_rows=plan_rows, limit=self.max_results + 1)
+                        if is_select and self.plan_advisor else None)
+                rejection = self._check_cost(plan)
+                if rejection:
+                    span.set_attribute("output.value", rejection)
+                    return self._create_error_result(rejection, start_time)
+                
+                # Execute query on a pooled connection
+                pool = self.read_pool if is_select else self.write_pool
+                with pool.connection() as conn:
+                    # Push the row limit into SQL (one extra row detects truncation)
+                    sql = self._limit_query(query, self.max_results + 1)[0] if is_select else query
+                    cursor = conn.execute(sql, params or ())
                     
                     # Fetch results
-                    if query.strip().upper().startswith(('SELECT', 'WITH')):
-                        rows = cursor.fetchall()
+                    truncated = False
+                    if is_select:
+                        rows = cursor.fetchmany(self.max_results + 1)
                         
                         # Convert to DataFrame
                         if rows:
                             # Get column names
                             columns = [description[0] for description in cursor.description]
                             
-                            # Convert rows to list of dicts
-                            data = [dict(row) for row in rows]
-                            
                             # Limit results
-                            if len(data) > self.max_results:
-                                data = data[:self.max_results]
+                            if len(rows) > self.max_results:
+                                rows = rows[:self.max_results]
+                                truncated = True
                                 self.logger.warning(f"Results limited to {self.max_results} rows")
                             
-                            df = pd.DataFrame(data)
+                            df = self._rows_to_frame(rows, columns)
                             row_count = len(df)
                         else:
                             df = pd.DataFrame()
@@ -236,6 +1538,10 @@ class SQLiteClient:
                         # For non-SELECT queries (INSERT, UPDATE, DELETE)
                         row_count = cursor.rowcount
                         df = pd.DataFrame()
+                        if self.table_versions:
+                            self.table_versions.commit_write(conn, query)
+                        else:
+                            conn.commit()
                 
                 execution_time = time.time() - start_time
                 self.total_execution_time += execution_time
@@ -250,15 +1556,18 @@ class SQLiteClient:
                     metadata={
                         'query_type': self._get_query_type(query),
                         'database_path': self.database_path,
-                        'limited_results': row_count == self.max_results
+                        'limited_results': truncated
                     }
                 )
+                if plan is not None:
+                    result.metadata['estimated_cost'] = plan.estimated_cost
+                    result.metadata['full_scans'] = plan.full_scans
                 
                 
                 
                 # Cache successful SELECT queries
-                if self.cache and query.strip().upper().startswith(('SELECT', 'WITH')):
-                    self.cache.set(query, result)
+                if self.cache and is_select:
+                    self.cache.set(query, result, params, table_versions)
                 
                 self.logger.debug(f"Query executed successfully in {execution_time:.2f}s, {row_count} rows")
                 span.set_attribute("output.value", result.data.to_json(orient="records") if result.data is not None else "[]")
@@ -281,6 +1590,397 @@ class SQLiteClient:
                 return self._create_error_result(error_msg, start_time)
             
     
+    def stream_query(self, query: str, params: Optional[Tuple] = None,
+                     batch_size: int = 1000, max_rows: Optional[int] = None,
+                     as_arrow: bool = False) -> Iterator[Any]:
+        """
+        Execute a SELECT query and yield results in batches
+        
+        Rows are fetched with fetchmany, so memory stays bounded by batch_size
+        regardless of table size. The pooled connection is held until the
+        iterator is exhausted; an iterator closed or garbage collected before
+        that closes its connection instead of returning it to the pool.
+        
+        Args:
+            query: SQL SELECT query string
+            params: Optional query parameters
+            batch_size: Number of rows per batch
+            max_rows: Optional row limit, pushed down into the SQL when possible
+            as_arrow: Yield pyarrow RecordBatches instead of DataFrames (requires pyarrow)
+            
+        Yields:
+            pandas DataFrame (or pyarrow RecordBatch) per batch
+        """
+        if not self._is_select(query):
+            raise ValueError("Only SELECT queries can be streamed")
+        if as_arrow and pa is None:
+            raise ImportError("pyarrow is required for Arrow record batches")
+        
+        is_valid, error_msg, plan_rows = self._validate(query, params)
+        if not is_valid:
+            raise ValueError(f"Invalid query: {error_msg}")
+        if self.plan_advisor:
+            rejection = self._check_cost(self.explain_query(query, params, plan_rows=plan_rows, limit=max_rows))
+            if rejection:
+                raise ValueError(rejection)
+        
+        sql = self._limit_query(query, max_rows)[0] if max_rows is not None else query
+        remaining = max_rows
+        with self.read_pool.connection() as conn:
+            cursor = conn.execute(sql, params or ())
+            columns = [description[0] for description in cursor.description]
+            try:
+                while remaining is None or remaining > 0:
+                    rows = cursor.fetchmany(batch_size if remaining is None else min(batch_size, remaining))
+                    if not rows:
+                        break
+                    if remaining is not None:
+                        remaining -= len(rows)
+                    if as_arrow:
+                        yield pa.RecordBatch.from_pydict(
+                            {name: list(values) for name, values in zip(columns, zip(*rows))}
+                        )
+                    else:
+                        yield pd.DataFrame.from_records(rows, columns=columns)
+            finally:
+                cursor.close()
+    
+    def execute_page(self, query: Optional[str] = None, page_size: int = 100,
+                     page_token: Optional[str] = None, key_columns: Optional[List[str]] = None,
+                     params: Optional[Tuple] = None, result: Optional[QueryResult] = None) -> QueryResult:
+        """
+        Execute one page of a SELECT query
+        
+        When key_columns are given, or can be derived because the query reads
+        a single table without ORDER BY, LIMIT, grouping or joins and returns
+        its primary key or a NOT NULL unique key unchanged, the query is
+        ordered by those columns and filtered to rows after the last key of
+        the previous page (keyset pagination), so every page costs the same.
+        Otherwise the query runs unmodified, so its own ORDER BY, duplicate
+        rows and column names are kept, and pages are numbered by row
+        position (LIMIT/OFFSET); SQLite still steps over the rows of earlier
+        pages, so deep pages cost more.
+        
+        Page tokens are self-contained: they carry the query, its parameters
+        and the position of the next page, signed with page_token_secret, so
+        any process sharing the secret can serve the next page.
+        
+        Args:
+            query: SQL SELECT query (required for the first page)
+            page_size: Number of rows per page
+            page_token: Token returned in metadata['next_page_token'] of the previous page
+            key_columns: Unique, non-NULL columns to order and paginate by (derived when possible)
+            params: Optional positional query parameters
+            result: Result of execute_query for the same query and parameters; the first
+                page is cut from it instead of running the query again when it holds the page
+            
+        Returns:
+            QueryResult for the page, with metadata['next_page_token'] set if more rows exist
+        """
+        start_time = time.time()
+        
+        try:
+            page_size = max(1, min(int(page_size), self.max_results))
+            page = None
+            if page_token:
+                try:
+                    state = self._decode_page_token(page_token)
+                    query = state['query']
+                    params = tuple(_decode_cursor_value(value) for value in state['params'])
+                    key_columns = state['key_columns']
+                    if key_columns:
+                        after = [_decode_cursor_value(value) for value in state['after']]
+                        if len(after) != len(key_columns):
+                            raise ValueError("wrong number of key values")
+                    else:
+                        offset = int(state['offset'])
+                        if offset < 0:
+                            raise ValueError("negative offset")
+                except Exception:
+                    return self._create_error_result("Invalid page token", start_time)
+            else:
+                if not query or not self._is_select(query):
+                    return self._create_error_result("Only SELECT queries can be paginated", start_time)
+                is_valid, error_msg, plan_rows = self._validate(query, params)
+                if not is_valid:
+                    return self._create_error_result(f"Invalid query: {error_msg}", start_time)
+                params = tuple(params or ())
+                if key_columns:
+                    key_columns = list(key_columns)
+                else:
+                    with self.read_pool.connection() as conn:
+                        key_columns = self._derive_key_columns(conn, query)
+                if self.plan_advisor:
+                    rejection = self._check_cost(self.explain_query(
+                        query, params, plan_rows=plan_rows, limit=None if key_columns else page_size + 1))
+                    if rejection:
+                        return self._create_error_result(rejection, start_time)
+                after = None
+                offset = 0
+                if result is not None:
+                    page = self._page_from_result(result, key_columns, page_size)
+            
+            if page is None:
+                if key_columns:
+                    columns, rows = self._fetch_keyset_page(query, params, key_columns, after, page_size)
+                else:
+                    columns, rows = self._fetch_offset_page(query, params, offset, page_size)
+                has_more = len(rows) > page_size
+                rows = rows[:page_size]
+                last_key = None
+                if key_columns and has_more:
+                    positions = self._key_positions(columns, key_columns)
+                    last_key = [rows[-1][position] for position in positions]
+                data = self._rows_to_frame(rows, columns)
+            else:
+                data, has_more, last_key = page
+            
+            next_page_token = None
+            if has_more:
+                state = {
+                    'query': query,
+                    'params': [_encode_cursor_value(value) for value in params],
+                    'key_columns': key_columns
+                }
+                if key_columns:
+                    state['after'] = [_encode_cursor_value(value) for value in last_key]
+                else:
+                    state['offset'] = offset + page_size
+                next_page_token = self._encode_page_token(state)
+            
+            execution_time = time.time() - start_time
+            return QueryResult(
+                success=True,
+                data=data,
+                row_count=len(data),
+                execution_time=execution_time,
+                error_message=None,
+                cache_hit=page is not None,
+                metadata={
+                    'query_type': self._get_query_type(query),
+                    'database_path': self.database_path,
+                    'page_size': page_size,
+                    'key_columns': key_columns,
+                    'next_page_token': next_page_token
+                }
+            )
+        
+        except (sqlite3.Error, ValueError, TypeError) as e:
+            self.error_count += 1
+            self.logger.error(f"Paged query failed: {str(e)}")
+            return self._create_error_result(f"Paged query failed: {str(e)}", start_time)
+    
+    def _encode_page_token(self, state: Dict[str, Any]) -> str:
+        """Serialize and sign the state of a paged query"""
+        payload = base64.urlsafe_b64encode(zlib.compress(json.dumps(state, separators=(',', ':')).encode()))
+        signature = base64.urlsafe_b64encode(hmac.new(self.page_token_secret, payload, hashlib.sha256).digest())
+        return f"{payload.decode()}.{signature.decode()}"
+    
+    def _decode_page_token(self, page_token: str) -> Dict[str, Any]:
+        """Verify the signature of a page token and return its state"""
+        payload, _, signature = page_token.encode().partition(b'.')
+        expected = base64.urlsafe_b64encode(hmac.new(self.page_token_secret, payload, hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            raise ValueError("bad page token signature")
+        return json.loads(zlib.decompress(base64.urlsafe_b64decode(payload)))
+    
+    def _derive_key_columns(self, conn: sqlite3.Connection, query: str) -> Optional[List[str]]:
+        """Find a unique, non-NULL key of the queried table that a plain query returns unchanged"""
+        projection = plain_projection(sql_tokens(query))
+        if projection is None:
+            return None
+        table, star, bare, other_names = projection
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE", (table,)
+        ).fetchone()
+        if row is None:
+            return None
+        table = row[0]
+        
+        table_info = conn.execute(f"PRAGMA table_info({quote_identifier(table)})").fetchall()
+        not_null = {name.lower() for _, name, _, notnull, _, _ in table_info if notnull}
+        primary_key = [name for _, name, _, _, _, pk in sorted(table_info, key=lambda info: info[5]) if pk]
+        if len(primary_key) == 1 and any(name == primary_key[0] and (column_type or '').upper() == 'INTEGER'
+                                         for _, name, column_type, _, _, _ in table_info):
+            # INTEGER PRIMARY KEY is the rowid and is never NULL
+            not_null.add(primary_key[0].lower())
+        
+        keys = [primary_key] if primary_key else []
+        for _, index_name, unique, _, partial in conn.execute(f"PRAGMA index_list({quote_identifier(table)})"):
+            if unique and not partial:
+                index_columns = [name for _, _, name in conn.execute(f"PRAGMA index_info({quote_identifier(index_name)})")]
+                if None not in index_columns:
+                    keys.append(index_columns)
+        
+        returned = ([name.lower() for _, name, _, _, _, _ in table_info] if star else []) + bare
+        if len(set(returned)) != len(returned):
+            return None
+        for key in keys:
+            lowered = [name.lower() for name in key]
+            if all(name in not_null and name in returned and name not in other_names for name in lowered):
+                return key
+        return None
+    
+    @staticmethod
+    def _key_positions(columns: List[str], key_columns: List[str]) -> List[int]:
+        """Positions of the key columns in a result (identifiers are case-insensitive)"""
+        lowered = [column.lower() for column in columns]
+        return [lowered.index(column.lower()) for column in key_columns]
+    
+    def _page_from_result(self, result: QueryResult, key_columns: Optional[List[str]],
+                          page_size: int) -> Optional[Tuple[pd.DataFrame, bool, Optional[List[Any]]]]:
+        """Cut the first page out of an already computed result, or None if it does not hold it"""
+        if not result.success or result.data is None:
+            return None
+        data = result.data
+        truncated = bool(result.metadata.get('limited_results'))
+        if not key_columns:
+            page = data.iloc[:page_size]
+            return page.reset_index(drop=True), len(data) > page_size or truncated, None
+        
+        # Keyset pages are ordered by key, so the whole result is needed to find
+        # the first keys; only integer keys sort the same in pandas as in SQLite
+        if truncated:
+            return None
+        try:
+            positions = self._key_positions(list(data.columns), key_columns)
+        except ValueError:
+            return None
+        if not all(pd.api.types.is_integer_dtype(data.dtypes.iloc[position]) for position in positions):
+            return None
+        page = data.sort_values([data.columns[position] for position in positions]).iloc[:page_size]
+        has_more = len(data) > page_size
+        last_key = [page.iloc[-1, position].item() for position in positions] if has_more else None
+        return page.reset_index(drop=True), has_more, last_key
+    
+    def _fetch_offset_page(self, query: str, params: Tuple, offset: int,
+                           page_size: int) -> Tuple[List[str], List[Tuple]]:
+        """Fetch page_size + 1 rows starting at row offset, in the query's own order"""
+        sql, applied = self._limit_query(query, page_size + 1, offset)
+        with self.read_pool.connection() as conn:
+            cursor = conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            if not applied:
+                # The query has its own LIMIT; skip the earlier pages here instead
+                skipped = 0
+                while skipped < offset:
+                    chunk = cursor.fetchmany(min(offset - skipped, 1000))
+                    if not chunk:
+                        break
+                    skipped += len(chunk)
+            rows = cursor.fetchmany(page_size + 1)
+        return columns, rows
+    
+    def _fetch_keyset_page(self, query: str, params: Tuple, key_columns: List[str],
+                           after: Optional[List[Any]], page_size: int) -> Tuple[List[str], List[Tuple]]:
+        """Fetch page_size + 1 rows ordered by key_columns, after the given key"""
+        keys = ", ".join(quote_identifier(column) for column in key_columns)
+        body = query.strip().rstrip(';').rstrip()
+        sql = f"SELECT * FROM (\n{body}\n) AS page_source"
+        page_params = tuple(params)
+        if after is not None:
+            sql += f" WHERE ({keys}) > ({', '.join('?' for _ in key_columns)})"
+            page_params += tuple(after)
+        sql += f" ORDER BY {keys} LIMIT {page_size + 1}"
+        
+        with self.read_pool.connection() as conn:
+            cursor = conn.execute(sql, page_params)
+            # The subquery renames duplicate result columns to "name:N"; restore them
+            columns = []
+            for description in cursor.description:
+                name = description[0]
+                base, _, suffix = name.rpartition(':')
+                columns.append(base if suffix.isdigit() and base in columns else name)
+            rows = cursor.fetchmany(page_size + 1)
+        return columns, rows
+    
+    def explain_query(self, query: str, params: Optional[Tuple] = None,
+                      plan_rows: Optional[List[Tuple]] = None, limit: Optional[int] = None) -> QueryPlan:
+        """
+        Explain a SELECT query and record its scans for index advice
+        
+        Args:
+            query: SQL SELECT query string
+            params: Optional query parameters
+            plan_rows: EXPLAIN QUERY PLAN rows from validation, to avoid planning twice
+            limit: Rows the caller will fetch at most
+            
+        Returns:
+            QueryPlan with the parsed plan and estimated cost
+        """
+        if self.plan_advisor is None:
+            raise RuntimeError("Query plan analysis is disabled")
+        return self.plan_advisor.analyze(query, params, plan_rows=plan_rows, limit=limit)
+    
+    def get_index_recommendations(self) -> List[IndexRecommendation]:
+        """Return indexes the observed query workload would benefit from"""
+        return self.plan_advisor.recommend() if self.plan_advisor else []
+    
+    def create_recommended_indexes(self) -> List[str]:
+        """
+        Create every currently recommended index
+        
+        Returns:
+            Names of the indexes created
+        """
+        created = []
+        for recommendation in self.get_index_recommendations():
+            if self.plan_advisor.create_index(recommendation):
+                created.append(recommendation.index_name)
+        return created
+    
+    def _check_cost(self, plan: Optional[QueryPlan]) -> Optional[str]:
+        """Return an error message if a plan exceeds max_query_cost"""
+        if plan is None or self.max_query_cost is None or plan.estimated_cost <= self.max_query_cost:
+            return None
+        self.rejected_queries += 1
+        message = (f"Query rejected: estimated to visit {plan.estimated_cost:,.0f} rows, "
+                   f"more than the limit of {self.max_query_cost:,.0f}")
+        if plan.full_scans:
+            message += f" (full scans of {', '.join(sorted(set(plan.full_scans)))})"
+        self.logger.warning(message)
+        return message
+    
+    def _limit_query(self, query: str, limit: int, offset: int = 0) -> Tuple[str, bool]:
+        """
+        Append LIMIT/OFFSET to a SELECT query so SQLite stops early
+        
+        The query is not wrapped in a subquery, so its ORDER BY and its column
+        names (including duplicates) are kept. A query that already has a
+        top-level LIMIT is returned unchanged and the caller caps the rows it
+        fetches instead.
+        
+        Returns:
+            Tuple of (sql, applied) where applied tells whether the limit was added
+        """
+        depth = 0
+        end = 0
+        has_limit = False
+        for match in SQL_TOKEN_PATTERN.finditer(query):
+            kind, value = match.lastgroup, match.group()
+            if kind in ('comment', 'space'):
+                continue
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+            elif depth == 0 and kind == 'word' and value.lower() == 'limit':
+                has_limit = True
+            if value != ';':
+                end = match.end()
+        if has_limit:
+            return query, False
+        # The newline ends a trailing "--" comment inside the body
+        return f"{query[:end]}\nLIMIT {int(limit)} OFFSET {int(offset)}", True
+    
+    def _rows_to_frame(self, rows: List[Tuple], columns: List[str]) -> pd.DataFrame:
+        """Build a DataFrame directly from row tuples"""
+        df = pd.DataFrame.from_records(rows, columns=columns)
+        if df.columns.has_duplicates:
+            # Keep one column per name, as the old dict-per-row conversion did
+            df = df.loc[:, ~df.columns.duplicated(keep='last')]
+        return df
+    
     def _create_error_result(self, error_message: str, start_time: float) -> QueryResult:
         """Create error result"""
         execution_time = time.time() - start_time
@@ -296,6 +1996,10 @@ class SQLiteClient:
             metadata={'error': True}
         )
     
+    def _is_select(self, query: str) -> bool:
+        """Check whether a query only reads data"""
+        return query.strip().upper().startswith(('SELECT', 'WITH'))
+    
     def _get_query_type(self, query: str) -> str:
         """Determine query type"""
         query_upper = query.strip().upper()
@@ -316,16 +2020,22 @@ class SQLiteClient:
         else:
             return 'OTHER'
     
-    def validate_query(self, query: str) -> Tuple[bool, Optional[str]]:
+    def validate_query(self, query: str, params: Optional[Tuple] = None) -> Tuple[bool, Optional[str]]:
         """
         Validate SQL query without executing it
         
         Args:
             query: SQL query to validate
+            params: Optional query parameters
             
         Returns:
             Tuple of (is_valid, error_message)
         """
+        is_valid, error_message, _ = self._validate(query, params)
+        return is_valid, error_message
+    
+    def _validate(self, query: str, params: Optional[Tuple] = None) -> Tuple[bool, Optional[str], Optional[List[Tuple]]]:
+        """Validate a query, returning (is_valid, error_message, EXPLAIN QUERY PLAN rows)"""
         with tracer.start_as_current_span("validate_query") as span:
             span.set_attribute(SpanAttributes.FI_SPAN_KIND, FiSpanKindValues.TOOL.value)
             span.set_attribute("input.value", query)
@@ -336,7 +2046,7 @@ class SQLiteClient:
                 if not query or not query.strip():
                     output["error_message"] = "Empty query"
                     span.set_attribute("output.value", json.dumps(output))
-                    return False, "Empty query"
+                    return False, "Empty query", None
                 
                 # Check for dangerous operations
                 dangerous_keywords = ['DROP', 'DELETE', 'TRUNCATE', 'ALTER']
@@ -350,24 +2060,131 @@ class SQLiteClient:
                         
                         output["error_message"] = f"Dangerous operation '{keyword}' not allowed"
                         span.set_attribute("output.value", json.dumps(output))
-                        return False, output["error_message"]
+                        return False, output["error_message"], None
                 
-                # Try to parse the query using SQLite's EXPLAIN
-                with sqlite3.connect(self.database_path) as conn:
+                # Try to parse the query using SQLite's EXPLAIN; the plan of a
+                # SELECT is kept for cost estimation
+                with self.read_pool.connection() as conn:
                     try:
-                        conn.execute(f"EXPLAIN QUERY PLAN {query}")
+                        if self.plan_advisor and self._is_select(query):
+                            plan_rows = self.plan_advisor.explain(conn, query, params)
+                        else:
+                            plan_rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
                         output["is_valid"] = True
                         span.set_attribute("output.value", json.dumps(output))
-                        return True, None
+                        return True, None, plan_rows
                     except sqlite3.Error as e:
                         output["error_message"] = str(e)
                         span.set_attribute("output.value", json.dumps(output))
-                        return False, str(e)
+                        return False, str(e), None
                         
             except Exception as e:
                 output["error_message"] = f"Validation error: {str(e)}"
                 span.set_attribute("output.value", json.dumps(output))
-                return False, output["error_message"]
+                return False, output["error_message"], None
+    
+    def get_schema_snapshot(self) -> SchemaSnapshot:
+        """
+        Return the cached schema catalog, reloading it if the schema changed
+        
+        The catalog is loaded once and kept until PRAGMA schema_version moves,
+        which SQLite bumps on every DDL statement, so the common path costs a
+        single PRAGMA. Sample rows are captured with the catalog and are
+        illustrative only; they are not refreshed on data changes. The
+        snapshot is immutable and shared by all callers, so it is never copied.
+        
+        Returns:
+            SchemaSnapshot for the current schema version
+        """
+        with self.read_pool.connection() as conn:
+            schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            snapshot = self.schema_snapshot
+            if snapshot is not None and snapshot.schema_version == schema_version:
+                return snapshot
+            
+            with self.schema_lock:
+                snapshot = self.schema_snapshot
+                if snapshot is None or snapshot.schema_version != schema_version:
+                    snapshot = self._load_schema_snapshot(conn, schema_version)
+                    self.schema_snapshot = snapshot
+                    self.logger.info(f"Schema catalog loaded: {len(snapshot.tables)} tables (version {schema_version})")
+                return snapshot
+    
+    def _load_schema_snapshot(self, conn: sqlite3.Connection, schema_version: int) -> SchemaSnapshot:
+        """Introspect every table and precompute prompt text"""
+        cursor = conn.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """)
+        tables = tuple(row[0] for row in cursor.fetchall())
+        
+        schema_dicts = {}
+        for table_name in tables:
+            schema = self._read_table_schema(conn, table_name)
+            if schema:
+                schema_dicts[table_name] = MappingProxyType({
+                    'table_name': schema.table_name,
+                    'columns': tuple(MappingProxyType(column) for column in schema.columns),
+                    'description': schema.description,
+                    'sample_data': tuple(MappingProxyType(row) for row in schema.sample_data or ())
+                })
+        prompt_text = "\n".join(
+            format_table_schema(table_name, schema) for table_name, schema in schema_dicts.items()
+        )
+        
+        return SchemaSnapshot(
+            schema_version=schema_version,
+            tables=tables,
+            schema_dicts=MappingProxyType(schema_dicts),
+            prompt_text=prompt_text
+        )
+    
+    @staticmethod
+    def _table_schema_from_snapshot(schema: Mapping[str, Any]) -> TableSchema:
+        """Build a caller-owned TableSchema from one table of a snapshot"""
+        return TableSchema(
+            table_name=schema['table_name'],
+            columns=[dict(column) for column in schema['columns']],
+            description=schema['description'],
+            sample_data=[dict(row) for row in schema['sample_data']]
+        )
+    
+    def _read_table_schema(self, conn: sqlite3.Connection, table_name: str) -> Optional[TableSchema]:
+        """Read column information and sample rows for one table"""
+        # Get table info
+        cursor = conn.execute(f"PRAGMA table_info({table_name})")
+        columns_info = cursor.fetchall()
+        
+        if not columns_info:
+            return None
+        
+        # Format column information
+        columns = []
+        for col_info in columns_info:
+            columns.append({
+                'name': col_info[1],
+                'type': col_info[2],
+                'nullable': not col_info[3],
+                'default': col_info[4],
+                'primary_key': bool(col_info[5])
+            })
+        
+        # Get sample data
+        sample_data = None
+        try:
+            cursor = conn.execute(f"SELECT * FROM {table_name} LIMIT 3")
+            names = [description[0] for description in cursor.description]
+            sample_data = [dict(zip(names, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not read sample data for table {table_name}: {str(e)}")
+        
+        return TableSchema(
+            table_name=table_name,
+            columns=columns,
+            description=f"Table: {table_name}",
+            sample_data=sample_data
+        )
     
     def get_table_schema(self, table_name: str) -> Optional[TableSchema]:
         with tracer.start_as_current_span("get_table_schema") as span:
@@ -383,41 +2200,16 @@ class SQLiteClient:
             span.set_attribute(SpanAttributes.FI_SPAN_KIND, FiSpanKindValues.TOOL.value)
             span.set_attribute("input.value", table_name)
             try:
-                with sqlite3.connect(self.database_path) as conn:
-                    # Get table info
-                    cursor = conn.execute(f"PRAGMA table_info({table_name})")
-                    columns_info = cursor.fetchall()
-                    
-                    if not columns_info:
-                        span.set_attribute("output.value", "null")
-                        return None
-                    
-                    # Format column information
-                    columns = []
-                    for col_info in columns_info:
-                        columns.append({
-                            'name': col_info[1],
-                            'type': col_info[2],
-                            'nullable': not col_info[3],
-                            'default': col_info[4],
-                            'primary_key': bool(col_info[5])
-                        })
-                    
-                    # Get sample data
-                    sample_query = f"SELECT * FROM {table_name} LIMIT 3"
-                    sample_result = self.execute_query(sample_query)
-                    sample_data = None
-                    if sample_result.success and sample_result.data is not None:
-                        sample_data = sample_result.data.to_dict('records')
-                    
-                    schema = TableSchema(
-                        table_name=table_name,
-                        columns=columns,
-                        description=f"Table: {table_name}",
-                        sample_data=sample_data
-                    )
-                    span.set_attribute("output.value", json.dumps(asdict(schema)))
-                    return schema
+                schema = self.get_schema_snapshot().schema_dicts.get(table_name)
+                if schema is not None:
+                    schema = self._table_schema_from_snapshot(schema)
+                else:
+                    # Views and differently-cased names are not in the catalog
+                    with self.read_pool.connection() as conn:
+                        schema = self._read_table_schema(conn, table_name)
+                
+                span.set_attribute("output.value", json.dumps(asdict(schema), default=str) if schema else "null")
+                return schema
                     
             except Exception as e:
                 self.logger.error(f"Error getting schema for table {table_name}: {str(e)}")
@@ -434,17 +2226,10 @@ class SQLiteClient:
             """
             span.set_attribute(SpanAttributes.FI_SPAN_KIND, FiSpanKindValues.TOOL.value)
             span.set_attribute("input.value", self.database_path)
-            tables = []
             try:
-                with sqlite3.connect(self.database_path) as conn:
-                    cursor = conn.execute("""
-                        SELECT name FROM sqlite_master 
-                        WHERE type='table' AND name NOT LIKE 'sqlite_%'
-                        ORDER BY name
-                    """)
-                    tables = [row[0] for row in cursor.fetchall()]
-                    span.set_attribute("output.value", json.dumps(tables))
-                    return tables
+                tables = list(self.get_schema_snapshot().tables)
+                span.set_attribute("output.value", json.dumps(tables))
+                return tables
                     
             except Exception as e:
                 self.logger.error(f"Error listing tables: {str(e)}")
@@ -461,18 +2246,28 @@ class SQLiteClient:
             """
             span.set_attribute(SpanAttributes.FI_SPAN_KIND, FiSpanKindValues.AGENT.value)
             span.set_attribute("input.value", self.database_path)
-            schemas = {}
-            tables = self.list_tables()
-            
-            for table_name in tables:
-                schema = self.get_table_schema(table_name)
-                if schema:
-                    schemas[table_name] = schema
-            
-            schemas_dict = {k: asdict(v) for k, v in schemas.items()}
-            span.set_attribute("output.value", json.dumps(schemas_dict))
+            try:
+                snapshot = self.get_schema_snapshot()
+            except Exception as e:
+                self.logger.error(f"Error loading schemas: {str(e)}")
+                span.set_attribute("output.value", f"Error loading schemas: {str(e)}")
+                return {}
             
-            return schemas
+            span.set_attribute("output.value", json.dumps(snapshot.schema_dicts, default=schema_json_default))
+            return {table_name: self._table_schema_from_snapshot(schema)
+                    for table_name, schema in snapshot.schema_dicts.items()}
+    
+    def get_schema_prompt(self) -> str:
+        """Return prompt-ready text describing every table"""
+        return self.get_schema_snapshot().prompt_text
+    
+    def close(self):
+        """Close all pooled connections"""
+        if self.table_versions:
+            self.table_versions.close()
+        self.read_pool.close_all()
+        if self.write_pool is not self.read_pool:
+            self.write_pool.close_all()
     
     def clear_cache(self):
         """Clear query result cache"""
@@ -494,11 +2289,18 @@ class SQLiteClient:
                 'cache_hit_rate': cache_hit_rate,
                 'error_count': self.error_count,
                 'average_execution_time': avg_execution_time,
-                'total_execution_time': self.total_execution_time
+                'total_execution_time': self.total_execution_time,
+                'rejected_queries': self.rejected_queries
             }
             
             if self.cache:
-                metrics['cache_stats'] = self.cache.get_stats()
+                cache_stats = self.cache.get_stats()
+                metrics['cache_misses'] = cache_stats['misses']
+                metrics['cache_evictions'] = cache_stats['evictions']
+                metrics['cache_stats'] = cache_stats
+            
+            if self.plan_advisor:
+                metrics['plan_stats'] = self.plan_advisor.get_stats()
             
             span.set_attribute("output.value", json.dumps(metrics))
             return metrics
@@ -511,9 +2313,11 @@ class SQLiteClient:
             script: SQL script with multiple statements
         """
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with self.write_pool.connection() as conn:
                 conn.executescript(script)
                 conn.commit()
+            if self.table_versions:
+                self.table_versions.invalidate_all()
             self.logger.info("SQL script executed successfully")
             
         except Exception as e:
@@ -528,9 +2332,12 @@ class SQLiteClient:
             backup_path: Path for the backup file
         """
         try:
-            with sqlite3.connect(self.database_path) as source:
-                with sqlite3.connect(backup_path) as backup:
+            with self.write_pool.connection() as source:
+                backup = sqlite3.connect(backup_path)
+                try:
                     source.backup(backup)
+                finally:
+                    backup.close()
             self.logger.info(f"Database backed up to {backup_path}")
             
         except Exception as e:
@@ -6,9 +6,10 @@ using SQLite instead of BigQuery for local database operations.
 """
 
 import os
+import asyncio
 import logging
 from typing import Dict, List, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import time
 from datetime import datetime
 import json
@@ -16,8 +17,9 @@ import json
 from .query_processor import QuestionProcessor, ProcessedQuestion
 from .sql_generator import SQLGenerator, QueryContext, GeneratedSQL
 from .vector_store import VectorStore, ContextRetriever, SchemaLoader
-from .sqlite_client import SQLiteClient, QueryResult, create_sqlite_client
+from .sqlite_client import SQLiteClient, QueryResult, create_sqlite_client, schema_json_default
 from .response_generator import ResponseGenerator, ResponseContext, GeneratedResponse
+from .background_evaluations import submit_evaluation, get_evaluation_stats
 
 from fi_instrumentation import register, FITracer
 from fi_instrumentation.fi_types import ProjectType
@@ -46,6 +48,8 @@ class AgentConfig:
     enable_cache: bool = True
     max_results: int = 1000
     enable_visualization: bool = True
+    auto_create_indexes: bool = False
+    max_query_cost: Optional[float] = 1e9
     log_level: str = "INFO"
 
 
@@ -63,6 +67,7 @@ class AgentResponse:
     confidence_score: float
     error_message: Optional[str]
     metadata: Dict[str, Any]
+    query_result: Optional[QueryResult] = field(default=None, repr=False)  # Rows of sql_query, for its first page
 
 
 class Text2SQLAgentSQLite:
@@ -91,7 +96,9 @@ class Text2SQLAgentSQLite:
         self.sqlite_client = create_sqlite_client(
             database_path=config.database_path,
             enable_cache=config.enable_cache,
-            max_results=config.max_results
+            max_results=config.max_results,
+            auto_create_indexes=config.auto_create_indexes,
+            max_query_cost=config.max_query_cost
         )
         
         self.response_generator = ResponseGenerator(api_key=config.openai_api_key)
@@ -233,107 +240,16 @@ class Text2SQLAgentSQLite:
                 self.logger.debug(f"Question processed - Intent: {processed_question.intent}")
                 
                 # Step 2: Retrieve relevant context
-                context = self.context_retriever.retrieve_context(
-                    question=question,
-                    intent=processed_question.intent,
-                    entities=[e.value for e in processed_question.entities]
-                )
-                self.logger.debug(f"Context retrieved - {len(context.schemas)} schemas, {len(context.examples)} examples")
+                context = self._retrieve_context(question, processed_question)
+                schema_snapshot = self.sqlite_client.get_schema_snapshot()
                 
                 # Step 3: Generate SQL query with SQLite-specific context
-                # If vector store is empty, get schemas directly from database
-                if len(context.schemas) == 0:
-                    self.logger.info("No schemas in vector store, using direct database schema inspection")
-                    all_schemas = self.sqlite_client.get_all_schemas()
-                    
-                    # Convert SQLite schemas to the format expected by SQL generator
-                    table_schemas = {}
-                    for table_name, schema in all_schemas.items():
-                        table_schemas[table_name] = {
-                            'table_name': schema.table_name,
-                            'columns': schema.columns,
-                            'description': schema.description,
-                            'sample_data': schema.sample_data or []
-                        }
-                else:
-                    table_schemas = {schema.table_name: asdict(schema) for schema in context.schemas}
-
-                query_context = QueryContext(
-                    table_schemas=table_schemas,
-                    sample_data={},  # Could be populated with actual sample data
-                    business_rules=[rule.description for rule in context.rules],
-                    similar_queries=[{"question": ex.question, "sql": ex.sql_query} for ex in context.examples],
-                    metadata={
-                        **context.metadata,
-                        'database_type': 'sqlite',
-                        'available_tables': self.sqlite_client.list_tables(),
-                        'actual_schemas_used': len(table_schemas)
-                    }
-                )
-                
+                query_context, table_schemas = self._build_query_context(context, schema_snapshot)
                 generated_sql = self.sql_generator.generate_sql(question, query_context)
                 self.logger.debug(f"SQL generated - Confidence: {generated_sql.confidence_score}")
                 
                 if not generated_sql.sql_query or generated_sql.validation_errors:
-
-                    #########################################################
-                    print("#########################")
-                    print("completeness_of_context")
-                    print(json.dumps(question))
-                    print(json.dumps(table_schemas))
-                    print("#########################")
-                    config_completeness_of_context = {
-                        "eval_templates" : "completeness_of_context",
-                        "inputs" : {
-                            "question": json.dumps(question),
-                            "context": json.dumps(table_schemas),
-                        },
-                        "model_name" : "turing_large"
-                    }
-
-                    eval_result1 = evaluator.evaluate(
-                        **config_completeness_of_context, 
-                        custom_eval_name="completeness_of_context", 
-                        trace_eval=True
-                    )
-
-                    print("#########################")
-                    print("pricing_logic_correctness")
-                    print("None")
-                    print("#########################")
-                    config_pricing_logic_correctness = {
-                        "eval_templates" : "pricing_logic_correctness_2",
-                        "inputs" : {
-                            "agent_response": json.dumps("None"),
-                        },
-                        "model_name" : "turing_large"
-                    }
-
-                    eval_result2 = evaluator.evaluate(
-                        **config_pricing_logic_correctness, 
-                        custom_eval_name="pricing_logic_correctness", 
-                        trace_eval=True
-                    )
-
-                    print("#########################")
-                    print("ambiguity_resolution")
-                    print(json.dumps(question))
-                    print(json.dumps("None"))
-                    print("#########################")
-                    config_ambiguity_resolution = {
-                        "eval_templates" : "ambiguity_resolution_2",
-                        "inputs" : {
-                            "question": json.dumps(question),
-                            "agent_response": json.dumps("None"),
-                        },
-                        "model_name" : "turing_large"
-                    }
-
-                    eval_result3 = evaluator.evaluate(
-                        **config_ambiguity_resolution, 
-                        custom_eval_name="ambiguity_resolution", 
-                        trace_eval=True
-                    )
+                    self._submit_evaluations(question, table_schemas, None)
                     return self._create_error_response(
                         question, 
                         "Failed to generate valid SQL query",
@@ -342,117 +258,239 @@ class Text2SQLAgentSQLite:
                     )
                 
                 # Step 4: Execute SQL query using SQLite
-                query_result = self.sqlite_client.execute_query(generated_sql.sql_query)
-                self.logger.debug(f"Query executed - Success: {query_result.success}, Rows: {query_result.row_count}")
+                query_result = self._execute_sql(question, generated_sql, query_context)
                 
                 # Step 5: Generate natural language response
-                response_context = ResponseContext(
-                    original_question=question,
-                    sql_query=generated_sql.sql_query,
-                    query_result=query_result,
-                    intent=processed_question.intent,
-                    entities=[e.value for e in processed_question.entities],
-                    user_preferences=user_context or {}
-                )
-                
+                response_context = self._build_response_context(question, processed_question, generated_sql,
+                                                                query_result, user_context)
                 generated_response = self.response_generator.generate_response(response_context)
                 self.logger.debug("Natural language response generated")
                 
-                # Calculate execution time
-                execution_time = time.time() - start_time
-                self.total_execution_time += execution_time
+                agent_response = self._build_agent_response(processed_question, generated_sql, query_result,
+                                                            generated_response, start_time)
+                span.set_attribute("output.value", json.dumps(agent_response.natural_language_response))
+                
+                self._submit_evaluations(question, table_schemas, agent_response.natural_language_response)
+                return agent_response
+                
+            except Exception as e:
+                self.logger.error(f"Error processing question: {str(e)}")
+                return self._create_error_response(question, str(e), [], start_time)
+    
+    async def process_question_async(self, question: str, user_context: Optional[Dict] = None) -> AgentResponse:
+        with tracer.start_as_current_span("process_question_async") as span:
+            span.set_attribute("process_question_async", "process_question_async")
+            span.set_attribute(SpanAttributes.FI_SPAN_KIND, FiSpanKindValues.AGENT.value)
+            span.set_attribute("input.value", json.dumps(question))
+
+            """
+            Asynchronous version of process_question
+            
+            Blocking stages run in worker threads and independent stages overlap:
+            context retrieval with the schema catalog lookup, and the text
+            response with table formatting and chart rendering. Evaluations run
+            in the background in both versions.
+            
+            Args:
+                question: Natural language question
+                user_context: Optional user context (preferences, filters, etc.)
+                
+            Returns:
+                AgentResponse with complete results
+            """
+            start_time = time.time()
+            self.query_count += 1
+            
+            try:
+                self.logger.info(f"Processing question: {question}")
                 
-                if query_result.success:
-                    self.successful_queries += 1
+                # Step 1: Process the question (regex based, microseconds)
+                processed_question = self.question_processor.process_question(question)
+                self.logger.debug(f"Question processed - Intent: {processed_question.intent}")
                 
-                # Create final response
-                agent_response = AgentResponse(
-                    success=query_result.success,
-                    natural_language_response=generated_response.text_response,
-                    sql_query=generated_sql.sql_query,
-                    data_table=generated_response.data_table,
-                    visualization=generated_response.visualization,
-                    key_insights=generated_response.key_insights,
-                    execution_time=execution_time,
-                    row_count=query_result.row_count,
-                    confidence_score=min(generated_sql.confidence_score, generated_response.confidence_score),
-                    error_message=query_result.error_message,
-                    metadata={
-                        'processed_question': asdict(processed_question),
-                        'generated_sql': asdict(generated_sql),
-                        'query_result_metadata': query_result.metadata,
-                        'response_metadata': generated_response.metadata,
-                        'agent_stats': self.get_stats(),
-                        'database_type': 'sqlite'
-                    }
+                # Step 2: Retrieve relevant context while loading the schema catalog
+                context, schema_snapshot = await asyncio.gather(
+                    asyncio.to_thread(self._retrieve_context, question, processed_question),
+                    asyncio.to_thread(self.sqlite_client.get_schema_snapshot)
                 )
                 
-                self.logger.info(f"Question processed successfully in {execution_time:.2f}s")
+                # Step 3: Generate SQL query with SQLite-specific context
+                query_context, table_schemas = self._build_query_context(context, schema_snapshot)
+                generated_sql = await asyncio.to_thread(self.sql_generator.generate_sql, question, query_context)
+                self.logger.debug(f"SQL generated - Confidence: {generated_sql.confidence_score}")
+                
+                if not generated_sql.sql_query or generated_sql.validation_errors:
+                    self._submit_evaluations(question, table_schemas, None)
+                    return self._create_error_response(
+                        question, 
+                        "Failed to generate valid SQL query",
+                        generated_sql.validation_errors,
+                        start_time
+                    )
+                
+                # Step 4: Execute SQL query using SQLite
+                query_result = await asyncio.to_thread(self._execute_sql, question, generated_sql, query_context)
+                
+                # Step 5: Generate natural language response, table and chart concurrently
+                response_context = self._build_response_context(question, processed_question, generated_sql,
+                                                                query_result, user_context)
+                generated_response = await self.response_generator.generate_response_async(response_context)
+                self.logger.debug("Natural language response generated")
+                
+                agent_response = self._build_agent_response(processed_question, generated_sql, query_result,
+                                                            generated_response, start_time)
                 span.set_attribute("output.value", json.dumps(agent_response.natural_language_response))
                 
-                print("#########################")
-                print("completeness_of_context")
-                print(json.dumps(question))
-                print(json.dumps(table_schemas))
-                print("#########################")
-                config_completeness_of_context = {
-                    "eval_templates" : "completeness_of_context",
-                    "inputs" : {
-                        "question": json.dumps(question),
-                        "context": json.dumps(table_schemas),
-                    },
-                    "model_name" : "turing_large"
-                }
-
-                eval_result4 = evaluator.evaluate(
-                    **config_completeness_of_context, 
-                    custom_eval_name="completeness_of_context", 
-                    trace_eval=True
-                )
-
-                print("#########################")
-                print("pricing_logic_correctness")
-                print(json.dumps(agent_response.natural_language_response if agent_response.natural_language_response is not None else "None"))
-                print("#########################")
-                config_pricing_logic_correctness = {
-                    "eval_templates" : "pricing_logic_correctness_2",
-                    "inputs" : {
-                        "agent_response": json.dumps(agent_response.natural_language_response if agent_response.natural_language_response is not None else "None"),
-                    },
-                    "model_name" : "turing_large"
-                }
-
-                eval_result5 = evaluator.evaluate(
-                    **config_pricing_logic_correctness, 
-                    custom_eval_name="pricing_logic_correctness", 
-                    trace_eval=True
-                )
-
-                print("#########################")
-                print("ambiguity_resolution")
-                print(json.dumps(question))
-                print(json.dumps(agent_response.natural_language_response))
-                print("#########################")
-                config_ambiguity_resolution = {
-                    "eval_templates" : "ambiguity_resolution_2",
-                    "inputs" : {
-                        "question": json.dumps(question),
-                        "agent_response": json.dumps(agent_response.natural_language_response),
-                    },
-                    "model_name" : "turing_large"
-                }
-
-                eval_result6 = evaluator.evaluate(
-                    **config_ambiguity_resolution, 
-                    custom_eval_name="ambiguity_resolution", 
-                    trace_eval=True
-                )
+                self._submit_evaluations(question, table_schemas, agent_response.natural_language_response)
                 return agent_response
                 
             except Exception as e:
                 self.logger.error(f"Error processing question: {str(e)}")
                 return self._create_error_response(question, str(e), [], start_time)
     
+    def _retrieve_context(self, question: str, processed_question: ProcessedQuestion):
+        """Retrieve schemas, examples and business rules relevant to the question"""
+        context = self.context_retriever.retrieve_context(
+            question=question,
+            intent=processed_question.intent,
+            entities=[e.value for e in processed_question.entities]
+        )
+        self.logger.debug(f"Context retrieved - {len(context.schemas)} schemas, {len(context.examples)} examples")
+        return context
+    
+    def _build_query_context(self, context, schema_snapshot) -> Tuple[QueryContext, Dict[str, Any]]:
+        """Build the SQL generation context, returning it with the table schemas it uses"""
+        # If vector store is empty, use the cached database schema catalog
+        schema_metadata = {}
+        if len(context.schemas) == 0:
+            self.logger.info("No schemas in vector store, using direct database schema inspection")
+            
+            # Schemas already converted to the format expected by SQL generator
+            table_schemas = schema_snapshot.schema_dicts
+            schema_metadata['schema_prompt'] = schema_snapshot.prompt_text
+        else:
+            table_schemas = {schema.table_name: asdict(schema) for schema in context.schemas}
+
+        query_context = QueryContext(
+            table_schemas=table_schemas,
+            sample_data={},  # Could be populated with actual sample data
+            business_rules=[rule.description for rule in context.rules],
+            similar_queries=[{"question": ex.question, "sql": ex.sql_query} for ex in context.examples],
+            metadata={
+                **context.metadata,
+                **schema_metadata,
+                'database_type': 'sqlite',
+                'available_tables': list(schema_snapshot.tables),
+                'actual_schemas_used': len(table_schemas)
+            }
+        )
+        return query_context, table_schemas
+    
+    def _execute_sql(self, question: str, generated_sql: GeneratedSQL, query_context: QueryContext) -> QueryResult:
+        """Execute generated SQL, dropping it from the generation cache if it fails"""
+        query_result = self.sqlite_client.execute_query(generated_sql.sql_query)
+        self.logger.debug(f"Query executed - Success: {query_result.success}, Rows: {query_result.row_count}")
+        if not query_result.success:
+            # Do not serve SQL that fails against the database from the generation cache
+            self.sql_generator.invalidate_cached_sql(question, query_context)
+        return query_result
+    
+    def _build_response_context(self, question: str, processed_question: ProcessedQuestion,
+                                generated_sql: GeneratedSQL, query_result: QueryResult,
+                                user_context: Optional[Dict]) -> ResponseContext:
+        """Build the context for natural language response generation"""
+        return ResponseContext(
+            original_question=question,
+            sql_query=generated_sql.sql_query,
+            query_result=query_result,
+            intent=processed_question.intent,
+            entities=[e.value for e in processed_question.entities],
+            user_preferences=user_context or {}
+        )
+    
+    def _build_agent_response(self, processed_question: ProcessedQuestion, generated_sql: GeneratedSQL,
+                              query_result: QueryResult, generated_response: GeneratedResponse,
+                              start_time: float) -> AgentResponse:
+        """Record metrics and assemble the final agent response"""
+        # Calculate execution time
+        execution_time = time.time() - start_time
+        self.total_execution_time += execution_time
+        
+        if query_result.success:
+            self.successful_queries += 1
+        
+        agent_response = AgentResponse(
+            success=query_result.success,
+            natural_language_response=generated_response.text_response,
+            sql_query=generated_sql.sql_query,
+            data_table=generated_response.data_table,
+            visualization=generated_response.visualization,
+            key_insights=generated_response.key_insights,
+            execution_time=execution_time,
+            row_count=query_result.row_count,
+            confidence_score=min(generated_sql.confidence_score, generated_response.confidence_score),
+            error_message=query_result.error_message,
+            metadata={
+                'processed_question': asdict(processed_question),
+                'generated_sql': asdict(generated_sql),
+                'query_result_metadata': query_result.metadata,
+                'response_metadata': generated_response.metadata,
+                'agent_stats': self.get_stats(),
+                'database_type': 'sqlite'
+            },
+            query_result=query_result
+        )
+        
+        self.logger.info(f"Question processed successfully in {execution_time:.2f}s")
+        return agent_response
+    
+    def _submit_evaluations(self, question: str, table_schemas: Dict[str, Any], agent_response: Optional[str]):
+        """Queue the response evaluations in the background; agent_response is None when no SQL was produced"""
+        response_text = agent_response if agent_response is not None else "None"
+        
+        print("#########################")
+        print("completeness_of_context")
+        print(json.dumps(question))
+        print(json.dumps(table_schemas, default=schema_json_default))
+        print("#########################")
+        config_completeness_of_context = {
+            "eval_templates" : "completeness_of_context",
+            "inputs" : {
+                "question": json.dumps(question),
+                "context": json.dumps(table_schemas, default=schema_json_default),
+            },
+            "model_name" : "turing_large"
+        }
+        submit_evaluation(evaluator, config_completeness_of_context, "completeness_of_context")
+
+        print("#########################")
+        print("pricing_logic_correctness")
+        print(json.dumps(response_text))
+        print("#########################")
+        config_pricing_logic_correctness = {
+            "eval_templates" : "pricing_logic_correctness_2",
+            "inputs" : {
+                "agent_response": json.dumps(response_text),
+            },
+            "model_name" : "turing_large"
+        }
+        submit_evaluation(evaluator, config_pricing_logic_correctness, "pricing_logic_correctness")
+
+        print("#########################")
+        print("ambiguity_resolution")
+        print(json.dumps(question))
+        print(json.dumps(response_text))
+        print("#########################")
+        config_ambiguity_resolution = {
+            "eval_templates" : "ambiguity_resolution_2",
+            "inputs" : {
+                "question": json.dumps(question),
+                "agent_response": json.dumps(response_text),
+            },
+            "model_name" : "turing_large"
+        }
+        submit_evaluation(evaluator, config_ambiguity_resolution, "ambiguity_resolution")
+    
     def _create_error_response(self, question: str, error_message: str, 
                              validation_errors: List[str], start_time: float) -> AgentResponse:
         """Create error response"""
@@ -492,6 +530,23 @@ class Text2SQLAgentSQLite:
         refined_question = f"{original_question} (Feedback: {feedback})"
         return self.process_question(refined_question)
     
+    def fetch_page(self, sql_query: Optional[str] = None, page_token: Optional[str] = None,
+                   page_size: int = 100, query_result: Optional[QueryResult] = None) -> QueryResult:
+        """
+        Fetch one page of results for a generated SQL query
+        
+        Args:
+            sql_query: SQL query to paginate (first page)
+            page_token: Token from a previous page (subsequent pages)
+            page_size: Number of rows per page
+            query_result: Already computed result of sql_query, to cut the first page from
+            
+        Returns:
+            QueryResult with metadata['next_page_token'] set if more rows exist
+        """
+        return self.sqlite_client.execute_page(query=sql_query, page_token=page_token, page_size=page_size,
+                                               result=query_result)
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get agent performance statistics"""
         success_rate = self.successful_queries / self.query_count if self.query_count > 0 else 0
@@ -504,6 +559,9 @@ class Text2SQLAgentSQLite:
             'average_execution_time': avg_execution_time,
             'sqlite_stats': self.sqlite_client.get_metrics_summary(),
             'vector_store_stats': self.vector_store.get_collection_stats(),
+            'sql_generator_stats': self.sql_generator.get_cache_stats(),
+            'chart_stats': self.response_generator.data_visualizer.get_cache_stats(),
+            'evaluation_stats': get_evaluation_stats(),
             'database_type': 'sqlite'
         }
     
@@ -9,6 +9,11 @@ import os
 import json
 import logging
 import pickle
+import atexit
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple, Any, Union
 from dataclasses import dataclass, asdict
 import numpy as np
@@ -17,6 +22,7 @@ import chromadb
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 
 @dataclass
@@ -68,23 +74,42 @@ class ContextResult:
 class EmbeddingManager:
     """Manages embeddings using OpenAI's embedding model"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cache_file: str = "embedding_cache.pkl",
+                 max_cache_entries: int = 10000, flush_interval: float = 60.0, flush_batch: int = 100):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            cache_file: Pickle file the embedding cache is persisted to
+            max_cache_entries: Least recently used embeddings are evicted beyond this size
+            flush_interval: Seconds after which new embeddings are written in the background
+            flush_batch: Number of new embeddings that triggers a background write sooner
+        """
         self.client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
         self.model = "text-embedding-3-small"  # More cost-effective for this use case
         self.logger = logging.getLogger(__name__)
         
         # Cache for embeddings to avoid redundant API calls
-        self.embedding_cache = {}
-        self.cache_file = "embedding_cache.pkl"
+        self.embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.cache_file = cache_file
+        self.max_cache_entries = max_cache_entries
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = 0
+        self._last_save = time.time()
+        self._flusher: Optional[threading.Thread] = None
         self._load_cache()
+        atexit.register(self.flush)
     
     def get_embedding(self, text: str) -> List[float]:
         """Get embedding for text with caching"""
         # Create cache key
         cache_key = hashlib.md5(text.encode()).hexdigest()
         
-        if cache_key in self.embedding_cache:
-            return self.embedding_cache[cache_key]
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
             response = self.client.embeddings.create(
@@ -95,8 +120,7 @@ class EmbeddingManager:
             embedding = response.data[0].embedding
             
             # Cache the result
-            self.embedding_cache[cache_key] = embedding
-            self._save_cache()
+            self._cache_put({cache_key: embedding})
             
             return embedding
             
@@ -113,10 +137,9 @@ class EmbeddingManager:
         
         for i, text in enumerate(texts):
             cache_key = hashlib.md5(text.encode()).hexdigest()
-            if cache_key in self.embedding_cache:
-                embeddings.append(self.embedding_cache[cache_key])
-            else:
-                embeddings.append(None)
+            cached = self._cache_get(cache_key)
+            embeddings.append(cached)
+            if cached is None:
                 uncached_texts.append(text)
                 uncached_indices.append(i)
         
@@ -128,16 +151,15 @@ class EmbeddingManager:
                     input=uncached_texts
                 )
                 
+                new_entries = {}
                 for i, embedding_data in enumerate(response.data):
                     embedding = embedding_data.embedding
                     original_index = uncached_indices[i]
                     embeddings[original_index] = embedding
-                    
-                    # Cache the result
-                    cache_key = hashlib.md5(uncached_texts[i].encode()).hexdigest()
-                    self.embedding_cache[cache_key] = embedding
+                    new_entries[hashlib.md5(uncached_texts[i].encode()).hexdigest()] = embedding
                 
-                self._save_cache()
+                # Cache the results
+                self._cache_put(new_entries)
                 
             except Exception as e:
                 self.logger.error(f"Error getting batch embeddings: {str(e)}")
@@ -147,23 +169,62 @@ class EmbeddingManager:
         
         return embeddings
     
+    def flush(self):
+        """Write new cache entries to disk now"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = OrderedDict(self.embedding_cache)
+                self._dirty = 0
+                self._last_save = time.time()
+            self._save_cache(snapshot)
+    
+    def _cache_get(self, cache_key: str) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self.embedding_cache.get(cache_key)
+            if embedding is not None:
+                self.embedding_cache.move_to_end(cache_key)
+            return embedding
+    
+    def _cache_put(self, entries: Dict[str, List[float]]):
+        """Add embeddings, evict beyond max_cache_entries and schedule a write when due"""
+        with self._lock:
+            for cache_key, embedding in entries.items():
+                self.embedding_cache[cache_key] = embedding
+                self.embedding_cache.move_to_end(cache_key)
+            while len(self.embedding_cache) > self.max_cache_entries:
+                self.embedding_cache.popitem(last=False)
+            self._dirty += len(entries)
+            due = self._dirty >= self.flush_batch or time.time() - self._last_save >= self.flush_interval
+            if due and (self._flusher is None or not self._flusher.is_alive()):
+                self._flusher = threading.Thread(target=self.flush, daemon=True)
+                self._flusher.start()
+    
     def _load_cache(self):
         """Load embedding cache from disk"""
         try:
             if os.path.exists(self.cache_file):
                 with open(self.cache_file, 'rb') as f:
-                    self.embedding_cache = pickle.load(f)
+                    cache = pickle.load(f)
+                self.embedding_cache = OrderedDict(list(cache.items())[-self.max_cache_entries:])
         except Exception as e:
             self.logger.warning(f"Could not load embedding cache: {str(e)}")
-            self.embedding_cache = {}
+            self.embedding_cache = OrderedDict()
     
-    def _save_cache(self):
-        """Save embedding cache to disk"""
+    def _save_cache(self, cache: "OrderedDict[str, List[float]]"):
+        """Save embedding cache to disk atomically. Caller holds the save lock."""
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        tmp_path = None
         try:
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(self.embedding_cache, f)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(cache, f)
+            os.replace(tmp_path, self.cache_file)
         except Exception as e:
             self.logger.warning(f"Could not save embedding cache: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
 
 class VectorStore:
@@ -260,58 +321,77 @@ class VectorStore:
         except Exception as e:
             self.logger.error(f"Error adding business rule: {str(e)}")
     
-    def search_schemas(self, query: str, n_results: int = 5) -> List[SchemaInfo]:
-        """Search for relevant schemas"""
+    def embed_query(self, query: str) -> Optional[List[float]]:
+        """
+        Embed a search query once so it can be reused across collections
+        
+        Uses the same model as the collections' embedding function. Returns
+        None if the embedding could not be computed, in which case searches
+        fall back to letting Chroma embed the query text.
+        """
+        embedding = self.embedding_manager.get_embedding(query)
+        if not any(embedding):
+            return None
+        return embedding
+    
+    def _search(self, collection, query: str, n_results: int,
+                query_embedding: Optional[List[float]] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Query a collection and return (metadata, similarity) pairs, best first"""
+        include = ['metadatas', 'distances']
+        if query_embedding is not None:
+            results = collection.query(query_embeddings=[query_embedding], n_results=n_results, include=include)
+        else:
+            results = collection.query(query_texts=[query], n_results=n_results, include=include)
+        
+        space = (collection.metadata or {}).get('hnsw:space', 'l2')
+        distances = results.get('distances') or [[]]
+        return [
+            (metadata, self._distance_to_similarity(distance, space))
+            for metadata, distance in zip(results['metadatas'][0], distances[0])
+        ]
+    
+    @staticmethod
+    def _distance_to_similarity(distance: float, space: str) -> float:
+        """Convert a Chroma distance to a cosine similarity for unit-length embeddings"""
+        if space == 'l2':
+            # Chroma reports squared L2 distance, which is 2 - 2 * cosine for unit vectors
+            return 1.0 - distance / 2.0
+        # Cosine and inner-product distances are 1 - similarity
+        return 1.0 - distance
+    
+    def search_schemas_scored(self, query: str, n_results: int = 5,
+                              query_embedding: Optional[List[float]] = None) -> List[Tuple[SchemaInfo, float]]:
+        """Search for relevant schemas, returning each with its similarity score"""
         try:
-            results = self.schema_collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            schemas = []
-            for metadata in results['metadatas'][0]:
-                schema = SchemaInfo(**metadata)
-                schemas.append(schema)
-            
-            return schemas
+            results = self._search(self.schema_collection, query, n_results, query_embedding)
+            return [(SchemaInfo(**metadata), score) for metadata, score in results]
             
         except Exception as e:
             self.logger.error(f"Error searching schemas: {str(e)}")
             return []
     
-    def search_examples(self, query: str, n_results: int = 3) -> List[QueryExample]:
+    def search_schemas(self, query: str, n_results: int = 5,
+                       query_embedding: Optional[List[float]] = None) -> List[SchemaInfo]:
+        """Search for relevant schemas"""
+        return [schema for schema, _ in self.search_schemas_scored(query, n_results, query_embedding)]
+    
+    def search_examples(self, query: str, n_results: int = 3,
+                        query_embedding: Optional[List[float]] = None) -> List[QueryExample]:
         """Search for similar query examples"""
         try:
-            results = self.examples_collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            examples = []
-            for metadata in results['metadatas'][0]:
-                example = QueryExample(**metadata)
-                examples.append(example)
-            
-            return examples
+            results = self._search(self.examples_collection, query, n_results, query_embedding)
+            return [QueryExample(**metadata) for metadata, _ in results]
             
         except Exception as e:
             self.logger.error(f"Error searching examples: {str(e)}")
             return []
     
-    def search_business_rules(self, query: str, n_results: int = 5) -> List[BusinessRule]:
+    def search_business_rules(self, query: str, n_results: int = 5,
+                              query_embedding: Optional[List[float]] = None) -> List[BusinessRule]:
         """Search for relevant business rules"""
         try:
-            results = self.rules_collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
-            
-            rules = []
-            for metadata in results['metadatas'][0]:
-                rule = BusinessRule(**metadata)
-                rules.append(rule)
-            
-            return rules
+            results = self._search(self.rules_collection, query, n_results, query_embedding)
+            return [BusinessRule(**metadata) for metadata, _ in results]
             
         except Exception as e:
             self.logger.error(f"Error searching business rules: {str(e)}")
@@ -350,9 +430,12 @@ class VectorStore:
 class ContextRetriever:
     """Main context retrieval system"""
     
-    def __init__(self, vector_store: VectorStore):
+    def __init__(self, vector_store: VectorStore, max_workers: int = 3):
         self.vector_store = vector_store
         self.logger = logging.getLogger(__name__)
+        
+        # Schema, example and rule searches run concurrently
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="context-retrieval")
     
     def retrieve_context(self, question: str, intent: str = None, 
                         entities: List[str] = None) -> ContextResult:
@@ -371,17 +454,24 @@ class ContextRetriever:
             # Build enhanced query for better retrieval
             enhanced_query = self._build_enhanced_query(question, intent, entities)
             
-            # Search for relevant schemas
-            schemas = self.vector_store.search_schemas(enhanced_query, n_results=5)
+            # Embed the query once and share it across all three searches
+            query_embedding = self.vector_store.embed_query(enhanced_query)
             
-            # Search for similar examples
-            examples = self.vector_store.search_examples(enhanced_query, n_results=3)
+            # Search schemas, similar examples and business rules concurrently
+            schemas_future = self.executor.submit(
+                self.vector_store.search_schemas_scored, enhanced_query, 5, query_embedding)
+            examples_future = self.executor.submit(
+                self.vector_store.search_examples, enhanced_query, 3, query_embedding)
+            rules_future = self.executor.submit(
+                self.vector_store.search_business_rules, enhanced_query, 5, query_embedding)
             
-            # Search for business rules
-            rules = self.vector_store.search_business_rules(enhanced_query, n_results=5)
+            scored_schemas = schemas_future.result()
+            examples = examples_future.result()
+            rules = rules_future.result()
             
-            # Calculate relevance scores (simplified)
-            similarity_scores = [0.9] * len(schemas)  # Placeholder
+            # Relevance scores of the retrieved schemas
+            schemas = [schema for schema, _ in scored_schemas]
+            similarity_scores = [score for _, score in scored_schemas]
             
             # Build metadata
             metadata = {
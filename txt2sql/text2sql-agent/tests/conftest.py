@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app imports its modules relative to src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# The evaluation client is created at import time and requires credentials
+os.environ.setdefault("FI_API_KEY", "test")
+os.environ.setdefault("FI_SECRET_KEY", "test")
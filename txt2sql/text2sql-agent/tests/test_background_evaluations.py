@@ -0,0 +1,29 @@
+import threading
+
+from models import background_evaluations
+from models.background_evaluations import get_evaluation_stats, submit_evaluation
+
+
+class BlockingEvaluator:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def evaluate(self, **kwargs):
+        self.release.wait(5)
+        return kwargs["custom_eval_name"]
+
+
+def test_full_queue_drops_and_counts_evaluations(monkeypatch):
+    monkeypatch.setattr(background_evaluations, "MAX_PENDING_EVALUATIONS", 2)
+    evaluator = BlockingEvaluator()
+    dropped_before = get_evaluation_stats()["dropped"]
+
+    futures = [submit_evaluation(evaluator, {}, f"eval{i}") for i in range(5)]
+    assert get_evaluation_stats()["pending"] == 2
+    assert get_evaluation_stats()["dropped"] - dropped_before == 3
+    assert [future.result() for future in futures[2:]] == [None, None, None]
+
+    evaluator.release.set()
+    assert [future.result(5) for future in futures[:2]] == ["eval0", "eval1"]
+    assert get_evaluation_stats()["pending"] == 0
+    assert submit_evaluation(evaluator, {}, "eval5").result(5) == "eval5"
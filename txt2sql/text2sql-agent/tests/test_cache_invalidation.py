@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from models.sqlite_client import SQLiteClient
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, price REAL)")
+    conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, product_id INTEGER)")
+    conn.executemany("INSERT INTO products VALUES (?, ?)", [(1, 10.0), (2, 20.0)])
+    conn.execute("CREATE VIEW product_sales AS SELECT p.id, p.price FROM products p JOIN sales s ON s.product_id = p.id")
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def client(db_path):
+    client = SQLiteClient(db_path, enable_cache=True)
+    yield client
+    client.table_versions.close()
+
+
+def prices(client):
+    result = client.execute_query("SELECT price FROM products ORDER BY id")
+    return list(result.data['price']), result.cache_hit
+
+
+def test_repeated_query_is_cached(client):
+    assert prices(client) == ([10.0, 20.0], False)
+    assert prices(client) == ([10.0, 20.0], True)
+
+
+def test_write_through_client_invalidates(client):
+    prices(client)
+    client.execute_query("UPDATE products SET price = 11.0 WHERE id = 1")
+    assert prices(client) == ([11.0, 20.0], False)
+
+
+def test_write_through_client_keeps_other_tables_cached(client, db_path):
+    sales = "SELECT count(*) AS n FROM sales"
+    client.execute_query(sales)
+    client.execute_query("UPDATE products SET price = 11.0 WHERE id = 1")
+
+    assert client.execute_query(sales).cache_hit
+    assert prices(client) == ([11.0, 20.0], False)
+
+    # Outside writers still invalidate every table
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE products SET price = 12.0 WHERE id = 2")
+    conn.commit()
+    conn.close()
+
+    assert not client.execute_query(sales).cache_hit
+    assert prices(client) == ([11.0, 12.0], False)
+
+
+def test_external_update_with_insert_elsewhere_invalidates(client, db_path):
+    prices(client)
+
+    # An UPDATE leaves row counts intact; an INSERT into another table in the
+    # same transaction must not hide it
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE products SET price = 12.0 WHERE id = 2")
+    conn.execute("INSERT INTO sales (product_id) VALUES (1)")
+    conn.commit()
+    conn.close()
+
+    assert prices(client) == ([10.0, 12.0], False)
+
+
+def test_external_write_invalidates_views(client, db_path):
+    query = "SELECT count(*) AS n FROM product_sales"
+    assert client.execute_query(query).data['n'][0] == 0
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO sales (product_id) VALUES (2)")
+    conn.commit()
+    conn.close()
+
+    result = client.execute_query(query)
+    assert not result.cache_hit
+    assert result.data['n'][0] == 1
+
+
+def test_mutating_a_hit_does_not_change_the_cache(client):
+    miss = client.execute_query("SELECT price FROM products ORDER BY id").data
+    miss.loc[0, 'price'] = -1.0
+    hit = client.execute_query("SELECT price FROM products ORDER BY id")
+    assert hit.cache_hit
+
+    try:
+        hit.data.loc[0, 'price'] = -2.0
+    except ValueError:
+        pass
+    hit.data['price'] = [0.0, 0.0]
+
+    assert prices(client) == ([10.0, 20.0], True)
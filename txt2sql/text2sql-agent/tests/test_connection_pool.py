@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+
+from models.sqlite_client import ConnectionPool, PoolTimeoutError, SQLiteClient
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / "pool.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO items (name) VALUES (?)", [(f"item{i}",) for i in range(50)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_exhausted_pool_times_out(database):
+    pool = ConnectionPool(database, pool_size=1, acquire_timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError, match="pooled connections are in use"):
+            with pool.connection():
+                pass
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT count(*) FROM items").fetchone() == (50,)
+
+
+def test_closed_stream_closes_its_connection(database):
+    client = SQLiteClient(database, enable_plan_analysis=False)
+    stream = client.stream_query("SELECT * FROM items", batch_size=10)
+    next(stream)
+    stream.close()
+
+    assert client.read_pool._created == 0
+    assert client.read_pool._idle.empty()
+    assert sum(len(batch) for batch in client.stream_query("SELECT * FROM items", batch_size=10)) == 50
+    assert client.read_pool._created == 1
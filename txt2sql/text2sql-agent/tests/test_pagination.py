@@ -0,0 +1,112 @@
+import pytest
+
+from models.sqlite_client import SQLiteClient
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = SQLiteClient(str(tmp_path / "test.db"), enable_cache=False)
+    with client.write_pool.connection() as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, store TEXT, rev INTEGER, tag BLOB)")
+        conn.executemany(
+            "INSERT INTO orders (store, rev, tag) VALUES (?, ?, ?)",
+            [(f"s{i % 3}", i % 7, bytes([i % 5, 0xff])) for i in range(25)]
+        )
+        conn.execute("CREATE TABLE stores (store TEXT, city TEXT)")
+        conn.executemany("INSERT INTO stores VALUES (?, ?)", [("s0", "a"), ("s1", "b"), ("s2", "c")])
+        conn.commit()
+    return client
+
+
+def fetch_all_pages(client, page_size, **kwargs):
+    pages = [client.execute_page(page_size=page_size, **kwargs)]
+    while pages[-1].metadata.get('next_page_token'):
+        pages.append(client.execute_page(page_token=pages[-1].metadata['next_page_token'], page_size=page_size))
+    assert all(page.success for page in pages), [page.error_message for page in pages]
+    return pages
+
+
+def test_pages_keep_query_order(client):
+    query = "SELECT id, rev FROM orders ORDER BY rev DESC, id DESC"
+    pages = fetch_all_pages(client, 4, query=query)
+    paged = [tuple(row) for page in pages for row in page.data.itertuples(index=False)]
+
+    expected = client.execute_query(query).data
+    assert paged == [tuple(row) for row in expected.itertuples(index=False)]
+    assert len(pages) == 7
+
+
+def test_pages_keep_duplicate_rows(client):
+    pages = fetch_all_pages(client, 4, query="SELECT store FROM orders")
+    assert sum(page.row_count for page in pages) == 25
+
+
+def test_pages_respect_query_limit(client):
+    pages = fetch_all_pages(client, 4, query="SELECT id FROM orders ORDER BY id LIMIT 10")
+    ids = [value for page in pages for value in page.data['id']]
+    assert ids == list(range(1, 11))
+
+
+def test_duplicate_column_names(client):
+    query = "SELECT o.id, o.store, s.store FROM orders o JOIN stores s ON s.store = o.store"
+    page = client.execute_page(query=query, page_size=5)
+    assert page.success
+    assert list(page.data.columns) == ['id', 'store']
+
+    keyed = client.execute_page(query=query, page_size=5, key_columns=['id'])
+    assert keyed.success
+    assert list(keyed.data.columns) == ['id', 'store']
+
+
+def test_keyset_pages_with_blob_keys(client):
+    pages = fetch_all_pages(client, 3, query="SELECT DISTINCT tag FROM orders", key_columns=['tag'])
+    tags = [value for page in pages for value in page.data['tag']]
+    assert tags == sorted({bytes([i, 0xff]) for i in range(5)})
+
+
+def test_invalid_page_token(client):
+    result = client.execute_page(page_token="not-a-token")
+    assert not result.success
+    assert result.error_message == "Invalid page token"
+
+
+def test_keys_are_derived_for_plain_queries(client):
+    pages = fetch_all_pages(client, 4, query="SELECT store, ID FROM orders WHERE rev > ?", params=(2,))
+    assert pages[0].metadata['key_columns'] == ['id']
+    ids = [value for page in pages for value in page.data['ID']]
+    assert ids == [i for i in range(1, 26) if (i - 1) % 7 > 2]
+
+    for query in ("SELECT store, rev FROM orders", "SELECT id * 2 AS id FROM orders",
+                  "SELECT id FROM orders ORDER BY rev", "SELECT o.id FROM orders o JOIN stores s ON s.store = o.store",
+                  "SELECT id FROM (SELECT * FROM orders)"):
+        assert client.execute_page(query=query, page_size=4).metadata['key_columns'] is None, query
+
+
+def test_page_tokens_are_signed_and_portable(client, tmp_path):
+    page = client.execute_page(query="SELECT store FROM orders", page_size=4)
+    token = page.metadata['next_page_token']
+
+    other = SQLiteClient(client.database_path, enable_cache=False)
+    other.page_token_secret = client.page_token_secret
+    assert other.execute_page(page_token=token, page_size=4).row_count == 4
+
+    payload, _, signature = token.partition('.')
+    assert client.execute_page(page_token=payload[:-2] + "AA." + signature).error_message == "Invalid page token"
+    assert SQLiteClient(client.database_path).execute_page(page_token=token).error_message == "Invalid page token"
+
+
+@pytest.mark.parametrize("query", ["SELECT store FROM orders", "SELECT id, store FROM orders"])
+def test_first_page_is_cut_from_a_computed_result(client, monkeypatch, query):
+    result = client.execute_query(query)
+    expected = fetch_all_pages(client, 10, query=query)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("query was run again")
+    monkeypatch.setattr(client, '_fetch_offset_page', fail)
+    monkeypatch.setattr(client, '_fetch_keyset_page', fail)
+    page = client.execute_page(query=query, page_size=10, result=result)
+
+    assert page.data.equals(expected[0].data)
+    monkeypatch.undo()
+    rest = fetch_all_pages(client, 10, page_token=page.metadata['next_page_token'])
+    assert [page.data.equals(other.data) for page, other in zip(rest, expected[1:])] == [True, True]
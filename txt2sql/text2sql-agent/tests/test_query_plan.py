@@ -0,0 +1,61 @@
+import pytest
+
+from models.sqlite_client import SQLiteClient, row_limit, sql_tokens
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = SQLiteClient(str(tmp_path / "test.db"), enable_cache=False)
+    with client.write_pool.connection() as conn:
+        conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, store TEXT, amount REAL)")
+        conn.executemany("INSERT INTO sales (store, amount) VALUES (?, ?)",
+                         [(f"s{i % 10}", float(i)) for i in range(5000)])
+        conn.commit()
+    return client
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM t", (None, False)),
+    ("SELECT * FROM t LIMIT 10", (10, False)),
+    ("SELECT * FROM t LIMIT 10 OFFSET 5", (15, False)),
+    ("SELECT * FROM t LIMIT 5, 10", (15, False)),
+    ("SELECT * FROM (SELECT * FROM t LIMIT 3)", (None, False)),
+    ("SELECT count(*) FROM t LIMIT 1", (1, True)),
+    ("SELECT store, sum(amount) FROM t GROUP BY store", (None, True)),
+    ("SELECT DISTINCT store FROM t LIMIT 2", (2, True)),
+    ("SELECT * FROM t WHERE id IN (SELECT max(id) FROM u) LIMIT 4", (4, False)),
+])
+def test_row_limit(query, expected):
+    assert row_limit(sql_tokens(query)) == expected
+
+
+def test_limit_caps_streaming_cost(client):
+    full = client.explain_query("SELECT * FROM sales")
+    limited = client.explain_query("SELECT * FROM sales LIMIT 10")
+    capped = client.explain_query("SELECT * FROM sales", limit=100)
+    assert full.estimated_cost >= 5000
+    assert limited.estimated_cost == pytest.approx(10)
+    assert capped.estimated_cost == pytest.approx(100)
+
+
+def test_limit_does_not_cap_blocking_queries(client):
+    sorted_plan = client.explain_query("SELECT * FROM sales ORDER BY amount LIMIT 10")
+    aggregate = client.explain_query("SELECT count(*) FROM sales LIMIT 1")
+    assert sorted_plan.estimated_cost >= 5000
+    assert aggregate.estimated_cost >= 5000
+
+
+def test_select_is_explained_once(client, monkeypatch):
+    calls = []
+    explain = client.plan_advisor.explain
+    monkeypatch.setattr(client.plan_advisor, "explain", lambda *args: calls.append(args[1]) or explain(*args))
+
+    result = client.execute_query("SELECT store, amount FROM sales WHERE store = 's1'")
+    assert result.success
+    assert len(calls) == 1
+    assert result.metadata['full_scans'] == ['sales']
+
+
+def test_row_estimates_come_from_rowid(client):
+    client.explain_query("SELECT * FROM sales")
+    assert client.plan_advisor.row_counts['sales'] == 5000
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from models import rate_limiter
+from models.rate_limiter import RateLimiter, client_id
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    db_path = str(tmp_path / "rate_limits.db") if request.param == "sqlite" else None
+    return RateLimiter(rate_per_minute=60, burst=3, db_path=db_path)
+
+
+def test_burst_then_reject(limiter, clock):
+    assert [limiter.acquire("a")[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.acquire("a")
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+
+def test_quota_replenishes_at_rate(limiter, clock):
+    for _ in range(3):
+        limiter.acquire("a")
+    clock[0] += 1.0
+    assert limiter.acquire("a")[0]
+    assert not limiter.acquire("a")[0]
+
+
+def test_rejections_do_not_use_quota(limiter, clock):
+    for _ in range(10):
+        limiter.acquire("a")
+    clock[0] += 1.0
+    assert limiter.acquire("a")[0]
+
+
+def test_clients_have_separate_buckets(limiter, clock):
+    for _ in range(3):
+        limiter.acquire("a")
+    assert not limiter.acquire("a")[0]
+    assert limiter.acquire("b")[0]
+
+
+def test_rotating_unknown_api_keys_is_still_throttled(limiter, clock):
+    api_keys = frozenset({"known"})
+    results = [limiter.acquire(client_id(f"made-up-{i}", "10.0.0.1", api_keys))[0] for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert limiter.acquire(client_id("known", "10.0.0.1", api_keys))[0]
+
+
+def test_reset(limiter, clock):
+    for _ in range(3):
+        limiter.acquire("a")
+    limiter.reset("a")
+    assert limiter.acquire("a")[0]
+
+
+def test_database_is_created_on_first_use(tmp_path):
+    db_path = tmp_path / "rate_limits.db"
+    limiter = RateLimiter(db_path=str(db_path))
+    assert not db_path.exists()
+    assert limiter.acquire("a")[0]
+    assert db_path.exists()
+
+
+def test_shared_database_limits_across_instances(tmp_path, clock):
+    db_path = str(tmp_path / "rate_limits.db")
+    first = RateLimiter(rate_per_minute=60, burst=2, db_path=db_path)
+    second = RateLimiter(rate_per_minute=60, burst=2, db_path=db_path)
+    assert first.acquire("a")[0]
+    assert second.acquire("a")[0]
+    assert not first.acquire("a")[0]
+
+
+def test_concurrent_acquires_admit_exactly_the_burst(tmp_path, clock):
+    limiter = RateLimiter(rate_per_minute=60, burst=5, db_path=str(tmp_path / "rate_limits.db"))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(limiter.acquire("a")[0])) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 5
@@ -0,0 +1,58 @@
+import dataclasses
+import json
+
+import pytest
+
+from models.sqlite_client import SQLiteClient, schema_json_default
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = SQLiteClient(str(tmp_path / "test.db"), enable_cache=False)
+    with client.write_pool.connection() as conn:
+        conn.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT)")
+        conn.execute("INSERT INTO products (name) VALUES ('pen')")
+        conn.commit()
+    return client
+
+
+def test_snapshot_is_shared_and_read_only(client):
+    snapshot = client.get_schema_snapshot()
+    assert client.get_schema_snapshot() is snapshot
+    assert "Table: products" in snapshot.prompt_text
+    assert client.get_schema_prompt() is snapshot.prompt_text
+
+    schema = snapshot.schema_dicts['products']
+    with pytest.raises(TypeError):
+        schema['columns'][0]['name'] = 'injected'
+    with pytest.raises(TypeError):
+        snapshot.schema_dicts['injected'] = schema
+    with pytest.raises(AttributeError):
+        snapshot.tables.append('injected')
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.tables = ('injected',)
+
+    assert [column['name'] for column in schema['columns']] == ['id', 'name']
+    assert json.loads(json.dumps(snapshot.schema_dicts, default=schema_json_default))['products']['sample_data'] == [
+        {'id': 1, 'name': 'pen'}
+    ]
+
+
+def test_table_schemas_are_caller_owned_copies(client):
+    schema = client.get_table_schema('products')
+    schema.columns.clear()
+
+    assert [column['name'] for column in client.get_table_schema('products').columns] == ['id', 'name']
+    assert len(client.get_schema_snapshot().schema_dicts['products']['columns']) == 2
+
+
+def test_schema_change_loads_a_new_snapshot(client):
+    snapshot = client.get_schema_snapshot()
+    with client.write_pool.connection() as conn:
+        conn.execute("CREATE TABLE stores (id INTEGER PRIMARY KEY)")
+        conn.commit()
+
+    fresh = client.get_schema_snapshot()
+    assert fresh is not snapshot
+    assert fresh.tables == ('products', 'stores')
+    assert snapshot.tables == ('products',)